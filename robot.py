@@ -1,5 +1,4 @@
 ﻿import os
-import queue
 import re
 import sys
 import threading
@@ -11,16 +10,77 @@ from apscheduler.schedulers.blocking import BlockingScheduler
 from botpy import Client, Intents
 from botpy.message import Message, GroupMessage, C2CMessage
 
-from src.core.command import command, PermissionLevel
+from src.core.admission import AdmissionController, Admission
+from src.core.command import command, PermissionLevel, CommandLane
 from src.core.constants import Constants
-from src.core.interact import RobotMessage, call_handle_message
+from src.core.ingress import ingress_stats, is_public_command, ingress_limiter
+from src.core.interact import RobotMessage, call_handle_message, get_command_schedule
+from src.core.scheduler import FairScheduler
+from src.lib.cf_rating_calc import warm_up as warm_up_rating_calc
+from src.module.message import MessageType
 from src.module.peeper import daily_update_job, noon_report_job
 
-_query_queue = queue.Queue()
-_count_queue = queue.Queue()
 _terminate_lock = threading.Lock()
 _terminate_signal = False
 
+
+class WorkerLane:
+    """
+    一组共享同一调度队列的工作线程
+    队列按会话公平调度，加入队列前经过准入控制，按实测的处理耗时给出预计等待时间
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._scheduler = FairScheduler(name)
+        self._admission = AdmissionController(name, workers)
+
+    def submit(self, message: RobotMessage, priority: int, command_name: str) -> tuple[Admission, int]:
+        """
+        加入队列
+        :return: tuple[准入结果, 需要等待完成的请求数]，有空闲线程时请求数为 0
+        """
+        key = message.get_conversation_id()
+        admission = self._admission.admit(command_name, priority, self._scheduler.estimate_ahead(key, priority))
+        if not admission.admitted:
+            return admission, 0
+        ahead = self._scheduler.put(key, (message, command_name, admission.estimate, time.time()), priority)
+        busy = self._admission.get_stats()['busy']
+        return admission, max(ahead + busy - self.workers + 1, 0)
+
+    def drain(self) -> list[RobotMessage]:
+        messages = []
+        for message, _, estimate, _ in self._scheduler.drain():
+            self._admission.discard(estimate)
+            messages.append(message)
+        return messages
+
+    def start(self):
+        for idx in range(self.workers):
+            threading.Thread(target=self._handler, name=f"{self.name}-worker-{idx}").start()
+
+    def _handler(self):
+        while True:
+            with _terminate_lock:
+                if _terminate_signal:
+                    break
+            _, (message, command_name, estimate, enqueued_at) = self._scheduler.get()
+            self._admission.start(estimate)
+            start = time.perf_counter()
+            waited = time.time() - enqueued_at
+            handled = True
+            try:
+                handled = call_handle_message(message)
+            finally:
+                self._admission.finish(command_name, estimate, time.perf_counter() - start, waited, handled)
+
+
+_lanes = {
+    CommandLane.IO: WorkerLane("io", Constants.config.get('io_workers', 4)),
+    CommandLane.CPU: WorkerLane("cpu", Constants.config.get('cpu_workers', 2))
+}
+
 daily_sched = BlockingScheduler()
 noon_sched = BlockingScheduler()
 
@@ -49,32 +109,51 @@ def clear_message_queue():
     global _terminate_signal
     with _terminate_lock:
         _terminate_signal = True
-    while not _query_queue.empty():
-        try:
-            message: RobotMessage = _query_queue.get_nowait()
-        except queue.Empty:
-            break
-        message.reply("O宝被爆了！等待一段时间后再试试")
+    for lane in _lanes.values():
+        for message in lane.drain():
+            message.reply("O宝被爆了！等待一段时间后再试试")
 
 
-def queue_up_handler():
-    global _terminate_signal
-    while True:
-        with _terminate_lock:
-            is_terminate = _terminate_signal
-        if is_terminate:
-            break
-        message: RobotMessage = _query_queue.get()
-        call_handle_message(message)
-        _count_queue.get()
+def start_workers():
+    for lane in _lanes.values():
+        lane.start()
+
+
+def _get_rate_limit_keys(message: RobotMessage) -> tuple[str, str | None]:
+    """:return: tuple[用户的限流键, 群的限流键]，私聊时群的限流键为 None"""
+    conversation = message.get_conversation_id()
+    return f"user:{message.author_id}", conversation if message.message_type != MessageType.C2C else None
+
+
+def _check_rate_limit(message: RobotMessage, lane: CommandLane) -> bool:
+    """
+    按用户与群限流，管理员不受限制
+    :return: 是否允许加入队列
+    """
+    if message.user_permission_level.is_admin():
+        return True
+    user_key, group_key = _get_rate_limit_keys(message)
+    wait, limited_key = ingress_limiter.acquire(user_key, group_key, lane)
+    if limited_key is None:
+        return True
+    ingress_stats.shed(message.message_type.value, "user_limited" if limited_key != group_key else "group_limited")
+    if ingress_limiter.should_notify(limited_key):
+        message.reply(f"请求过于频繁，请 {max(wait, 1):.0f} 秒后再试")
+    return False
 
 
 def join_in_message(message: RobotMessage):
-    _count_queue.put(1)
-    size = _count_queue.qsize()
-    if size > 1:
-        message.reply(f"已加入处理队列，前方还有 {size - 1} 个请求")
-    _query_queue.put(message)
+    lane, priority, command_name = get_command_schedule(message)
+    if not _check_rate_limit(message, lane):
+        return
+    admission, ahead = _lanes[lane].submit(message, priority, command_name)
+    if not admission.admitted:
+        if not message.user_permission_level.is_admin():  # 未被处理的请求不占用限流额度
+            ingress_limiter.refund(*_get_rate_limit_keys(message), lane)
+        Constants.log.info(f"Rejected {command_name} from {message.get_conversation_id()}: {admission.reason}.")
+        message.reply(f"当前请求较多，预计需要等待 {admission.eta:.0f} 秒，请稍后再试")
+    elif ahead > 0:
+        message.reply(f"已加入处理队列，前方还有 {ahead} 个请求，预计 {admission.eta:.0f} 秒后完成")
 
 
 class MyClient(Client):
@@ -90,26 +169,33 @@ class MyClient(Client):
         Constants.log.info(
             f"{self.robot.name} receive public message {message.content} {message.attachments} "
             f"from {message.channel_id}")
+        ingress_stats.accept("guild_at")
         packed_message = RobotMessage(self.api)
         packed_message.setup_guild_message(self.loop, message)
         join_in_message(packed_message)
 
     async def on_message_create(self, message: Message):
+        content = message.content
+        # 公开消息大多是闲聊，在构造 RobotMessage 与排队之前丢弃
+        if not is_public_command(content):
+            ingress_stats.shed("guild_public", "not_command")
+            return
+        if re.search(r'<@!\d+>', content):  # 带 at 的消息由 on_at_message_create 处理
+            return
+
         Constants.log.info(
             f"{self.robot.name} receive global message {message.content} {message.attachments} "
             f"from {message.channel_id}")
-        content = message.content
-
+        ingress_stats.accept("guild_public")
         packed_message = RobotMessage(self.api)
         packed_message.setup_guild_message(self.loop, message, is_public=True)
-
-        if not re.search(r'<@!\d+>', content):
-            join_in_message(packed_message)
+        join_in_message(packed_message)
 
     async def on_group_at_message_create(self, message: GroupMessage):
         Constants.log.info(
             f"{self.robot.name} receive group message {message.content} {message.attachments} "
             f"from {message.group_openid}")
+        ingress_stats.accept("group")
         packed_message = RobotMessage(self.api)
         packed_message.setup_group_message(self.loop, message)
         join_in_message(packed_message)
@@ -118,6 +204,7 @@ class MyClient(Client):
         Constants.log.info(
             f"{self.robot.name} receive private message {message.content} {message.attachments} "
             f"from {message.author.user_openid}")
+        ingress_stats.accept("c2c")
         packed_message = RobotMessage(self.api)
         packed_message.setup_c2c_message(self.loop, message)
         join_in_message(packed_message)
@@ -133,7 +220,11 @@ def open_robot_session():
     # 检查配置文件中的目录是否合法，防止错误配置和命令意外执行
     check_path_in_config()
 
-    threading.Thread(target=queue_up_handler, args=[]).start()
+    # 预热 rating 预测，避免比赛期间第一次 /cf standings 的额外延迟
+    if Constants.config.get('cf_predict_warmup', False):
+        warm_up_rating_calc()
+
+    start_workers()
 
     intents = botpy.Intents.default()  # 对目前已支持的所有事件进行监听
     client = MyClient(intents=intents, timeout=60)
@@ -0,0 +1,146 @@
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from src.core.constants import Constants
+from src.core.fetch_metrics import RollingHistogram
+
+_queue_max_pending = Constants.config.get('queue_max_pending', 64)
+_queue_max_wait = Constants.config.get('queue_max_wait', 5 * 60)
+_queue_shed_ratio = Constants.config.get('queue_shed_ratio', 0.75)
+_service_time_alpha = 0.2  # EWMA 中新样本的权重
+_default_service_time = 5  # 尚无样本的指令按该耗时（秒）估计
+_latency_window = 60  # 近期响应延迟的统计窗口（秒）
+
+_controllers: dict[str, 'AdmissionController'] = {}
+
+
+class ServiceTimeEstimator:
+    """按指令统计处理耗时的指数加权移动平均"""
+
+    def __init__(self, alpha: float = _service_time_alpha, default: float = _default_service_time):
+        self._alpha = alpha
+        self._default = default
+        self._estimates: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, command: str) -> float:
+        with self._lock:
+            return self._estimates.get(command, self._default)
+
+    def update(self, command: str, seconds: float):
+        with self._lock:
+            prev = self._estimates.get(command)
+            self._estimates[command] = seconds if prev is None else prev + self._alpha * (seconds - prev)
+
+    def get_stats(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._estimates)
+
+
+@dataclass
+class Admission:
+    admitted: bool
+    eta: float  # 预计多少秒后处理完成
+    estimate: float  # 该请求本身预计的处理耗时
+    reason: str | None = None  # 被拒绝的原因
+
+
+class AdmissionController:
+    """
+    一组工作线程的准入控制
+    按实测的各指令处理耗时估计排队时间，队列超过软上限时拒绝低优先级请求，
+    队列已满或预计等待过久时拒绝全部请求，并给出预计的等待时间
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int = _queue_max_pending,
+                 max_wait: float = _queue_max_wait, shed_ratio: float = _queue_shed_ratio):
+        self.name = name
+        self.workers = workers
+        self._max_pending = max_pending
+        self._max_wait = max_wait
+        self._shed_pending = int(max_pending * shed_ratio)
+        self._service_times = ServiceTimeEstimator()
+        self._pending, self._pending_seconds = 0, 0.0
+        self._busy, self._busy_seconds = 0, 0.0
+        self._admitted = 0
+        self._rejected = Counter()
+        self._latency = RollingHistogram(window=_latency_window)
+        self._lock = threading.Lock()
+        _controllers[name] = self
+
+    def _estimate_start(self, ahead: int) -> float:
+        """排在前面的请求按队列中的平均耗时估计，处理中的请求按剩余一半估计"""
+        if self._busy + ahead < self.workers:
+            return 0
+        mean_pending = self._pending_seconds / self._pending if self._pending > 0 else 0
+        return (ahead * mean_pending + self._busy_seconds / 2) / self.workers
+
+    def admit(self, command: str, priority: int, ahead: int) -> Admission:
+        """
+        :param ahead: 调度队列中排在该请求之前的请求数
+        """
+        estimate = self._service_times.estimate(command)
+        with self._lock:
+            eta = self._estimate_start(ahead) + estimate
+            reason = None
+            if self._pending >= self._max_pending:
+                reason = "queue_full"
+            elif priority > 0 and self._pending >= self._shed_pending:
+                reason = "low_priority"
+            elif eta > self._max_wait:
+                reason = "too_slow"
+            if reason is not None:
+                self._rejected[reason] += 1
+                return Admission(False, eta, estimate, reason)
+            self._admitted += 1
+            self._pending += 1
+            self._pending_seconds += estimate
+            return Admission(True, eta, estimate)
+
+    def start(self, estimate: float):
+        with self._lock:
+            self._pending -= 1
+            self._pending_seconds -= estimate
+            self._busy += 1
+            self._busy_seconds += estimate
+
+    def finish(self, command: str, estimate: float, elapsed: float, waited: float = 0, sampled: bool = True):
+        """
+        :param elapsed: 处理耗时
+        :param waited: 排队等待的时间，与处理耗时一起计入近期的响应延迟
+        :param sampled: 是否实际执行了指令，命中回复缓存或被合并的请求耗时极短，不计入指令的平均耗时
+        """
+        if sampled:
+            self._service_times.update(command, elapsed)
+        with self._lock:
+            self._latency.add(waited + elapsed)
+            self._busy -= 1
+            self._busy_seconds -= estimate
+
+    def discard(self, estimate: float):
+        """未处理即被清出队列的请求"""
+        with self._lock:
+            self._pending -= 1
+            self._pending_seconds -= estimate
+
+    def get_stats(self) -> dict:
+        """
+        :return: {'pending': 排队数, 'busy': 处理中的请求数, 'backlog': 预计积压的处理时间,
+                  'admitted': 接收数, 'rejected': {原因: 拒绝数}, 'latency': 近期响应延迟统计,
+                  'service_times': {指令: 平均耗时}}
+        """
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'busy': self._busy,
+                'backlog': (self._pending_seconds + self._busy_seconds / 2) / self.workers,
+                'admitted': self._admitted,
+                'rejected': dict(self._rejected),
+                'latency': self._latency.get_summary(),
+                'service_times': self._service_times.get_stats()
+            }
+
+
+def get_controllers() -> dict[str, AdmissionController]:
+    return dict(_controllers)
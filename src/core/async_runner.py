@@ -0,0 +1,69 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine
+
+import aiohttp
+
+from src.core.constants import Constants
+from src.core.deadline import get_timeout
+from src.core.exception import DeadlineExceededError
+from src.core.fetch_metrics import get_trace_config
+
+_pool_maxsize = Constants.config.get('http_pool_maxsize', 8)
+_async_pool_limit = Constants.config.get('async_pool_limit', 64)
+
+_deadline_grace = 1
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+_client_session: aiohttp.ClientSession | None = None
+
+
+def get_fetch_loop() -> asyncio.AbstractEventLoop:
+    """获取专用于网络请求的后台事件循环，首次调用时启动"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="fetch-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro: Coroutine) -> Any:
+    """在后台事件循环中执行协程，并阻塞等待结果，供同步的指令处理线程调用"""
+    loop = get_fetch_loop()
+    if threading.current_thread().name == "fetch-loop":  # 在循环内阻塞等待自身会造成死锁
+        coro.close()
+        raise RuntimeError("run_async cannot be called inside the fetch loop, use await instead.")
+    try:
+        timeout = get_timeout(None)
+    except DeadlineExceededError:
+        coro.close()
+        raise
+    future = asyncio.run_coroutine_threadsafe(coro, loop)  # 协程会继承当前上下文，包括指令的截止时间
+    try:
+        # 协程内的请求会先按截止时间超时，这里多等待片刻作为兜底，以便拿到协程自身的异常
+        return future.result(timeout=timeout + _deadline_grace if timeout is not None else None)
+    except concurrent.futures.TimeoutError as e:
+        if future.done():  # 协程自身抛出的超时异常
+            raise
+        future.cancel()
+        raise DeadlineExceededError("Deadline exceeded while waiting for coroutine.") from e
+
+
+def run_async_gather(*coros: Coroutine) -> list:
+    """在后台事件循环中并发执行多个协程，按传入顺序返回结果"""
+    async def _gather():
+        return await asyncio.gather(*coros)
+
+    return run_async(_gather())
+
+
+async def get_client_session() -> aiohttp.ClientSession:
+    """获取后台事件循环上共享的 aiohttp 会话，同一 host 的连接保持 keep-alive 复用"""
+    global _client_session
+    if _client_session is None or _client_session.closed:
+        connector = aiohttp.TCPConnector(limit=_async_pool_limit, limit_per_host=_pool_maxsize)
+        _client_session = aiohttp.ClientSession(connector=connector, trace_configs=[get_trace_config()])
+    return _client_session
@@ -1,10 +1,68 @@
+from enum import Enum
+from typing import Callable
+
 from src.core.perm import PermissionLevel
 
 __commands__ = {}
 
+_trie_end = ''  # 字典树中标记前缀结束的键，指令的每个字符都非空，不会与之冲突
+
+
+class CommandIndex:
+    """
+    指令的查找索引，完整匹配的指令使用哈希表，以 * 结尾的前缀指令使用字典树
+    查找的复杂度与指令长度线性相关，多个前缀指令匹配时优先取最长的前缀，结果与注册顺序无关
+    """
+
+    def __init__(self):
+        self._exact: dict[str, tuple] = {}
+        self._trie: dict = {}
+
+    def add(self, cmd: str, entry: tuple):
+        if cmd[-1] != '*':
+            self._exact[cmd] = entry
+            return
+        node = self._trie
+        for char in cmd[:-1]:
+            node = node.setdefault(char, {})
+        node[_trie_end] = (cmd, entry)
+
+    def find(self, func: str, accept: Callable[[tuple], bool] | None = None) -> tuple[str, tuple] | None:
+        """
+        查找指令，完整匹配优先，其次为最长的前缀匹配
+        :param accept: 过滤候选指令的注册信息，被过滤时继续尝试更短的前缀
+        :return: tuple[注册的指令名, 指令注册信息] | None
+        """
+        entry = self._exact.get(func)
+        if entry is not None and (accept is None or accept(entry)):
+            return func, entry
+        candidates = []
+        node = self._trie
+        for char in func:
+            node = node.get(char)
+            if node is None:
+                break
+            if _trie_end in node:
+                candidates.append(node[_trie_end])
+        for cmd, entry in reversed(candidates):
+            if accept is None or accept(entry):
+                return cmd, entry
+        return None
+
+
+__command_index__ = CommandIndex()
+
+
+class CommandLane(Enum):
+    IO = "io"  # 以网络请求为主的指令
+    CPU = "cpu"  # 以渲染、OCR、子进程为主的指令
+
 
 def command(tokens: list, permission_level: PermissionLevel = PermissionLevel.USER,
-            is_command: bool = True, need_check_exclude: bool = False):
+            is_command: bool = True, need_check_exclude: bool = False, timeout: float | None = None,
+            lane: CommandLane = CommandLane.IO, priority: int = 0,
+            coalesce: bool | Callable[[list[str]], bool] = False, cache_ttl: float | None = None,
+            cache_key: Callable[[list[str]], str | None] | None = None):
     """
         创建一条命令。
 
@@ -12,6 +70,13 @@ def command(tokens: list, permission_level: PermissionLevel = PermissionLevel.US
         :param permission_level: 执行需要的权限等级，默认为USER，代表用户都可执行，MOD为内容审核用户，ADMIN为管理员
         :param is_command: 代表该条指令需不需要前置 "/"
         :param need_check_exclude: 代表该条指令是否需要检查群号白名单
+        :param timeout: 指令的处理时限（秒），其中的网络请求与 shell 调用共享该时限，默认为配置中的 command_timeout
+        :param lane: 指令在哪一组工作线程中执行，CPU 密集的指令使用 CommandLane.CPU，避免阻塞网络查询类指令
+        :param priority: 同一组工作线程中的调度优先级，数值越小越先处理，开销大的渲染类指令应设置更大的值
+        :param coalesce: 是否合并并发的相同指令，只执行一次并将回复发给所有请求，仅适用于结果与发送者无关的指令；
+                         也可以传入以 tokens 判断是否合并的函数，用于排除随机选题等每次结果不同的子指令
+        :param cache_ttl: 回复的缓存时长（秒），TTL 内任意会话发送的相同指令直接使用缓存的回复，仅适用于只读且与发送者无关的指令
+        :param cache_key: 以 tokens 计算缓存键的函数，返回 None 时不使用缓存，默认以完整的指令内容作为缓存键
     """
 
     if tokens is None:
@@ -19,8 +84,23 @@ def command(tokens: list, permission_level: PermissionLevel = PermissionLevel.US
 
     def decorator(func):
         for token in tokens:
-            __commands__[f'/{token}' if is_command else f'{token}'] = (
-                func, permission_level, is_command, need_check_exclude)
+            cmd = f'/{token}' if is_command else f'{token}'
+            __commands__[cmd] = (func, permission_level, is_command, need_check_exclude, timeout, lane, priority,
+                                 coalesce, cache_ttl, cache_key)
+            __command_index__.add(cmd, __commands__[cmd])
         return func
 
     return decorator
+
+
+def coalesce_except(*subcommands: str) -> Callable[[list[str]], bool]:
+    """合并除指定子指令以外的并发相同指令，如 coalesce_except("pick") 不合并 /cf pick"""
+    return lambda tokens: len(tokens) < 2 or tokens[1] not in subcommands
+
+
+def cache_subcommands(*subcommands: str) -> Callable[[list[str]], str | None]:
+    """
+    仅缓存指定的子指令，如 cache_subcommands("info") 缓存 /cf info jiangly
+    回复中会原样带上用户输入的参数，因此参数区分大小写
+    """
+    return lambda tokens: ' '.join(tokens[1:]) if len(tokens) >= 2 and tokens[1] in subcommands else None
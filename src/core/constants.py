@@ -60,7 +60,8 @@ class Constants:
             "/cf id [handle]: 获取用户名为 handle 的 Codeforces 基础用户信息卡片.",
             "/cf info [handle]: 获取用户名为 handle 的 Codeforces 详细用户信息.",
             "/cf recent [handle] (count): 获取用户名为 handle 的 Codeforces 最近 count 发提交，count 默认为 5.",
-            "/cf pick [标签|all] (难度) (new): 从 Codeforces 上随机选题. 标签中间不能有空格，支持模糊匹配. 难度为整数或一个区间，格式为xxx-xxx"
+            "/cf pick [标签|all] (难度) (new): 从 Codeforces 上随机选题. 标签中间不能有空格，支持模糊匹配"
+            "，多个标签用 , 连接表示同时包含，标签前加 ! 表示不包含，如 dp,greedy,!math. 难度为整数或一个区间，格式为xxx-xxx"
             ". 末尾加上 new 参数则会忽视 P1000A 以前的题.",
             "/cf contests: 列出最近的 Codeforces 比赛.",
             "/cf tags: 用于列出 codeforces 平台的 tags (辅助 pick)."
@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from src.core.constants import Constants
+from src.core.exception import DeadlineExceededError
+
+_command_timeout = Constants.config.get('command_timeout', 120)
+_fetch_timeout = Constants.config.get('fetch_timeout', 30)
+
+# tuple[截止时间, 计算截止时间所用的时钟]
+_deadline: ContextVar[tuple[float, Callable[[], float]] | None] = ContextVar('deadline', default=None)
+
+
+def get_command_timeout() -> float | None:
+    return _command_timeout
+
+
+@contextmanager
+def deadline_scope(seconds: float | None, clock: Callable[[], float] = time.monotonic):
+    """
+    在当前上下文中设置截止时间，嵌套时取更早的截止时间
+    截止时间通过 contextvars 传递，可以跟随 run_async 与 asyncio.to_thread 进入其他线程
+    :param clock: 计时所用的时钟，嵌套时沿用最外层的时钟
+    """
+    if seconds is None:
+        yield
+        return
+    outer = _deadline.get()
+    if outer is not None:
+        clock = outer[1]
+    deadline = clock() + seconds
+    token = _deadline.set((deadline if outer is None else min(outer[0], deadline), clock))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining() -> float | None:
+    """
+    :return: 距离截止时间的秒数，未设置截止时间时为 None
+    """
+    current = _deadline.get()
+    if current is None:
+        return None
+    deadline, clock = current
+    return deadline - clock()
+
+
+def is_expired() -> bool:
+    remaining = get_remaining()
+    return remaining is not None and remaining <= 0
+
+
+def check_deadline(stage: str = ""):
+    """截止时间已过时抛出 DeadlineExceededError"""
+    if is_expired():
+        raise DeadlineExceededError(f"Deadline exceeded{f' before {stage}' if stage else ''}.")
+
+
+def get_timeout(default: float | None = _fetch_timeout) -> float | None:
+    """
+    获取单次调用的超时时间，为默认超时与剩余时间中的较小值，剩余时间随调用不断缩短
+    :return: 秒数，均未设置时为 None
+    """
+    check_deadline()
+    remaining = get_remaining()
+    if remaining is None:
+        return default
+    if default is None:
+        return remaining
+    return min(default, remaining)
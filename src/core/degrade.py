@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Callable
+
+from src.core.admission import get_controllers
+from src.core.constants import Constants
+
+_degrade_enter_pending = Constants.config.get('degrade_enter_pending', 24)
+_degrade_exit_pending = Constants.config.get('degrade_exit_pending', 8)
+_degrade_enter_latency = Constants.config.get('degrade_enter_latency', 60)
+_degrade_exit_latency = Constants.config.get('degrade_exit_latency', 20)
+_degrade_min_duration = Constants.config.get('degrade_min_duration', 60)
+_degrade_check_interval = 1  # 两次检查负载之间的最短间隔（秒）
+
+
+class DegradeMode:
+    """
+    高负载时的降级模式，降级时各指令将图片渲染等开销大的回复替换为已有的文本版本
+    任一组工作线程的排队数或近期 p95 响应延迟超过进入阈值时降级，
+    全部低于更低的退出阈值且降级已持续一段时间后自动恢复，避免在阈值附近来回切换
+    """
+
+    def __init__(self, enter_pending: int = _degrade_enter_pending, exit_pending: int = _degrade_exit_pending,
+                 enter_latency: float = _degrade_enter_latency, exit_latency: float = _degrade_exit_latency,
+                 min_duration: float = _degrade_min_duration, check_interval: float = _degrade_check_interval,
+                 clock: Callable[[], float] = time.time):
+        self._enter_pending = enter_pending
+        self._exit_pending = exit_pending
+        self._enter_latency = enter_latency
+        self._exit_latency = exit_latency
+        self._min_duration = min_duration
+        self._check_interval = check_interval
+        self._clock = clock
+        self._degraded = False
+        self._since = 0.0
+        self._checked_at = 0.0
+        self._switches = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def measure() -> tuple[int, float]:
+        """
+        :return: tuple[各组工作线程中最多的排队数, 最高的近期 p95 响应延迟]
+        """
+        pending, latency = 0, 0.0
+        for controller in get_controllers().values():
+            stats = controller.get_stats()
+            pending = max(pending, stats['pending'])
+            latency = max(latency, stats['latency'].get('p95', 0))
+        return pending, latency
+
+    def update(self, pending: int, latency: float) -> bool:
+        """根据当前负载切换状态，返回是否处于降级模式"""
+        with self._lock:
+            now = self._clock()
+            if not self._degraded and (pending >= self._enter_pending or latency >= self._enter_latency):
+                self._degraded, self._since = True, now
+                self._switches += 1
+                Constants.log.warn(f"Entered degrade mode, pending {pending}, p95 latency {latency:.1f}s.")
+            elif (self._degraded and now - self._since >= self._min_duration and
+                  pending <= self._exit_pending and latency <= self._exit_latency):
+                self._degraded, self._since = False, now
+                self._switches += 1
+                Constants.log.info(f"Left degrade mode, pending {pending}, p95 latency {latency:.1f}s.")
+            return self._degraded
+
+    def is_degraded(self) -> bool:
+        """供指令调用的入口，负载最多每隔 check_interval 秒检查一次"""
+        with self._lock:
+            now = self._clock()
+            if now - self._checked_at < self._check_interval:
+                return self._degraded
+            self._checked_at = now
+        return self.update(*self.measure())
+
+    def get_stats(self) -> dict:
+        """
+        :return: {'degraded': 是否降级, 'since': 当前状态开始的时间戳, 'switches': 切换次数}
+        """
+        with self._lock:
+            return {'degraded': self._degraded, 'since': self._since, 'switches': self._switches}
+
+
+degrade_mode = DegradeMode()
@@ -14,11 +14,31 @@ class ModuleRuntimeError(OSError):
         super().__init__(*args)
 
 
+class CircuitOpenError(ConnectionError):
+    """ Requests to an unhealthy host are short-circuited. """
+    def __init__(self, *args):
+        super().__init__(*args)
+
+
+class DeadlineExceededError(TimeoutError):
+    """ The processing budget of a command has run out. """
+    def __init__(self, *args):
+        super().__init__(*args)
+
+
 exception_handle_rules = {
     (TimeoutError, ConnectionError, ClientError, ServerError): {
         'detail': False,
         'message': '网络不稳定，请稍后重试'
     },
+    CircuitOpenError: {
+        'detail': False,
+        'message': '目标平台暂时无法访问，请稍后重试'
+    },
+    DeadlineExceededError: {
+        'detail': False,
+        'message': '处理超时，请稍后重试'
+    },
     UnauthorizedError: {
         'detail': True,
         'message': '访问受限，请联系管理员'
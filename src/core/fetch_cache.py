@@ -0,0 +1,199 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from src.core.constants import Constants
+
+# 默认的按 url 正则匹配的缓存时长（秒），未匹配的请求不缓存
+_default_ttl_rules = {
+    r'^https://codeforces\.com/api/contest\.list': 60,
+    r'^https://codeforces\.com/api/problemset\.problems': 60 * 60,
+    r'^https://atcoder\.jp/contests/$': 60,
+    r'^https://ac\.nowcoder\.com/acm/contest/vip-index': 2 * 60,
+    r'^https://clist\.by/api/v4/problem': 60 * 60,
+}
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    ttl: int
+    stored_at: float = field(default_factory=time.time)
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at <= self.ttl
+
+    def age(self) -> int:
+        return int(time.time() - self.stored_at)
+
+    def get_conditional_headers(self) -> dict[str, str]:
+        """构造条件请求头，host 支持时可以直接得到 304"""
+        received = {key.lower(): val for key, val in self.headers.items()}
+        headers = {}
+        if 'etag' in received:
+            headers['If-None-Match'] = received['etag']
+        if 'last-modified' in received:
+            headers['If-Modified-Since'] = received['last-modified']
+        return headers
+
+
+class ResponseCache:
+    """
+    fetch_url 下层的响应缓存
+    按 url 正则配置缓存时长，LRU 淘汰以限制内存占用，可选持久化到 output_path 下
+    从内存中淘汰的条目仍保留在磁盘上，再次访问时重新载入，磁盘上的条目仅在过期过久或清空缓存时删除
+    """
+
+    def __init__(self, ttl_rules: dict[str, int], max_entries: int, max_bytes: int,
+                 max_stale: int, persist_dir: str | None = None):
+        self._ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules.items()]
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_stale = max_stale
+        self._persist_dir = persist_dir
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        if self._persist_dir is not None:
+            if not os.path.exists(self._persist_dir):
+                os.makedirs(self._persist_dir)
+            self._prune_persisted()
+
+    @staticmethod
+    def get_key(method: str, url: str) -> str:
+        return hashlib.sha1(f"{method.lower()} {url}".encode()).hexdigest()
+
+    def get_ttl(self, url: str) -> int | None:
+        return next((ttl for pattern, ttl in self._ttl_rules if pattern.search(url)), None)
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """获取缓存，过期过久的缓存不再用于兜底"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._put(key, entry)
+            if entry is None:
+                return None
+            if entry.age() > entry.ttl + self._max_stale:
+                self._pop(key)
+                self._remove_persisted(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: str, entry: CacheEntry):
+        if len(entry.content) > self._max_bytes:
+            return
+        with self._lock:
+            self._put(key, entry)
+            self._dump(key, entry)
+
+    def refresh(self, key: str, entry: CacheEntry):
+        """收到 304 时顺延缓存时间"""
+        entry.stored_at = time.time()
+        with self._lock:
+            self._dump(key, entry)
+
+    def clear(self):
+        """清空内存与磁盘上的全部缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            if self._persist_dir is not None:
+                for file_name in os.listdir(self._persist_dir):
+                    if file_name.endswith('.json'):
+                        self._remove_persisted(file_name[:-len('.json')])
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._total_bytes}
+
+    def _put(self, key: str, entry: CacheEntry):
+        if key in self._entries:
+            self._total_bytes -= len(self._entries[key].content)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._total_bytes += len(entry.content)
+        while len(self._entries) > self._max_entries or self._total_bytes > self._max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str):
+        """仅从内存中移除"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry.content)
+
+    def _remove_persisted(self, key: str):
+        if self._persist_dir is None:
+            return
+        try:
+            os.remove(self._get_persist_path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            Constants.log.warn(f"Remove persisted fetch cache failed: {e}")
+
+    def _prune_persisted(self):
+        """启动时删除过期过久的持久化缓存，按文件修改时间与最长的缓存时长判断，避免磁盘占用无限增长"""
+        max_age = max((ttl for _, ttl in self._ttl_rules), default=0) + self._max_stale
+        now = time.time()
+        for file_name in os.listdir(self._persist_dir):
+            path = os.path.join(self._persist_dir, file_name)
+            if file_name.endswith('.json') and now - os.path.getmtime(path) > max_age:
+                self._remove_persisted(file_name[:-len('.json')])
+
+    def _get_persist_path(self, key: str) -> str:
+        return os.path.join(self._persist_dir, f"{key}.json")
+
+    def _dump(self, key: str, entry: CacheEntry):
+        if self._persist_dir is None:
+            return
+        try:
+            with open(self._get_persist_path(key), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'url': entry.url,
+                    'status_code': entry.status_code,
+                    'headers': entry.headers,
+                    'content': base64.b64encode(entry.content).decode(),
+                    'ttl': entry.ttl,
+                    'stored_at': entry.stored_at
+                }, f)
+        except OSError as e:
+            Constants.log.warn(f"Persist fetch cache failed: {e}")
+
+    def _load(self, key: str) -> CacheEntry | None:
+        if self._persist_dir is None or not os.path.exists(self._get_persist_path(key)):
+            return None
+        try:
+            with open(self._get_persist_path(key), 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            raw['content'] = base64.b64decode(raw['content'])
+            return CacheEntry(**raw)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            Constants.log.warn(f"Load fetch cache failed: {e}")
+            return None
+
+
+_config_ttl_rules = Constants.config.get('fetch_cache_ttl', {})
+
+response_cache = ResponseCache(
+    ttl_rules={**_config_ttl_rules,  # 配置的规则优先匹配
+               **{pattern: ttl for pattern, ttl in _default_ttl_rules.items() if pattern not in _config_ttl_rules}},
+    max_entries=Constants.config.get('fetch_cache_max_entries', 256),
+    max_bytes=Constants.config.get('fetch_cache_max_bytes', 64 * 1024 * 1024),
+    max_stale=Constants.config.get('fetch_cache_max_stale', 24 * 60 * 60),
+    persist_dir=(os.path.join(Constants.config["output_path"], "Fetch-Cache")
+                 if Constants.config.get('fetch_cache_persist', False) else None)
+)
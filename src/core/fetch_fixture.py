@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+
+from src.core.constants import Constants
+
+
+class FixtureMode(Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class FixtureTransport:
+    """
+    fetch_url 与 save_img 下层的录制/回放传输层，便于离线测试与性能分析
+    录制模式下将实际收到的响应保存为夹具文件，回放模式下不访问网络，按请求读取夹具文件，可注入固定延迟
+    """
+
+    def __init__(self, mode: FixtureMode = FixtureMode.OFF, path: str | None = None, latency: float = 0):
+        self.mode = mode
+        self.path = path
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(method: str, url: str, payload: dict | None = None) -> str:
+        raw = f"{method.lower()} {url}"
+        if payload is not None:
+            raw += f" {json.dumps(payload, sort_keys=True, ensure_ascii=False)}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def is_replaying(self) -> bool:
+        return self.mode == FixtureMode.REPLAY
+
+    def is_recording(self) -> bool:
+        return self.mode == FixtureMode.RECORD
+
+    def _get_fixture_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def record(self, method: str, url: str, payload: dict | None,
+               status_code: int, headers: dict[str, str], content: bytes):
+        if not self.is_recording():
+            return
+        with self._lock:
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            with open(self._get_fixture_path(self.get_key(method, url, payload)), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'method': method.lower(),
+                    'url': url,
+                    'status_code': status_code,
+                    'headers': headers,
+                    'content': base64.b64encode(content).decode()
+                }, f, ensure_ascii=False, indent=4)
+        Constants.log.info(f"Recorded fixture of {url}.")
+
+    def load(self, method: str, url: str, payload: dict | None = None) -> tuple[int, dict[str, str], bytes]:
+        """
+        读取夹具，未录制的请求视为无法连接
+        :return: tuple[状态码, 响应头, 响应体]
+        """
+        fixture_path = self._get_fixture_path(self.get_key(method, url, payload))
+        if not os.path.exists(fixture_path):
+            raise ConnectionError(f"No fixture recorded for {method.upper()} {url}.")
+        with open(fixture_path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        return raw['status_code'], raw['headers'], base64.b64decode(raw['content'])
+
+    def replay(self, method: str, url: str, payload: dict | None = None) -> tuple[int, dict[str, str], bytes]:
+        fixture = self.load(method, url, payload)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return fixture
+
+    async def async_replay(self, method: str, url: str,
+                           payload: dict | None = None) -> tuple[int, dict[str, str], bytes]:
+        """replay 的协程版本，延迟不阻塞事件循环"""
+        fixture = self.load(method, url, payload)
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return fixture
+
+    @contextmanager
+    def use(self, mode: FixtureMode, path: str, latency: float = 0):
+        """临时切换模式，如在测试中 with fetch_fixture.use(FixtureMode.REPLAY, "fixtures"): ..."""
+        prev = self.mode, self.path, self.latency
+        self.mode, self.path, self.latency = mode, path, latency
+        try:
+            yield self
+        finally:
+            self.mode, self.path, self.latency = prev
+
+
+fetch_fixture = FixtureTransport(
+    mode=FixtureMode(Constants.config.get('fetch_fixture_mode', 'off')),
+    path=Constants.config.get('fetch_fixture_path', os.path.join(Constants.config["output_path"], "Fetch-Fixture")),
+    latency=Constants.config.get('fetch_fixture_latency', 0)
+)
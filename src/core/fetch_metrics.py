@@ -0,0 +1,219 @@
+import re
+import threading
+import time
+from collections import deque, Counter
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlsplit
+
+from aiohttp import TraceConfig
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from src.core.constants import Constants
+
+_metrics_window = Constants.config.get('fetch_metrics_window', 60 * 60)
+_metrics_max_samples = 1024  # 单个直方图最多保留的样本数，避免高频请求占用过多内存
+_max_endpoints_per_host = 64
+
+_phases = threading.local()
+
+
+def begin_phases():
+    """开始记录当前线程中一次请求的各阶段耗时"""
+    _phases.timings = {}
+
+
+def record_phase(name: str, seconds: float):
+    timings = getattr(_phases, 'timings', None)
+    if timings is not None:
+        timings[name] = timings.get(name, 0) + seconds
+
+
+def end_phases() -> dict[str, float]:
+    timings = getattr(_phases, 'timings', None) or {}
+    _phases.timings = None
+    return timings
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """记录新建连接的耗时，urllib3 中域名解析与 TCP 连接在同一步完成，因此二者合并计入 connect"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            record_phase('connect', time.perf_counter() - start)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """在 TimedHTTPConnection 的基础上额外记录 TLS 握手耗时"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._conn_seconds = time.perf_counter() - start
+            record_phase('connect', self._conn_seconds)
+
+    def connect(self):
+        self._conn_seconds = 0
+        start = time.perf_counter()
+        super().connect()
+        record_phase('tls', max(0.0, time.perf_counter() - start - self._conn_seconds))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+timed_pool_classes = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+def get_trace_config() -> TraceConfig:
+    """aiohttp 的请求追踪，可以分别得到域名解析、建立连接与首字节耗时，写入请求时传入的 trace_request_ctx"""
+
+    async def on_request_start(_, ctx, __):
+        ctx.start = time.perf_counter()
+
+    async def on_dns_start(_, ctx, __):
+        ctx.dns_start = time.perf_counter()
+
+    async def on_dns_end(_, ctx, __):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx['dns'] = time.perf_counter() - ctx.dns_start
+
+    async def on_connection_start(_, ctx, __):
+        ctx.conn_start = time.perf_counter()
+
+    async def on_connection_end(_, ctx, __):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx['connect'] = (time.perf_counter() - ctx.conn_start
+                                                - ctx.trace_request_ctx.get('dns', 0))
+
+    async def on_request_end(_, ctx, __):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx['ttfb'] = time.perf_counter() - ctx.start
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connection_start)
+    trace_config.on_connection_create_end.append(on_connection_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class RollingHistogram:
+    """只保留时间窗口内样本的直方图"""
+
+    def __init__(self, window: float = _metrics_window, max_samples: int = _metrics_max_samples,
+                 clock: Callable[[], float] = time.time):
+        self._window = window
+        self._clock = clock
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, value: float):
+        self._samples.append((self._clock(), value))
+
+    def _prune(self):
+        expire = self._clock() - self._window
+        while len(self._samples) > 0 and self._samples[0][0] < expire:
+            self._samples.popleft()
+
+    def get_values(self) -> list[float]:
+        self._prune()
+        return sorted(value for _, value in self._samples)
+
+    def get_summary(self) -> dict[str, float]:
+        """
+        :return: {'count': 样本数, 'avg', 'p50', 'p95', 'max'}，无样本时为空
+        """
+        values = self.get_values()
+        if len(values) == 0:
+            return {}
+        return {
+            'count': len(values),
+            'avg': sum(values) / len(values),
+            'p50': values[(len(values) - 1) // 2],
+            'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+            'max': values[-1]
+        }
+
+
+@dataclass
+class FetchStats:
+    timings: dict[str, RollingHistogram] = field(default_factory=dict)
+    size: RollingHistogram = field(default_factory=RollingHistogram)
+    status: Counter = field(default_factory=Counter)
+
+    def add(self, status: str, size: int, timings: dict[str, float]):
+        self.status[status] += 1
+        if size > 0:
+            self.size.add(size)
+        for phase, seconds in timings.items():
+            self.timings.setdefault(phase, RollingHistogram()).add(seconds)
+
+    def get_summary(self) -> dict:
+        """
+        :return: {'requests': 请求数, 'errors': 失败数, 'status': {状态码: 次数}, 'size': 体积统计,
+                  'timings': {阶段: 耗时统计}}
+        """
+        return {
+            'requests': sum(self.status.values()),
+            'errors': sum(count for status, count in self.status.items() if not status.startswith(('2', '3'))),
+            'status': dict(self.status),
+            'size': self.size.get_summary(),
+            'timings': {phase: histogram.get_summary() for phase, histogram in self.timings.items()}
+        }
+
+
+class FetchMetrics:
+    """
+    按 host 与 endpoint 统计实际发出的网络请求
+    包括各阶段耗时 (dns / connect / tls / ttfb / total)、响应体积与状态码
+    """
+
+    def __init__(self):
+        self._hosts: dict[str, FetchStats] = {}
+        self._endpoints: dict[str, dict[str, FetchStats]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_endpoint(url: str) -> str:
+        """数字与 handle 等路径参数会使 endpoint 无限增长，将纯数字段归一化"""
+        return re.sub(r'/\d+(?=/|$)', '/:id', urlsplit(url).path) or '/'
+
+    def record(self, url: str, status: int | str, size: int, timings: dict[str, float]):
+        host = urlsplit(url).netloc
+        endpoint = self.get_endpoint(url)
+        with self._lock:
+            self._hosts.setdefault(host, FetchStats()).add(str(status), size, timings)
+            endpoints = self._endpoints.setdefault(host, {})
+            if endpoint not in endpoints and len(endpoints) >= _max_endpoints_per_host:
+                endpoint = '/*'
+            endpoints.setdefault(endpoint, FetchStats()).add(str(status), size, timings)
+
+    def get_summary(self, host: str | None = None) -> dict[str, dict]:
+        """
+        获取各 host 的统计，指定 host 时获取该 host 下各 endpoint 的统计
+        :return: {host 或 endpoint: FetchStats.get_summary()}
+        """
+        with self._lock:
+            stats = self._hosts if host is None else self._endpoints.get(host, {})
+            return {key: val.get_summary() for key, val in stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+            self._endpoints.clear()
+
+
+fetch_metrics = FetchMetrics()
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+from src.core.constants import Constants
+
+_failure_threshold = Constants.config.get('circuit_failure_threshold', 5)
+_open_cooldown = Constants.config.get('circuit_open_cooldown', 60)
+_retry_times = Constants.config.get('fetch_retries', 2)
+_retry_backoff_base = Constants.config.get('fetch_retry_backoff', 0.5)
+_retry_backoff_max = 8
+_probe_timeout = 60  # 探测请求超过该时间（秒）仍未结束时视为已放弃，允许新的探测
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class HostHealth:
+    """
+    单个 host 的熔断器
+    连续失败达到阈值后熔断，冷却后放行一个探测请求，探测成功则恢复
+    探测请求无论以何种方式结束都需要调用 release_probe，超时未释放的探测也会被视为已放弃
+    """
+
+    def __init__(self, host: str, failure_threshold: int = _failure_threshold, cooldown: float = _open_cooldown,
+                 probe_timeout: float = _probe_timeout, clock: Callable[[], float] = time.time):
+        self.host = host
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._probe_timeout = probe_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started: float | None = None  # 进行中的探测请求的开始时间
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            now = self._clock()
+            if self.state == CircuitState.OPEN:
+                if now - self.opened_at < self._cooldown:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+                self._probe_started = None
+            if self._probe_started is not None and now - self._probe_started < self._probe_timeout:
+                return False  # 半开状态下同一时间只放行一个探测请求
+            self._probe_started = now
+            return True
+
+    def release_probe(self):
+        """请求结束时释放探测名额，请求未记录成功或失败（如超时中止、被取消）时仍保持半开状态"""
+        with self._lock:
+            self._probe_started = None
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == CircuitState.OPEN and self._clock() - self.opened_at < self._cooldown
+
+    def record_success(self):
+        with self._lock:
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_started = None
+            if self.state == CircuitState.HALF_OPEN or self.failures >= self._failure_threshold:
+                if self.state != CircuitState.OPEN:
+                    Constants.log.warn(f"Circuit of {self.host} opened after {self.failures} failures.")
+                self.state = CircuitState.OPEN
+                self.opened_at = self._clock()
+
+
+class HostHealthTracker:
+    def __init__(self):
+        self._hosts: dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> HostHealth:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostHealth(host)
+            return self._hosts[host]
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            health = self._hosts.get(host)
+        return health is not None and health.is_open()
+
+    def get_stats(self) -> dict[str, tuple[CircuitState, int]]:
+        with self._lock:
+            return {host: (health.state, health.failures) for host, health in self._hosts.items()}
+
+
+def is_failure_status(code: int) -> bool:
+    """服务端异常或限流视为 host 不健康，4xx 一般是参数问题，不计入"""
+    return code >= 500 or code == 429
+
+
+def get_retry_times() -> int:
+    return _retry_times
+
+
+def get_backoff_seconds(attempt: int) -> float:
+    """带随机抖动的指数退避，避免多个请求同时重试"""
+    return random.uniform(0, min(_retry_backoff_max, _retry_backoff_base * (2 ** attempt)))
+
+
+host_health = HostHealthTracker()
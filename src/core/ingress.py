@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import Counter
+
+from src.core.command import __command_index__, CommandLane
+from src.core.constants import Constants
+from src.core.rate_limit import KeyedRateLimiter
+
+_user_rate = Constants.config.get('rate_limit_user_rate', 0.2)
+_user_burst = Constants.config.get('rate_limit_user_burst', 6)
+_group_rate = Constants.config.get('rate_limit_group_rate', 0.5)
+_group_burst = Constants.config.get('rate_limit_group_burst', 15)
+_lane_costs = {CommandLane.IO: 1, CommandLane.CPU: 3,
+               **{CommandLane(lane): cost for lane, cost in Constants.config.get('rate_limit_costs', {}).items()}}
+_notice_interval = 60  # 同一用户或群在该时间（秒）内只提示一次超出频率，其余超出的请求直接丢弃
+
+
+class IngressStats:
+    """统计进入机器人的事件，按事件类型分别记录接收与丢弃的数量"""
+
+    def __init__(self):
+        self._accepted = Counter()
+        self._shed = Counter()
+        self._lock = threading.Lock()
+
+    def accept(self, event: str):
+        with self._lock:
+            self._accepted[event] += 1
+
+    def shed(self, event: str, reason: str):
+        with self._lock:
+            self._shed[(event, reason)] += 1
+
+    def get_stats(self) -> dict[str, dict]:
+        """
+        :return: {事件类型: {'accepted': 接收数, 'shed': {原因: 丢弃数}}}
+        """
+        with self._lock:
+            stats = {event: {'accepted': count, 'shed': {}} for event, count in self._accepted.items()}
+            for (event, reason), count in self._shed.items():
+                stats.setdefault(event, {'accepted': 0, 'shed': {}})['shed'][reason] = count
+            return stats
+
+
+ingress_stats = IngressStats()
+
+
+def is_public_command(content: str) -> bool:
+    """
+    频道公开消息的快速过滤，在构造 RobotMessage 之前调用
+    公开消息仅响应带 "/" 的已注册指令，其余闲聊无需鉴权、分词与排队
+    """
+    if not content.lstrip().startswith('/'):
+        return False
+    func = content.split(maxsplit=1)[0].lower()
+    return __command_index__.find(func, lambda entry: entry[2]) is not None
+
+
+class IngressLimiter:
+    """
+    入口处按用户与群分别限流，超出频率的请求不进入队列
+    渲染等开销大的指令消耗更多令牌，超出频率时同一对象在一段时间内只提示一次
+    """
+
+    def __init__(self):
+        self._users = KeyedRateLimiter(_user_rate, _user_burst)
+        self._groups = KeyedRateLimiter(_group_rate, _group_burst)
+        self._notified: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_cost(lane: CommandLane) -> float:
+        return _lane_costs.get(lane, 1)
+
+    def acquire(self, user_key: str, group_key: str | None, lane: CommandLane) -> tuple[float, str | None]:
+        """
+        :param group_key: 私聊时为 None，仅按用户限流
+        :return: tuple[需要等待的秒数, 超出频率的键]，未超出时为 (0, None)
+        """
+        cost = self.get_cost(lane)
+        wait = self._users.try_acquire(user_key, cost)
+        if wait > 0:
+            return wait, user_key
+        if group_key is not None:
+            wait = self._groups.try_acquire(group_key, cost)
+            if wait > 0:
+                self._users.refund(user_key, cost)
+                return wait, group_key
+        return 0, None
+
+    def refund(self, user_key: str, group_key: str | None, lane: CommandLane):
+        """退还 acquire 消耗的令牌，用于已通过限流但未能加入队列的请求"""
+        cost = self.get_cost(lane)
+        self._users.refund(user_key, cost)
+        if group_key is not None:
+            self._groups.refund(group_key, cost)
+
+    def should_notify(self, key: str) -> bool:
+        """是否需要回复超出频率的提示，避免刷屏时每条消息都回复"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._notified.get(key, -_notice_interval) < _notice_interval:
+                return False
+            self._notified = {notified_key: notified_at for notified_key, notified_at in self._notified.items()
+                              if now - notified_at < _notice_interval}
+            self._notified[key] = now
+            return True
+
+
+ingress_limiter = IngressLimiter()
@@ -1,14 +1,19 @@
-import random
 import re
 import traceback
+from contextlib import nullcontext
 
-from pypinyin import pinyin, Style
 from thefuzz import process
 
-from src.core.command import command, __commands__
+from src.core.async_runner import run_async_gather
+from src.core.command import command, __command_index__, CommandLane
 from src.core.constants import Constants
+from src.core.deadline import deadline_scope, get_command_timeout
+from src.core.degrade import degrade_mode
 from src.core.exception import UnauthorizedError
+from src.core.keyword_matcher import KeywordMatcher
 from src.core.output_cached import get_cached_prefix
+from src.core.reply_cache import reply_cache, ReplyRecorder
+from src.core.single_flight import command_flights
 from src.core.tools import png2jpg, get_simple_qrcode, check_intersect, get_today_timestamp_range
 from src.module.message import RobotMessage, MessageType
 from src.platform.manual.manual import ManualPlatform
@@ -26,64 +31,108 @@ _fixed_reply = {
     "帮助": Constants.merged_help_content
 }
 
+_keyword_matcher = KeywordMatcher(Constants.key_words)
+
 
 def match_key_words(content: str) -> str:
-    random.shuffle(Constants.key_words)  # 多个关键词时的处理
-    for asks, answers in Constants.key_words:
-        for ask in asks:
-            ask_pinyin = ''.join(word[0] for word in pinyin(ask, Style.NORMAL))
-            ctx_pinyin = ''.join(word[0] for word in pinyin(content.lower(), Style.NORMAL))
-            if ask_pinyin in ctx_pinyin:
-                return random.choice(answers)
-    return random.choice(["你干嘛", "干什么", "咋了", "how", "what"])
-
-
-def call_handle_message(message: RobotMessage):
-    """分发消息处理"""
+    return _keyword_matcher.match(content)
+
+
+def find_command(message: RobotMessage) -> tuple[str, tuple] | None:
+    """
+    查找消息对应的指令
+    :return: tuple[指令名, 指令注册信息] | None
+    """
+    if len(message.tokens) == 0:
+        return None
+
+    # 频道公开消息仅响应带 "/" 的指令
+    accept = (lambda entry: entry[2]) if message.is_guild_public() else None
+    return __command_index__.find(message.tokens[0].lower(), accept)
+
+
+def get_command_schedule(message: RobotMessage) -> tuple[CommandLane, int, str]:
+    """
+    :return: tuple[执行的工作线程组, 调度优先级, 指令的处理函数名]，非指令消息按网络查询类处理
+    """
+    found = find_command(message)
+    if found is None:
+        return CommandLane.IO, 0, match_key_words.__name__
+    return found[1][5], found[1][6], found[1][0].__name__
+
+
+def call_handle_message(message: RobotMessage) -> bool:
+    """
+    分发消息处理
+    :return: 是否实际执行了处理，命中回复缓存或合并到进行中的相同请求时为 False
+    """
     try:
         content = message.tokens
 
         if len(content) == 0 and not message.is_guild_public():
-            return message.reply(f"{match_key_words('')}")
+            message.reply(f"{match_key_words('')}")
+            return True
 
         func = content[0].lower()
-        for cmd in __commands__:
+        found = find_command(message)
+        if found is not None:
+            cmd, (original_command, execute_level, _, need_to_check_exclude, timeout, _, _, coalesce,
+                  cache_ttl, cache_key) = found
             starts_with = cmd[-1] == '*' and func.startswith(cmd[:-1])
-            if starts_with or cmd == func:
-                original_command, execute_level, is_command, need_to_check_exclude = __commands__[cmd]
-
-                if not is_command and message.is_guild_public():
-                    continue
-
-                if message.user_permission_level < execute_level:
-                    Constants.log.info(f'{message.author_id} attempted to call {original_command.__name__} but failed.')
-                    raise UnauthorizedError("权限不足，操作被拒绝" if func != "/去死" else "阿米诺斯")
-
-                if need_to_check_exclude and (message.message_type == MessageType.GROUP and
-                                              message.message.group_openid in Constants.config['exclude_group_id']):
-                    Constants.log.info(f'{message.message.group_openid} was banned to call {original_command.__name__}.')
-                    raise UnauthorizedError("榜单功能被禁用")
-                try:
-                    if starts_with:
-                        name = cmd[:-1]
-                        replaced = func.replace(name, '')
-                        message.tokens = [name] + ([replaced] if replaced else []) + message.tokens[1:]
+
+            if message.user_permission_level < execute_level:
+                Constants.log.info(f'{message.author_id} attempted to call {original_command.__name__} but failed.')
+                raise UnauthorizedError("权限不足，操作被拒绝" if func != "/去死" else "阿米诺斯")
+
+            if need_to_check_exclude and (message.message_type == MessageType.GROUP and
+                                          message.message.group_openid in Constants.config['exclude_group_id']):
+                Constants.log.info(f'{message.message.group_openid} was banned to call {original_command.__name__}.')
+                raise UnauthorizedError("榜单功能被禁用")
+            try:
+                if starts_with:
+                    name = cmd[:-1]
+                    replaced = func.replace(name, '')
+                    message.tokens = [name] + ([replaced] if replaced else []) + message.tokens[1:]
+                reply_key = None
+                if cache_ttl is not None:
+                    reply_key = (cache_key(message.tokens) if cache_key is not None else
+                                 ' '.join([message.tokens[0].lower()] + message.tokens[1:]))
+                if reply_key is not None:  # 只读指令在 TTL 内直接使用缓存的回复
+                    if reply_cache.replay(original_command.__name__, reply_key, message.reply):
+                        return False
+                    recorder = ReplyRecorder()
+                    message.add_reply_listener(recorder)
+                if callable(coalesce):
+                    coalesce = coalesce(message.tokens)
+                flight = None
+                if coalesce:  # 并发的相同指令只执行一次，回复转发给所有请求
+                    key = ' '.join([message.tokens[0].lower()] + message.tokens[1:])
+                    flight = command_flights.join(key, message.reply)
+                    if flight is None:
+                        Constants.log.info(f'Coalesced {key} into the in-flight request.')
+                        return False
+                    message.add_reply_listener(flight.publish)
+                with flight or nullcontext(), deadline_scope(timeout if timeout is not None else get_command_timeout()):
                     original_command(message)
-                except Exception as e:
-                    message.report_exception(f'Command<{original_command.__name__}>', traceback.format_exc(), e)
-                return
+                if reply_key is not None and message.is_cacheable():
+                    reply_cache.store(original_command.__name__, reply_key, recorder.replies, cache_ttl)
+            except Exception as e:
+                message.report_exception(f'Command<{original_command.__name__}>', traceback.format_exc(), e)
+            return True
 
         # 如果是频道无at消息可能是发错了或者并非用户希望的处理对象
         if message.is_guild_public():
-            return
+            return False
 
         if '/' in func:
             message.reply("其他指令还在开发中")
         else:
             message.reply(f"{match_key_words(func)}")
+        return True
 
     except Exception as e:
         message.report_exception('Core', traceback.format_exc(), e)
+        return True
 
 
 @command(tokens=list(_fixed_reply.keys()))
@@ -91,7 +140,18 @@ def reply_fixed(message: RobotMessage):
     message.reply(_fixed_reply.get(message.tokens[0][1:], ""), modal_words=False)
 
 
-@command(tokens=['contest', 'contests', '比赛', '近日比赛', '最近的比赛', '今天比赛', '今天的比赛', '今日比赛', '今日的比赛'])
+def _format_contests_text(running_contests: list, upcoming_contests: list, finished_contests: list) -> str:
+    """比赛列表图片的文本版本"""
+    sections = []
+    for title, contests in [("正在进行的比赛", running_contests), ("即将开始的比赛", upcoming_contests),
+                            ("已结束的比赛", finished_contests)]:
+        if len(contests) > 0:
+            sections.append(f">> {title} >>\n\n" + '\n\n'.join(contest.format() for contest in contests))
+    return '\n\n'.join(sections) if len(sections) > 0 else ">> 最近没有比赛 >>"
+
+
+@command(tokens=['contest', 'contests', '比赛', '近日比赛', '最近的比赛', '今天比赛', '今天的比赛', '今日比赛', '今日的比赛'],
+         lane=CommandLane.CPU, priority=1, coalesce=True)
 def recent_contests(message: RobotMessage):
     query_today = message.tokens[0] in ['/今天比赛', '/今天的比赛', '/今日比赛', '/今日的比赛']
     if len(message.tokens) >= 3 and message.tokens[1] == 'today':
@@ -121,8 +181,8 @@ def recent_contests(message: RobotMessage):
         message.reply(f"正在查询{tip_time_range}比赛，请稍等")
 
     running_contests, upcoming_contests, finished_contests = [], [], []
-    for platform in queries:
-        running, upcoming, finished = platform.get_contest_list()
+    contest_lists = run_async_gather(*[platform.async_get_contest_list() for platform in queries])
+    for running, upcoming, finished in contest_lists:
         running_contests.extend(running)
         upcoming_contests.extend(upcoming)
         finished_contests.extend(finished)
@@ -145,6 +205,12 @@ def recent_contests(message: RobotMessage):
             range2=(contest.start_time, contest.start_time + contest.duration)
         )]
 
+    if degrade_mode.is_degraded():  # 负载过高时不渲染图片，直接回复文本
+        message.reply(f"[Contest] {tip_time_range}比赛\n\n"
+                      f"{_format_contests_text(running_contests, upcoming_contests, finished_contests)}",
+                      modal_words=False)
+        return
+
     cached_prefix = get_cached_prefix('Contest-List-Renderer')
     contest_list_img = ContestListRenderer(running_contests, upcoming_contests, finished_contests).render()
     contest_list_img.write_file(f"{cached_prefix}.png")
@@ -152,7 +218,7 @@ def recent_contests(message: RobotMessage):
     message.reply(f"{tip_time_range}比赛", png2jpg(f"{cached_prefix}.png"))
 
 
-@command(tokens=["qr", "qrcode", "二维码", "码"])
+@command(tokens=["qr", "qrcode", "二维码", "码"], lane=CommandLane.CPU)
 def reply_qrcode(message: RobotMessage):
     content = re.sub(r'<@!\d+>', '', message.content).strip()
     content = re.sub(rf'{message.tokens[0]}', '', content, count=1).strip()
@@ -0,0 +1,111 @@
+import json
+from typing import Any, Callable
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+
+Projector = Callable[[Any], Any]
+
+
+class _Cursor:
+    def __init__(self, text: str):
+        self.text = text
+        self.idx = 0
+
+    def skip_whitespace(self):
+        while self.idx < len(self.text) and self.text[self.idx] in _whitespace:
+            self.idx += 1
+
+    def peek(self) -> str:
+        self.skip_whitespace()
+        if self.idx >= len(self.text):
+            raise json.JSONDecodeError("Unexpected end of data", self.text, self.idx)
+        return self.text[self.idx]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.text, self.idx)
+        self.idx += 1
+
+    def decode(self) -> Any:
+        """使用 json 内置的 C 扫描器解析一个完整的值"""
+        self.skip_whitespace()
+        val, self.idx = _decoder.raw_decode(self.text, self.idx)
+        return val
+
+
+def _parse_value(cursor: _Cursor, path: str, projectors: dict[str, Projector], prefixes: set[str]) -> Any:
+    if path in projectors and cursor.peek() == '[':
+        return _parse_array(cursor, projectors[path])
+    if path in prefixes and cursor.peek() == '{':
+        return _parse_object(cursor, path, projectors, prefixes)
+    val = cursor.decode()
+    if path in projectors:  # 目标路径不是数组时，直接对整个值投影
+        return projectors[path](val)
+    return val
+
+
+def _parse_object(cursor: _Cursor, path: str, projectors: dict[str, Projector], prefixes: set[str]) -> dict:
+    cursor.expect('{')
+    obj = {}
+    if cursor.peek() == '}':
+        cursor.idx += 1
+        return obj
+    while True:
+        key = cursor.decode()
+        cursor.expect(':')
+        obj[key] = _parse_value(cursor, f"{path}.{key}" if path else key, projectors, prefixes)
+        if cursor.peek() == ',':
+            cursor.idx += 1
+            continue
+        cursor.expect('}')
+        return obj
+
+
+def _parse_array(cursor: _Cursor, projector: Projector) -> list:
+    """逐个解析数组元素并立即投影，不会同时持有完整的元素列表"""
+    cursor.expect('[')
+    items = []
+    if cursor.peek() == ']':
+        cursor.idx += 1
+        return items
+    while True:
+        item = projector(cursor.decode())
+        if item is not None:
+            items.append(item)
+        if cursor.peek() == ',':
+            cursor.idx += 1
+            continue
+        cursor.expect(']')
+        return items
+
+
+def loads_projected(text: str, projectors: dict[str, Projector]) -> Any:
+    """
+    按路径投影地解析 json，用于只需要少量字段的大体积响应
+    路径形如 "result.rows"，指向数组时对每个元素调用投影函数，返回 None 的元素将被丢弃；
+    未被指定的路径按原样解析
+    :param text: json 文本
+    :param projectors: 路径到投影函数的映射
+    :return: 解析结果
+    """
+    prefixes = set()
+    for path in projectors:
+        parts = path.split('.')
+        prefixes.update('.'.join(parts[:idx]) for idx in range(len(parts)))
+    cursor = _Cursor(text)
+    result = _parse_value(cursor, "", projectors, prefixes)
+    cursor.skip_whitespace()
+    if cursor.idx != len(text):
+        raise json.JSONDecodeError("Extra data", text, cursor.idx)
+    return result
+
+
+def pick(*keys: str) -> Projector:
+    """生成只保留指定字段的投影函数，不存在的字段将被忽略"""
+    return lambda val: {key: val[key] for key in keys if key in val}
+
+
+def drop(_: Any) -> None:
+    """丢弃数组中的全部元素"""
+    return None
@@ -0,0 +1,75 @@
+import random
+from collections import deque
+from functools import lru_cache
+
+from pypinyin import pinyin, Style
+
+_default_answers = ["你干嘛", "干什么", "咋了", "how", "what"]
+
+
+@lru_cache(maxsize=1024)
+def to_pinyin(content: str) -> str:
+    """转为不带声调的拼音，非汉字部分保持原样，闲聊消息重复率高，因此缓存转换结果"""
+    return ''.join(word[0] for word in pinyin(content.lower(), Style.NORMAL))
+
+
+class KeywordMatcher:
+    """
+    按拼音匹配关键词并随机回复
+    预先将全部关键词转为拼音并构建 Aho-Corasick 自动机，一次扫描即可得到消息命中的所有关键词组
+    """
+
+    def __init__(self, key_words: list[list[list[str]]]):
+        self._answers = [answers for _, answers in key_words]
+        # 自动机的状态以下标表示，分别为转移表、失配指针与该状态命中的关键词组
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[set[int]] = [set()]
+        for group, (asks, _) in enumerate(key_words):
+            for ask in asks:
+                self._add_pattern(to_pinyin(ask), group)
+        self._build_fail()
+
+    def _add_pattern(self, pattern: str, group: int):
+        if len(pattern) == 0:
+            return
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].add(group)
+
+    def _build_fail(self):
+        queue = deque(self._goto[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail > 0 and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def find_groups(self, content: str) -> set[int]:
+        """
+        :return: 消息命中的关键词组下标
+        """
+        groups, state = set(), 0
+        for char in to_pinyin(content):
+            while state > 0 and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            groups |= self._output[state]
+        return groups
+
+    def match(self, content: str) -> str:
+        """在命中的关键词组中随机选择一组回复，未命中时使用默认回复"""
+        groups = self.find_groups(content)
+        if len(groups) == 0:
+            return random.choice(_default_answers)
+        return random.choice(self._answers[random.choice(sorted(groups))])
@@ -0,0 +1,154 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable
+
+
+class TokenBucketScheduler:
+    """
+    令牌桶限流调度器
+    令牌不足时调用方排队等待而不是直接失败，按到达顺序依次放行
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        :param clock: 计时函数，测试时可注入可控的时钟
+        """
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._waiters: deque[int] = deque()
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _try_take(self, ticket: int) -> float:
+        """队首且有令牌时取走令牌并返回 0，否则返回建议的等待时长，需持有锁"""
+        self._refill()
+        if self._waiters[0] != ticket:
+            return 1 / self._rate
+        if self._tokens >= 1:
+            self._waiters.popleft()
+            self._tokens -= 1
+            self._cond.notify_all()
+            return 0
+        return (1 - self._tokens) / self._rate
+
+    def _abandon(self, ticket: int):
+        """放弃排队，让出位置给后面的调用，需持有锁"""
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            self._cond.notify_all()
+
+    def acquire(self, timeout: float | None = None) -> float:
+        """
+        阻塞直到获取一个令牌
+        :param timeout: 最多等待的秒数，超时时放弃排队并抛出 TimeoutError，为 None 时不限制
+        :return: 实际等待的秒数
+        """
+        start = self._clock()
+        with self._cond:
+            ticket = next(self._counter)
+            self._waiters.append(ticket)
+            while (wait := self._try_take(ticket)) > 0:
+                if self._waiters[0] != ticket:
+                    wait = None  # 等待前面的调用取走令牌后被唤醒
+                if timeout is not None:
+                    remaining = start + timeout - self._clock()
+                    if remaining <= 0:
+                        self._abandon(ticket)
+                        raise TimeoutError("Timed out while waiting for rate limiter.")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+        return self._clock() - start
+
+    async def async_acquire(self, timeout: float | None = None) -> float:
+        """acquire 的协程版本，轮询等待以免阻塞事件循环"""
+        start = self._clock()
+        with self._cond:
+            ticket = next(self._counter)
+            self._waiters.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket)
+                    if wait > 0 and timeout is not None:
+                        remaining = start + timeout - self._clock()
+                        if remaining <= 0:
+                            self._abandon(ticket)
+                            raise TimeoutError("Timed out while waiting for rate limiter.")
+                        wait = min(wait, remaining)
+                if wait == 0:
+                    return self._clock() - start
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+
+    def penalize(self, seconds: float):
+        """上游提示超出调用频率时，清空令牌并额外暂停一段时间"""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0) - seconds * self._rate
+            self._cond.notify_all()
+
+    def estimate_wait(self) -> float:
+        """估计新到达的调用因排在前面的调用而需要等待的秒数，空闲时为 0"""
+        with self._cond:
+            self._refill()
+            return max(0.0, len(self._waiters) + 1 - self._tokens) / self._rate
+
+    def get_stats(self) -> dict[str, float]:
+        with self._cond:
+            self._refill()
+            return {'waiting': len(self._waiters), 'tokens': self._tokens}
+
+
+class KeyedRateLimiter:
+    """
+    按键（用户、群等）分别计数的令牌桶，令牌不足时不等待而是直接拒绝
+    长期不活跃的键的令牌桶已经回满，与不存在等价，因此按 LRU 淘汰以限制内存占用
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 4096):
+        self._rate = rate
+        self._burst = burst
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # 键 -> (令牌数, 更新时间)
+        self._lock = threading.Lock()
+
+    def _get_tokens(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self._burst, now))
+        return min(self._burst, tokens + (now - updated) * self._rate)
+
+    def try_acquire(self, key: str, cost: float = 1) -> float:
+        """
+        尝试取走 cost 个令牌，cost 超过桶容量时按桶容量计算
+        :return: 成功时为 0，否则为令牌足够前需要等待的秒数
+        """
+        cost = min(cost, self._burst)
+        with self._lock:
+            now = time.monotonic()
+            tokens = self._get_tokens(key, now)
+            if tokens < cost:
+                return (cost - tokens) / self._rate
+            self._buckets[key] = (tokens - cost, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+            return 0
+
+    def refund(self, key: str, cost: float = 1):
+        """退还令牌，用于同时检查多个令牌桶且后续检查失败时"""
+        with self._lock:
+            now = time.monotonic()
+            self._buckets[key] = (min(self._burst, self._get_tokens(key, now) + cost), now)
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict, Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from src.core.constants import Constants
+
+_progress_mark = "请稍等"  # 带有该标记的回复是查询中的进度提示，命中缓存时无需再发送
+
+
+@dataclass
+class CachedReply:
+    replies: list[tuple[tuple, dict]]
+    ttl: float
+    stored_at: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.stored_at <= self.ttl
+
+    def get_img_paths(self) -> list[str]:
+        return [kwargs['img_path'] for _, kwargs in self.replies if kwargs.get('img_path')]
+
+
+class ReplyRecorder:
+    """作为回复的监听器，记录一次指令执行产生的回复"""
+
+    def __init__(self):
+        self.replies: list[tuple[tuple, dict]] = []
+
+    def __call__(self, *args, **kwargs):
+        content = args[0] if len(args) > 0 else kwargs.get('content', "")
+        if _progress_mark in content and not kwargs.get('img_path') and not kwargs.get('img_url'):
+            return
+        self.replies.append((args, kwargs))
+
+
+class ReplyCache:
+    """
+    指令回复的缓存，TTL 内相同的只读指令直接发送上一次的回复（文本与渲染好的图片），跳过网络请求与渲染
+    按指令分别统计命中次数，LRU 淘汰以限制条目数
+    """
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.time):
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], CachedReply] = OrderedDict()
+        self._hits = Counter()
+        self._misses = Counter()
+        self._lock = threading.Lock()
+
+    def lookup(self, command: str, key: str) -> CachedReply | None:
+        with self._lock:
+            entry = self._entries.get((command, key))
+            # 渲染的图片会被定时清理，图片不存在时同样视为未命中
+            if entry is not None and (not entry.is_fresh(self._clock()) or
+                                      not all(os.path.exists(path) for path in entry.get_img_paths())):
+                del self._entries[(command, key)]
+                entry = None
+            if entry is None:
+                self._misses[command] += 1
+                return None
+            self._entries.move_to_end((command, key))
+            self._hits[command] += 1
+            return entry
+
+    def replay(self, command: str, key: str, reply: Callable[..., None]) -> bool:
+        """
+        命中时以缓存的回复调用 reply
+        :return: 是否命中
+        """
+        entry = self.lookup(command, key)
+        if entry is None:
+            return False
+        Constants.log.info(f"Reply cache hit for {command} {key}.")
+        for args, kwargs in entry.replies:
+            reply(*args, **kwargs)
+        return True
+
+    def store(self, command: str, key: str, replies: list[tuple[tuple, dict]], ttl: float):
+        if len(replies) == 0:
+            return
+        with self._lock:
+            self._entries[(command, key)] = CachedReply(replies, ttl, self._clock())
+            self._entries.move_to_end((command, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, command: str | None = None, key: str | None = None) -> int:
+        """
+        使缓存失效，不指定 command 时清空全部缓存，不指定 key 时清空该指令的全部缓存
+        :return: 清除的条目数
+        """
+        with self._lock:
+            targets = [entry_key for entry_key in self._entries
+                       if (command is None or entry_key[0] == command) and (key is None or entry_key[1] == key)]
+            for entry_key in targets:
+                del self._entries[entry_key]
+            return len(targets)
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """
+        :return: {指令: {'hits': 命中次数, 'misses': 未命中次数, 'entries': 缓存条目数}}
+        """
+        with self._lock:
+            entries = Counter(command for command, _ in self._entries)
+            return {command: {'hits': self._hits[command], 'misses': self._misses[command],
+                              'entries': entries[command]}
+                    for command in set(self._hits) | set(self._misses) | set(entries)}
+
+
+reply_cache = ReplyCache(max_entries=Constants.config.get('reply_cache_max_entries', 256))
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any
+
+from src.core.constants import Constants
+from src.core.fetch_metrics import RollingHistogram
+
+_priority_aging = Constants.config.get('queue_priority_aging', 30)  # 等待多少秒可抵消一级优先级
+
+_schedulers: dict[str, 'FairScheduler'] = {}
+
+
+class FairScheduler:
+    """
+    按会话公平调度的阻塞队列
+    同一优先级内在各会话之间轮询，单个会话刷屏不会饿死其他会话；
+    优先级数值越小越先处理，等待过久的低优先级请求会逐渐提升，避免被饿死
+    """
+
+    def __init__(self, name: str, priority_aging: float = _priority_aging):
+        self.name = name
+        self._priority_aging = priority_aging
+        # 优先级 -> 会话 -> 该会话的请求队列，OrderedDict 的顺序即轮询顺序
+        self._levels: dict[int, OrderedDict[str, deque[tuple[float, Any]]]] = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self._waits: dict[str, RollingHistogram] = {}
+        _schedulers[name] = self
+
+    def put(self, key: str, item: Any, priority: int = 0) -> int:
+        """
+        加入队列
+        :return: 估计排在前面的请求数
+        """
+        with self._cond:
+            ahead = self.estimate_ahead(key, priority)
+            conversations = self._levels.setdefault(priority, OrderedDict())
+            conversations.setdefault(key, deque()).append((time.time(), item))
+            self._size += 1
+            self._cond.notify()
+        return ahead
+
+    def estimate_ahead(self, key: str, priority: int) -> int:
+        """优先级更高的请求全部在前，同优先级的其他会话在轮询中每轮各处理一个"""
+        with self._cond:
+            return self._estimate_ahead(key, priority)
+
+    def _estimate_ahead(self, key: str, priority: int) -> int:
+        ahead = 0
+        for level, conversations in self._levels.items():
+            if level < priority:
+                ahead += sum(len(requests) for requests in conversations.values())
+            elif level == priority:
+                own = len(conversations.get(key, ()))
+                ahead += own + sum(min(len(requests), own + 1)
+                                   for conv_key, requests in conversations.items() if conv_key != key)
+        return ahead
+
+    def _pick_level(self) -> int:
+        now = time.time()
+
+        def effective_priority(level: int) -> float:
+            enqueued_at = min(requests[0][0] for requests in self._levels[level].values())
+            return level - (now - enqueued_at) / self._priority_aging
+
+        return min(self._levels.keys(), key=effective_priority)
+
+    def get(self) -> tuple[str, Any]:
+        """
+        阻塞直到取出一个请求
+        :return: tuple[会话, 请求]
+        """
+        with self._cond:
+            while self._size == 0:
+                self._cond.wait()
+            level = self._pick_level()
+            conversations = self._levels[level]
+            key, requests = next(iter(conversations.items()))
+            enqueued_at, item = requests.popleft()
+            if len(requests) == 0:
+                del conversations[key]
+            else:
+                conversations.move_to_end(key)  # 轮到下一个会话
+            if len(conversations) == 0:
+                del self._levels[level]
+            self._size -= 1
+            self._waits.setdefault(key, RollingHistogram()).add(time.time() - enqueued_at)
+            return key, item
+
+    def drain(self) -> list[Any]:
+        with self._cond:
+            items = [item for conversations in self._levels.values()
+                     for requests in conversations.values() for _, item in requests]
+            self._levels.clear()
+            self._size = 0
+            return items
+
+    def size(self) -> int:
+        with self._cond:
+            return self._size
+
+    def get_wait_stats(self) -> dict[str, dict[str, float]]:
+        """
+        :return: {会话: 排队等待时间的统计}
+        """
+        with self._cond:
+            return {key: summary for key, histogram in self._waits.items()
+                    if len(summary := histogram.get_summary()) > 0}
+
+
+def get_schedulers() -> dict[str, FairScheduler]:
+    return dict(_schedulers)
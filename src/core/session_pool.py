@@ -0,0 +1,102 @@
+import ssl
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.core.constants import Constants
+from src.core.fetch_metrics import timed_pool_classes
+
+_pool_connections = Constants.config.get('http_pool_connections', 4)
+_pool_maxsize = Constants.config.get('http_pool_maxsize', 8)
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """使用可记录建立连接与 TLS 握手耗时的连接池"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = timed_pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = timed_pool_classes
+        return manager
+
+
+class SSLAdapter(TimedHTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        """
+        tls1.3 不再支持RSA KEY exchange，py3.10 增加TLS的默认安全设置。可能导致握手失败。
+        使用 `ssl_context.set_ciphers('DEFAULT')` DEFAULT 老的加密设置。
+        """
+        ssl_context = ssl.create_default_context()
+        ssl_context.set_ciphers('DEFAULT')
+        ssl_context.check_hostname = False  # 避免在请求时 verify=False 设置时报错， 如果设置需要校验证书可去掉该行。
+        ssl_context.minimum_version = ssl.TLSVersion.TLSv1_2  # 最小版本设置成1.2 可去掉低版本的警告
+        ssl_context.maximum_version = ssl.TLSVersion.TLSv1_2  # 最大版本设置成1.2
+        kwargs["ssl_context"] = ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+
+class SessionPool:
+    """
+    按 (scheme, host, 代理) 复用的 keep-alive 会话池
+    同一 host 的请求共用一个 Session，从而复用已经完成 TCP + TLS 握手的连接
+    """
+
+    def __init__(self, adapter_cls: type[HTTPAdapter] = TimedHTTPAdapter,
+                 pool_connections: int = _pool_connections, pool_maxsize: int = _pool_maxsize):
+        self._adapter_cls = adapter_cls
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._sessions: dict[tuple[str, str, str], requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, url: str, proxies: dict | None = None) -> requests.Session:
+        split = urlsplit(url)
+        proxy = (proxies or {}).get(split.scheme, '')
+        key = (split.scheme, split.netloc.lower(), proxy)
+
+        with self._lock:
+            if key not in self._sessions:
+                session = requests.Session()
+                adapter = self._adapter_cls(pool_connections=self._pool_connections,
+                                            pool_maxsize=self._pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return self._sessions[key]
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """
+        统计各 host 的连接复用情况
+        :return: {host: {'requests': 请求数, 'connections': 新建连接数, 'reused': 复用次数}}
+        """
+        stats: dict[str, dict[str, int]] = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+
+        for (_, host, _), session in sessions:
+            host_stats = stats.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0})
+            for adapter in set(session.adapters.values()):
+                managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+                for manager in managers:
+                    for pool_key in manager.pools.keys():
+                        pool = manager.pools.get(pool_key)
+                        if pool is None:  # 已被淘汰
+                            continue
+                        host_stats['requests'] += pool.num_requests
+                        host_stats['connections'] += pool.num_connections
+
+        for host_stats in stats.values():
+            host_stats['reused'] = max(host_stats['requests'] - host_stats['connections'], 0)
+
+        return stats
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
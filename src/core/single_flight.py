@@ -0,0 +1,75 @@
+import threading
+from typing import Callable
+
+from src.core.constants import Constants
+
+ReplyListener = Callable[..., None]
+
+
+class Flight:
+    """一次正在进行的计算，记录其产生的全部回复并转发给合并进来的请求"""
+
+    def __init__(self, group: 'SingleFlight', key: str):
+        self._group = group
+        self.key = key
+        self._replies: list[tuple[tuple, dict]] = []
+        self._followers: list[ReplyListener] = []
+        self._lock = threading.Lock()
+
+    def follow(self, listener: ReplyListener):
+        """加入后先补发已产生的回复，保证回复顺序与发起者一致"""
+        with self._lock:
+            for args, kwargs in self._replies:
+                listener(*args, **kwargs)
+            self._followers.append(listener)
+
+    def publish(self, *args, **kwargs):
+        with self._lock:
+            self._replies.append((args, kwargs))
+            followers = list(self._followers)
+        for listener in followers:
+            try:
+                listener(*args, **kwargs)
+            except Exception as e:
+                Constants.log.warn(f"Failed to forward coalesced reply of {self.key}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._group.finish(self)
+        return False
+
+
+class SingleFlight:
+    """
+    并发的相同请求只执行一次，其余请求直接接收该次执行的回复
+    只合并正在进行中的请求，执行结束后的同一请求会重新执行
+    """
+
+    def __init__(self):
+        self._flights: dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key: str, listener: ReplyListener) -> Flight | None:
+        """
+        :return: 没有进行中的相同请求时返回新建的 Flight，由调用方执行并通过 publish 发布回复；
+                 否则将 listener 加入进行中的请求并返回 None
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight(self, key)
+                return flight
+            self.coalesced += 1
+        flight.follow(listener)
+        return None
+
+    def finish(self, flight: Flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+
+command_flights = SingleFlight()
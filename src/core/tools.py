@@ -1,47 +1,89 @@
+import asyncio
 import datetime
 import hashlib
 import os
 import random
 import re
-import ssl
+import shutil
+import signal
 import string
 import subprocess
+import threading
 import time
+from tempfile import SpooledTemporaryFile
+from urllib.parse import urlsplit
 
 import cv2
 import numpy as np
-import requests
 from PIL import Image
+from aiohttp import ClientError, ClientTimeout
 from lxml import etree
 from lxml.etree import Element
 from qrcode.image.styledpil import StyledPilImage
 from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
 from qrcode.main import QRCode
-from requests import Response
-from requests.adapters import HTTPAdapter
+from requests import Response, RequestException
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
 
+from src.core.async_runner import get_client_session
 from src.core.constants import Constants
+from src.core.deadline import get_timeout, check_deadline, get_remaining, is_expired
+from src.core.exception import CircuitOpenError, DeadlineExceededError
+from src.core.fetch_cache import response_cache, CacheEntry
+from src.core.fetch_fixture import fetch_fixture
+from src.core.fetch_metrics import fetch_metrics, begin_phases, end_phases
+from src.core.host_health import host_health, is_failure_status, get_retry_times, get_backoff_seconds
+from src.core.json_stream import Projector, loads_projected
+from src.core.rate_limit import TokenBucketScheduler
+from src.core.session_pool import SessionPool, SSLAdapter
+
+_fetch_sessions = SessionPool()
+_img_sessions = SessionPool(adapter_cls=SSLAdapter)
+_img_chunk_size = 64 * 1024
+_img_spool_size = 8 * 1024 * 1024  # 超过该大小的图片才会落盘缓冲
+
+
+def _kill_process_tree(cmd: subprocess.Popen):
+    """shell=True 时只结束 shell 进程无法结束其子进程，需要结束整个进程树"""
+    Constants.log.warn(f"Killing shell process {cmd.pid} for deadline exceeded.")
+    try:
+        if os.name == 'nt':
+            subprocess.run(f"taskkill /F /T /PID {cmd.pid}", capture_output=True)
+        else:
+            os.killpg(cmd.pid, signal.SIGKILL)
+    except OSError as e:
+        Constants.log.warn(f"Kill shell process failed: {e}")
 
 
 def run_shell(shell: str) -> str:
     Constants.log.info(shell)
+    timeout = get_timeout(None)  # 仅受指令的截止时间限制
     cmd = subprocess.Popen(shell, stdin=subprocess.PIPE, stderr=subprocess.PIPE, stdout=subprocess.PIPE,
-                           universal_newlines=True, shell=True, bufsize=1)
+                           universal_newlines=True, shell=True, bufsize=1, start_new_session=os.name != 'nt')
+    killer = threading.Timer(timeout, _kill_process_tree, args=[cmd]) if timeout is not None else None
+    if killer is not None:
+        killer.start()
+
     info = ""
     # 实时输出
-    while True:
-        line = cmd.stderr.readline().strip()
-        Constants.log.info(line)
-        info += line
-
-        if line == "" or subprocess.Popen.poll(cmd) == 0:  # 判断子进程是否结束
-            break
-
+    try:
+        while True:
+            line = cmd.stderr.readline().strip()
+            Constants.log.info(line)
+            info += line
+
+            if line == "" or subprocess.Popen.poll(cmd) == 0:  # 判断子进程是否结束
+                break
+    finally:
+        if killer is not None:
+            killer.cancel()
+
+    check_deadline("shell finished")
     return info
 
 
-def fetch_url(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
-              method: str = 'post') -> Response | int:
+def _get_proxies() -> dict | None:
     proxies = {}  # 配置代理
     if ('http_proxy' in Constants.config and
             Constants.config['http_proxy'] is not None and len(Constants.config['http_proxy']) > 0):
@@ -51,26 +93,218 @@ def fetch_url(url: str, inject_headers: dict = None, payload: dict = None, throw
         proxies['https'] = Constants.config['https_proxy']
     if len(proxies) == 0:
         proxies = None
+    return proxies
+
+
+def _get_headers(inject_headers: dict = None) -> dict:
+    headers = {
+        'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                      "Chrome/91.0.4472.77 Safari/537.36"
+    }
+    if inject_headers is not None:
+        for k, v in inject_headers.items():
+            headers[k] = v
+    return headers
+
+
+def _pack_response(url: str, status_code: int, headers: dict, content: bytes) -> Response:
+    """将非 requests 途径获得的响应包装为 Response，使上层解析逻辑保持一致"""
+    response = Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = content
+    return response
+
+
+def _pack_cached_response(cached: CacheEntry) -> Response:
+    return _pack_response(cached.url, cached.status_code, cached.headers, cached.content)
+
+
+def _lookup_cache(method: str, url: str, payload: dict | None, headers: dict) -> tuple[str | None, CacheEntry | None]:
+    """查询可缓存请求的缓存，缓存已过期时为请求附加条件请求头，回放夹具时不读写缓存，保证回放的是夹具本身"""
+    if payload is not None or response_cache.get_ttl(url) is None or fetch_fixture.is_replaying():
+        return None, None
+
+    cache_key = response_cache.get_key(method, url)
+    cached = response_cache.lookup(cache_key)
+    if cached is not None and not cached.is_fresh():
+        headers.update(cached.get_conditional_headers())
+    return cache_key, cached
+
+
+def _update_cache(url: str, cache_key: str | None, cached: CacheEntry | None, response: Response) -> Response:
+    if cache_key is None:
+        return response
+
+    if response.status_code == 304 and cached is not None:  # 条件请求命中，内容未变化
+        response_cache.refresh(cache_key, cached)
+        return _pack_cached_response(cached)
+
+    if response.status_code == 200:
+        response_cache.store(cache_key, CacheEntry(url=url, status_code=response.status_code,
+                                                   headers=dict(response.headers), content=response.content,
+                                                   ttl=response_cache.get_ttl(url)))
+    elif cached is not None:  # 上游异常时使用过期缓存兜底
+        Constants.log.warn(f"Serving stale cache of {cached.url} for code {response.status_code}, "
+                           f"age {cached.age()}s.")
+        return _pack_cached_response(cached)
+
+    return response
+
+
+def _check_queue_wait(limiter: TokenBucketScheduler):
+    """排队等待限流令牌的时间超过剩余时间时提前失败，而不是排到截止时间之后"""
+    remaining = get_remaining()
+    if remaining is not None and limiter.estimate_wait() > remaining:
+        raise DeadlineExceededError("Deadline would be exceeded while waiting for rate limiter.")
+
+
+def _acquire_within_deadline(limiter: TokenBucketScheduler):
+    """排队等待限流令牌，最多等待到截止时间"""
+    try:
+        limiter.acquire(timeout=get_remaining())
+    except TimeoutError as e:
+        raise DeadlineExceededError("Deadline exceeded while waiting for rate limiter.") from e
+
+
+async def _async_acquire_within_deadline(limiter: TokenBucketScheduler):
+    """_acquire_within_deadline 的协程版本"""
+    try:
+        await limiter.async_acquire(timeout=get_remaining())
+    except TimeoutError as e:
+        raise DeadlineExceededError("Deadline exceeded while waiting for rate limiter.") from e
+
+
+def _get_backoff_within_deadline(attempt: int) -> float:
+    backoff = get_backoff_seconds(attempt)
+    remaining = get_remaining()
+    if remaining is not None and backoff >= remaining:
+        raise DeadlineExceededError("Deadline would be exceeded while backing off.")
+    return backoff
+
+
+def _request_with_retry(method: str, url: str, headers: dict, proxies: dict | None, payload: dict | None,
+                        limiter: TokenBucketScheduler | None = None) -> Response:
+    """带熔断与指数退避重试的请求，host 熔断时直接失败，指定 limiter 时每次实际发出请求前排队获取令牌"""
+    health = host_health.get(urlsplit(url).netloc)
+    session = _fetch_sessions.get_session(url, proxies)  # 复用同一 host 的 keep-alive 连接
+    for attempt in range(get_retry_times() + 1):
+        if limiter is not None:
+            _check_queue_wait(limiter)
+            _acquire_within_deadline(limiter)
+        timeout = get_timeout()  # 每次请求的超时不超过指令剩余的时间
+        if not health.allow_request():
+            raise CircuitOpenError(f"Circuit of {health.host} is open.")
+        try:
+            begin_phases()
+            start = time.perf_counter()
+            try:
+                if method == 'post':
+                    response = session.post(url, headers=headers, proxies=proxies, json=payload, timeout=timeout)
+                else:
+                    response = session.get(url, headers=headers, proxies=proxies, timeout=timeout)
+            except RequestException as e:
+                fetch_metrics.record(url, type(e).__name__, 0,
+                                     {**end_phases(), 'total': time.perf_counter() - start})
+                if is_expired():
+                    raise DeadlineExceededError(f"Deadline exceeded while fetching {url}.") from e
+                health.record_failure()
+                if attempt == get_retry_times():
+                    raise
+                Constants.log.warn(f"Retrying {url} after failure: {e}")
+                time.sleep(_get_backoff_within_deadline(attempt))
+                continue
+
+            fetch_metrics.record(url, response.status_code, len(response.content),
+                                 {**end_phases(), 'ttfb': response.elapsed.total_seconds(),
+                                  'total': time.perf_counter() - start})
+            if not is_failure_status(response.status_code):
+                health.record_success()
+                return response
+            health.record_failure()
+            if attempt == get_retry_times():
+                return response
+            Constants.log.warn(f"Retrying {url} after code {response.status_code}.")
+            time.sleep(_get_backoff_within_deadline(attempt))
+        finally:
+            health.release_probe()  # 请求以任何方式结束都释放探测名额，避免 host 一直停留在半开状态
+
+
+async def _async_request_with_retry(method: str, url: str, headers: dict, proxies: dict | None,
+                                    payload: dict | None, limiter: TokenBucketScheduler | None = None) -> Response:
+    """_request_with_retry 的协程版本"""
+    health = host_health.get(urlsplit(url).netloc)
+    session = await get_client_session()
+    proxy = proxies.get(urlsplit(url).scheme) if proxies is not None else None
+    for attempt in range(get_retry_times() + 1):
+        if limiter is not None:
+            _check_queue_wait(limiter)
+            await _async_acquire_within_deadline(limiter)
+        timeout = get_timeout()
+        if not health.allow_request():
+            raise CircuitOpenError(f"Circuit of {health.host} is open.")
+        try:
+            timings = {}
+            start = time.perf_counter()
+            try:
+                async with session.request(method.upper(), url, headers=headers, proxy=proxy,
+                                           json=payload if method == 'post' else None,
+                                           timeout=ClientTimeout(total=timeout),
+                                           trace_request_ctx=timings) as resp:
+                    response = _pack_response(url, resp.status, dict(resp.headers), await resp.read())
+            except (ClientError, asyncio.TimeoutError) as e:
+                fetch_metrics.record(url, type(e).__name__, 0, {**timings, 'total': time.perf_counter() - start})
+                if is_expired():
+                    raise DeadlineExceededError(f"Deadline exceeded while fetching {url}.") from e
+                health.record_failure()
+                if attempt == get_retry_times():
+                    raise
+                Constants.log.warn(f"Retrying {url} after failure: {e}")
+                await asyncio.sleep(_get_backoff_within_deadline(attempt))
+                continue
+
+            fetch_metrics.record(url, response.status_code, len(response.content),
+                                 {**timings, 'total': time.perf_counter() - start})
+            if not is_failure_status(response.status_code):
+                health.record_success()
+                return response
+            health.record_failure()
+            if attempt == get_retry_times():
+                return response
+            Constants.log.warn(f"Retrying {url} after code {response.status_code}.")
+            await asyncio.sleep(_get_backoff_within_deadline(attempt))
+        finally:
+            health.release_probe()  # 请求以任何方式结束都释放探测名额，避免 host 一直停留在半开状态
+
+
+def fetch_url(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
+              method: str = 'post', limiter: TokenBucketScheduler | None = None) -> Response | int:
+    proxies = _get_proxies()
 
     code = 200
+    cached = None
     try:
-        headers = {
-            'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
-                          "Chrome/91.0.4472.77 Safari/537.36",
-            'Connection': 'close'
-        }
-        if inject_headers is not None:
-            for k, v in inject_headers.items():
-                headers[k] = v
+        headers = _get_headers(inject_headers)
 
         method = method.lower()
-        if method == 'post':
-            response = requests.post(url, headers=headers, proxies=proxies, json=payload)
-        elif method == 'get':
-            response = requests.get(url, headers=headers, proxies=proxies)
-        else:
+        cache_key, cached = _lookup_cache(method, url, payload, headers)
+        if cached is not None and cached.is_fresh():
+            Constants.log.info(f"Hit cache of {url}, age {cached.age()}s.")
+            return _pack_cached_response(cached)
+
+        if method not in ['post', 'get']:
             raise ValueError("Parameter method must be either 'post' or 'get'.")
 
+        if fetch_fixture.is_replaying():  # 回放夹具时不访问网络，也不经过限流与熔断
+            response = _pack_response(url, *fetch_fixture.replay(method, url, payload))
+        else:
+            response = _request_with_retry(method, url, headers, proxies, payload, limiter)
+            fetch_fixture.record(method, url, payload, response.status_code, dict(response.headers),
+                                 response.content)
+
+        response = _update_cache(url, cache_key, cached, response)
         code = response.status_code
         Constants.log.info(f"Connected to {url}, code {code}.")
 
@@ -79,6 +313,16 @@ def fetch_url(url: str, inject_headers: dict = None, payload: dict = None, throw
 
         return response
     except Exception as e:
+        if isinstance(e, DeadlineExceededError):  # 无论是否 throw，超时都需要中止整条指令
+            raise
+        if cached is not None:  # 连接失败时使用过期缓存兜底
+            Constants.log.warn(f"Serving stale cache of {url}, age {cached.age()}s: {e}")
+            return _pack_cached_response(cached)
+        if isinstance(e, CircuitOpenError):
+            if throw:
+                raise
+            Constants.log.warn(f"Fetch of {url} short-circuited.")
+            return 503
         if throw:
             raise RuntimeError(f"Filed to connect {url}: {e}") from e
         Constants.log.warn("A fetch exception ignored.")
@@ -87,8 +331,8 @@ def fetch_url(url: str, inject_headers: dict = None, payload: dict = None, throw
 
 
 def fetch_url_text(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
-                   method: str = 'post') -> str | int:
-    response = fetch_url(url, inject_headers, payload, throw, method)
+                   method: str = 'post', limiter: TokenBucketScheduler | None = None) -> str | int:
+    response = fetch_url(url, inject_headers, payload, throw, method, limiter)
 
     if isinstance(response, int):
         return response
@@ -97,12 +341,19 @@ def fetch_url_text(url: str, inject_headers: dict = None, payload: dict = None,
 
 
 def fetch_url_json(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
-                   method: str = 'post') -> dict | int:
-    response = fetch_url(url, inject_headers, payload, throw, method)
+                   method: str = 'post', limiter: TokenBucketScheduler | None = None,
+                   stream: dict[str, Projector] | None = None) -> dict | int:
+    """
+    stream 指定路径到投影函数的映射时，逐个解析并投影对应数组的元素，只保留需要的字段，
+    避免大体积响应被完整解析为 python 对象，详见 loads_projected
+    """
+    response = fetch_url(url, inject_headers, payload, throw, method, limiter)
 
     if isinstance(response, int):
         return response
 
+    if stream is not None:
+        return loads_projected(response.text, stream)
     return response.json()
 
 
@@ -111,6 +362,96 @@ def fetch_url_element(url: str, payload: dict = None) -> Element:
     return etree.HTML(response.text)
 
 
+async def async_fetch_url(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
+                          method: str = 'post', limiter: TokenBucketScheduler | None = None) -> Response | int:
+    """fetch_url 的协程版本，在共享的 aiohttp 会话上发起请求，需运行于 get_fetch_loop() 中"""
+    proxies = _get_proxies()
+
+    code = 200
+    cached = None
+    try:
+        headers = _get_headers(inject_headers)
+
+        method = method.lower()
+        if method not in ['post', 'get']:
+            raise ValueError("Parameter method must be either 'post' or 'get'.")
+
+        cache_key, cached = _lookup_cache(method, url, payload, headers)
+        if cached is not None and cached.is_fresh():
+            Constants.log.info(f"Hit cache of {url}, age {cached.age()}s.")
+            return _pack_cached_response(cached)
+
+        if fetch_fixture.is_replaying():
+            response = _pack_response(url, *(await fetch_fixture.async_replay(method, url, payload)))
+        else:
+            response = await _async_request_with_retry(method, url, headers, proxies, payload, limiter)
+            fetch_fixture.record(method, url, payload, response.status_code, dict(response.headers),
+                                 response.content)
+
+        response = _update_cache(url, cache_key, cached, response)
+        code = response.status_code
+        Constants.log.info(f"Connected to {url}, code {code}.")
+
+        if code != 200 and throw:
+            raise ConnectionError(f"Filed to connect {url}, code {code}.")
+
+        return response
+    except Exception as e:
+        if isinstance(e, DeadlineExceededError):  # 无论是否 throw，超时都需要中止整条指令
+            raise
+        if cached is not None:  # 连接失败时使用过期缓存兜底
+            Constants.log.warn(f"Serving stale cache of {url}, age {cached.age()}s: {e}")
+            return _pack_cached_response(cached)
+        if isinstance(e, CircuitOpenError):
+            if throw:
+                raise
+            Constants.log.warn(f"Fetch of {url} short-circuited.")
+            return 503
+        if throw:
+            raise RuntimeError(f"Filed to connect {url}: {e}") from e
+        Constants.log.warn("A fetch exception ignored.")
+        Constants.log.warn(e)
+        return code
+
+
+async def async_fetch_url_text(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
+                               method: str = 'post', limiter: TokenBucketScheduler | None = None) -> str | int:
+    response = await async_fetch_url(url, inject_headers, payload, throw, method, limiter)
+
+    if isinstance(response, int):
+        return response
+
+    return response.text
+
+
+async def async_fetch_url_json(url: str, inject_headers: dict = None, payload: dict = None, throw: bool = True,
+                               method: str = 'post', limiter: TokenBucketScheduler | None = None,
+                               stream: dict[str, Projector] | None = None) -> dict | int:
+    response = await async_fetch_url(url, inject_headers, payload, throw, method, limiter)
+
+    if isinstance(response, int):
+        return response
+
+    if stream is not None:
+        return loads_projected(response.text, stream)
+    return response.json()
+
+
+async def async_fetch_url_element(url: str, payload: dict = None) -> Element:
+    response = await async_fetch_url(url, payload=payload, method='get')
+    return etree.HTML(response.text)
+
+
+def get_fetch_pool_stats() -> dict[str, dict[str, int]]:
+    """汇总 fetch_url 与 save_img 连接池中各 host 的连接复用情况"""
+    stats = _fetch_sessions.get_stats()
+    for host, host_stats in _img_sessions.get_stats().items():
+        merged = stats.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0})
+        for key, val in host_stats.items():
+            merged[key] += val
+    return stats
+
+
 def format_timestamp_diff(diff: int) -> str:
     abs_diff = abs(diff)
     if abs_diff == 0:
@@ -181,30 +522,84 @@ def check_is_float(value: str) -> bool:
         return False
 
 
-def save_img(url: str, file_path: str) -> bool:
-    headers = {
-        'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/91.0.4472.77 Safari/537.36"
-    }
+def download_img(url: str) -> tuple[str, SpooledTemporaryFile] | None:
+    """
+    分块下载图片，下载的同时计算 md5，较小的图片只缓冲在内存中，便于在写入磁盘前去重
+    :return: tuple[md5, 指针位于开头的缓冲文件] | None，缓冲文件需由调用方关闭
+    """
     url = patch_https_url(url)
+    buffer = SpooledTemporaryFile(max_size=_img_spool_size)
+    md5 = hashlib.md5()
 
-    sess = requests.session()
-    sess.mount("https://", SSLAdapter())  # 将上面定义的SSLAdapter 应用起来
-
-    response = sess.get(url, headers=headers, verify=False)  # 阻止ssl验证
-
-    if response.status_code == 200:
-        parent_path = os.path.dirname(file_path)
-        if not os.path.exists(parent_path):
-            os.makedirs(parent_path)
+    try:
+        if fetch_fixture.is_replaying():
+            status_code, _, content = fetch_fixture.replay('get', url)
+            if status_code != 200:
+                buffer.close()
+                return None
+            md5.update(content)
+            buffer.write(content)
+        else:
+            sess = _img_sessions.get_session(url)  # 复用挂载了 SSLAdapter 的连接池
+            with sess.get(url, headers=_get_headers(), verify=False, stream=True,  # 阻止ssl验证
+                          timeout=get_timeout()) as response:
+                if response.status_code != 200:
+                    buffer.close()
+                    return None
+                for chunk in response.iter_content(chunk_size=_img_chunk_size):
+                    md5.update(chunk)
+                    buffer.write(chunk)
+                if fetch_fixture.is_recording():
+                    buffer.seek(0)
+                    fetch_fixture.record('get', url, None, response.status_code, dict(response.headers),
+                                         buffer.read())
+    except Exception:
+        buffer.close()
+        raise
+
+    buffer.seek(0)
+    return md5.hexdigest(), buffer
+
+
+def write_buffer(buffer: SpooledTemporaryFile, file_path: str):
+    """先写入临时文件再替换，写入失败时不会留下不完整的文件"""
+    parent_path = os.path.dirname(file_path)
+    if not os.path.exists(parent_path):
+        os.makedirs(parent_path)
+
+    part_path = f"{file_path}.part"
+    try:
+        with open(part_path, "wb") as f:
+            shutil.copyfileobj(buffer, f)
+        os.replace(part_path, file_path)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+
+def write_buffer_once(buffer: SpooledTemporaryFile, file_name: str, dir_path: str,
+                      lookup_paths: list[str] | None = None) -> bool:
+    """
+    以内容摘要作为文件名时用于去重，dir_path 或 lookup_paths 下已有同名文件时不写入
+    :return: 是否写入
+    """
+    for path in [dir_path] + (lookup_paths or []):
+        if os.path.exists(os.path.join(path, file_name)):
+            return False
+    write_buffer(buffer, os.path.join(dir_path, file_name))
+    return True
 
-        with open(file_path, "wb") as f:
-            f.write(response.content)
-            f.close()
 
-        return True
+def save_img(url: str, file_path: str) -> bool:
+    downloaded = download_img(url)
+    if downloaded is None:
+        return False
 
-    return False
+    _, buffer = downloaded
+    with buffer:
+        write_buffer(buffer, file_path)
+    return True
 
 
 def png2jpg(path: str, remove_origin: bool = True) -> str:
@@ -346,18 +741,3 @@ def is_valid_date(date_str: str, fmt: str) -> bool:
         return True
     except ValueError:
         return False
-
-
-class SSLAdapter(HTTPAdapter):
-    def init_poolmanager(self, *args, **kwargs):
-        """
-        tls1.3 不再支持RSA KEY exchange，py3.10 增加TLS的默认安全设置。可能导致握手失败。
-        使用 `ssl_context.set_ciphers('DEFAULT')` DEFAULT 老的加密设置。
-        """
-        ssl_context = ssl.create_default_context()
-        ssl_context.set_ciphers('DEFAULT')
-        ssl_context.check_hostname = False  # 避免在请求时 verify=False 设置时报错， 如果设置需要校验证书可去掉该行。
-        ssl_context.minimum_version = ssl.TLSVersion.TLSv1_2  # 最小版本设置成1.2 可去掉低版本的警告
-        ssl_context.maximum_version = ssl.TLSVersion.TLSv1_2  # 最大版本设置成1.2
-        kwargs["ssl_context"] = ssl_context
-        return super().init_poolmanager(*args, **kwargs)
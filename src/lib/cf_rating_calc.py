@@ -8,6 +8,8 @@ https://github.com/cheran-senthil/TLE/blob/master/tle/util/ranklist/rating_calcu
 originally adapted from Codeforces code to recalculate ratings
 by Mike Mirzayanov (mirzayanovmr@gmail.com) at https://codeforces.com/contest/1/submission/13861109
 """
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 
 import numpy as np
@@ -41,6 +43,8 @@ RATING_RANGE_LEN: int = MAX_RATING_LIMIT - MIN_RATING_LIMIT
 # The probability of contestant with rating x winning versus contestant with rating y
 # is given by ELO_WIN_PROB[y - x].
 ELO_WIN_PROB = np.roll(1 / (1 + np.power(10, np.arange(-RATING_RANGE_LEN, RATING_RANGE_LEN) / 400)), -RATING_RANGE_LEN)
+# ELO_WIN_PROB 的频谱在每次计算 seed 时都相同，导入时计算一次；输入均为实数，使用实数 FFT
+ELO_WIN_PROB_SPECTRUM = np.fft.rfft(ELO_WIN_PROB)
 
 
 def binary_search(low, high, condition):
@@ -53,9 +57,69 @@ def binary_search(low, high, condition):
     return low
 
 
+def binary_search_batch(low: np.ndarray, high: np.ndarray, condition) -> np.ndarray:
+    """
+    binary_search 的批量版本，所有区间按与 binary_search 完全相同的取中方式同步推进，
+    因此每个元素的结果与逐个调用 binary_search 一致
+    condition 接收所有元素当前的 mid 数组，返回同形状的布尔数组
+    """
+    low, high = low.copy(), high.copy()
+    while (active := high - low > 1).any():
+        mid = (low + high) // 2
+        satisfied = condition(mid)
+        high = np.where(active & satisfied, mid, high)
+        low = np.where(active & ~satisfied, mid, low)
+    return low
+
+
+class SeedCalculator:
+    """
+    由 rating 直方图计算 seed，seed 只取决于直方图
+    同一场比赛反复预测时参赛者的 rating 通常不变，保留最近几个直方图的结果，命中时跳过 FFT
+    实数 FFT 与原先复数 FFT 取实部的结果并非逐位相同，2 万人规模下误差约 1e-11，
+    仅在 seed 恰好与名次相差该量级时才可能使二分结果相差 1，与原实现的对比见 test_rating_calc_baseline
+    """
+
+    def __init__(self, max_entries: int = 4):
+        self._max_entries = max_entries
+        self._seeds: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def histogram(ratings: np.ndarray) -> np.ndarray:
+        """负的 rating 与直接下标赋值一样从末尾回绕"""
+        return np.bincount(ratings % len(ELO_WIN_PROB), minlength=len(ELO_WIN_PROB)).astype(np.float64)
+
+    def calc(self, ratings: np.ndarray) -> np.ndarray:
+        """
+        Expected rank for a contestant x is 1 + sum of ELO win probabilities of every other
+        contestant versus x.
+        seed[r] is the expected rank of a contestant with rating r, who did not participate in the
+        contest, if he had participated.
+        """
+        count = self.histogram(ratings)
+        key = count.tobytes()
+        with self._lock:
+            if key in self._seeds:
+                self._seeds.move_to_end(key)
+                return self._seeds[key]
+
+        seed = 1 + np.fft.irfft(np.fft.rfft(count) * ELO_WIN_PROB_SPECTRUM, n=len(count))
+        seed.flags.writeable = False  # 结果在多次预测间共享
+        with self._lock:
+            self._seeds[key] = seed
+            while len(self._seeds) > self._max_entries:
+                self._seeds.popitem(last=False)
+        return seed
+
+
+seed_calculator = SeedCalculator()
+
+
 class RatingCalculator:
-    def __init__(self, contestants: list[Contestant]):
+    def __init__(self, contestants: list[Contestant], seeds: SeedCalculator = seed_calculator):
         self.contestants = contestants
+        self.seeds = seeds
         self.seed = None
         self.adjustment = None
 
@@ -68,17 +132,8 @@ class RatingCalculator:
             self.calc_perfs()
 
     def calc_seed(self):
-        """
-        Expected rank for a contestant x is 1 + sum of ELO win probabilities of every other
-        contestant versus x.
-        seed[r] is the expected rank of a contestant with rating r, who did not participate in the
-        contest, if he had participated.
-        """
-        count = np.zeros(2 * RATING_RANGE_LEN)
-        for c in self.contestants:
-            count[c.rating] += 1
-
-        self.seed = 1 + np.fft.ifft(np.fft.fft(count) * np.fft.fft(ELO_WIN_PROB)).real
+        """见 SeedCalculator.calc"""
+        self.seed = self.seeds.calc(np.array([c.rating for c in self.contestants], dtype=np.int64))
 
     def get_seed(self, r: int, exclude: int) -> float:
         """
@@ -89,6 +144,10 @@ class RatingCalculator:
         """
         return self.seed[r] - ELO_WIN_PROB[r - exclude]
 
+    def get_seeds(self, r: np.ndarray, exclude: np.ndarray) -> np.ndarray:
+        """get_seed 的批量版本，负的下标与 get_seed 一样从末尾回绕"""
+        return self.seed[r] - ELO_WIN_PROB[r - exclude]
+
     def reassign_ranks(self):
         self.contestants.sort(key=lambda x: (-x.points, x.penalty))
         last_points = last_penalty = rank = None
@@ -105,15 +164,29 @@ class RatingCalculator:
         delta = int(np.trunc((need_rating - assumed_rating) / 2))
         return delta
 
+    def calc_deltas_batch(self, ranks: np.ndarray, ratings: np.ndarray, assumed_ratings: np.ndarray) -> np.ndarray:
+        """calc_delta 的批量版本，对每个元素给出与 calc_delta 完全相同的结果"""
+        seeds = self.get_seeds(assumed_ratings, ratings)
+        mid_ranks = np.sqrt(ranks * seeds)
+        need_ratings = self.rank_to_ratings(mid_ranks, ratings)
+        return np.trunc((need_ratings - assumed_ratings) / 2).astype(np.int64)
+
     def calc_deltas(self):
-        for c in self.contestants:
-            c.delta = self.calc_delta(c, c.rating)
+        ranks = np.array([c.rank for c in self.contestants], dtype=np.int64)
+        ratings = np.array([c.rating for c in self.contestants], dtype=np.int64)
+        for c, delta in zip(self.contestants, self.calc_deltas_batch(ranks, ratings, ratings).tolist()):
+            c.delta = delta
 
     def rank_to_rating(self, rank: int, self_rating: int) -> int:
         """Finds last rating at which seed >= rank."""
         return binary_search(2, MAX_RATING_LIMIT,
                              lambda x: self.get_seed(x, self_rating) < rank) - 1
 
+    def rank_to_ratings(self, ranks: np.ndarray, self_ratings: np.ndarray) -> np.ndarray:
+        """rank_to_rating 的批量版本，seed 关于 rating 单调，所有人的二分可以同步进行"""
+        return binary_search_batch(np.full(len(ranks), 2), np.full(len(ranks), MAX_RATING_LIMIT),
+                                   lambda x: self.get_seeds(x, self_ratings) < ranks) - 1
+
     def adjust_deltas(self):
         self.contestants.sort(key=lambda x: -x.rating)
         n = len(self.contestants)
@@ -137,12 +210,22 @@ class RatingCalculator:
         calculating performance, varies.
         Tests on some selected contests show (this perf - true perf) lie in [0, 4].
         """
-        for c in self.contestants:
-            if c.rank == 1:
-                c.performance = float('inf')  # Rank 1 always gains rating
-            else:
-                c.performance = binary_search(MIN_RATING_LIMIT, MAX_RATING_LIMIT,
-                                              lambda x: self.calc_delta(c, x) + self.adjustment <= 0)
+        # 所有人的外层二分同步推进，每一步对全体的假定 rating 批量计算一次 delta
+        ranks = np.array([c.rank for c in self.contestants], dtype=np.int64)
+        ratings = np.array([c.rating for c in self.contestants], dtype=np.int64)
+        perfs = binary_search_batch(np.full(len(ranks), MIN_RATING_LIMIT), np.full(len(ranks), MAX_RATING_LIMIT),
+                                    lambda x: self.calc_deltas_batch(ranks, ratings, x) + self.adjustment <= 0)
+        for c, perf in zip(self.contestants, perfs.tolist()):
+            c.performance = float('inf') if c.rank == 1 else perf  # Rank 1 always gains rating
+
+
+def warm_up():
+    """
+    在启动时完成一次小规模预测，提前加载 NumPy 的 FFT 等实现，避免第一次查询时的额外延迟
+    使用独立的 SeedCalculator，不占用共享的 seed 缓存
+    """
+    contestants = [Contestant(f"warm_up_{idx}", idx % 5, idx, 1000 + idx * 10) for idx in range(100)]
+    RatingCalculator(contestants, SeedCalculator()).calculate_deltas(calc_perfs=True)
 
 
 def predict(contestants: list[Contestant], calc_perfs: bool = False) -> dict[str, PredictResult]:
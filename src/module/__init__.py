@@ -4,6 +4,7 @@ def register_all_modules():
     from .cf import register_module
     from .color_rand import register_module
     from .contest_manual import register_module
+    from .monitor import register_module
     from .nk import register_module
     from .peeper import register_module
     from .pick_one import register_module
@@ -1,8 +1,9 @@
 import re
 import traceback
 
-from src.core.command import command
+from src.core.command import command, coalesce_except, cache_subcommands
 from src.core.constants import Constants
+from src.core.degrade import degrade_mode
 from src.core.output_cached import get_cached_prefix
 from src.core.tools import get_simple_qrcode, png2jpg
 from src.module.message import RobotMessage
@@ -28,6 +29,7 @@ def send_user_id_card(message: RobotMessage, handle: str):
         cached_prefix = get_cached_prefix('Platform-ID')
         id_card.write_file(f"{cached_prefix}.png")
         message.reply(f"[AtCoder] {handle}", png2jpg(f"{cached_prefix}.png"), modal_words=False)
+        message.mark_cacheable()
 
 
 def send_user_info(message: RobotMessage, handle: str):
@@ -43,6 +45,8 @@ def send_user_info(message: RobotMessage, handle: str):
         content = (f"[AtCoder] {handle}\n\n"
                    f"{info}\n\n"
                    f"{last_contest}")
+        if last_contest not in ("查询异常", "用户不存在"):  # 查询失败的回复不缓存
+            message.mark_cacheable()
 
     message.reply(content, img_url=avatar, modal_words=False)
 
@@ -68,6 +72,10 @@ def send_prob_filter_tag(message: RobotMessage, contest_type: str, limit: str =
     if 'rating' in chosen_prob:
         content += f"\n难度: *{chosen_prob['rating']}"
 
+    if degrade_mode.is_degraded():  # 负载过高时省去二维码，仅回复文本中的链接
+        message.reply(content, modal_words=False)
+        return True
+
     cached_prefix = get_cached_prefix('QRCode-Generator')
     qr_img = get_simple_qrcode(chosen_prob['url'])
     qr_img.save(f"{cached_prefix}.png")
@@ -88,7 +96,8 @@ def send_contest(message: RobotMessage):
     message.reply(content, modal_words=False)
 
 
-@command(tokens=['atc', 'atcoder'])
+@command(tokens=['atc', 'atcoder'], coalesce=coalesce_except('pick', 'prob', 'problem'),
+         cache_ttl=5 * 60, cache_key=cache_subcommands('identity', 'id', 'card', 'info', 'user'))
 def reply_atc_request(message: RobotMessage):
     try:
         content = re.sub(r'<@!\d+>', '', message.content).strip().split()
@@ -1,22 +1,34 @@
 import re
 import traceback
 
-from src.core.command import command
+from src.core.async_runner import run_async_gather
+from src.core.command import command, coalesce_except, cache_subcommands
 from src.core.constants import Constants
+from src.core.degrade import degrade_mode
 from src.core.output_cached import get_cached_prefix
 from src.core.tools import check_is_int, get_simple_qrcode, png2jpg
 from src.module.message import RobotMessage
 from src.platform.online.codeforces import Codeforces
 
-__cf_version__ = "v3.1.2"
+__cf_version__ = "v3.3.0"
+
+_failed_sections = ("查询异常", "用户不存在")  # 查询失败时各项返回的提示，含有这些提示的回复不缓存
 
 
 def register_module():
     pass
 
 
+def _format_wait_hint() -> str:
+    """其他指令的 api 调用较多时，提示用户预计的等待时间"""
+    wait = Codeforces.estimate_api_wait()
+    if wait <= 2:
+        return ""
+    return f"\n当前 Codeforces 接口调用较多，预计需排队 {wait} 秒"
+
+
 def send_user_id_card(message: RobotMessage, handle: str):
-    message.reply(f"正在查询 {handle} 的 Codeforces 基础信息，请稍等")
+    message.reply(f"正在查询 {handle} 的 Codeforces 基础信息，请稍等{_format_wait_hint()}")
 
     id_card = Codeforces.get_user_id_card(handle)
 
@@ -28,10 +40,11 @@ def send_user_id_card(message: RobotMessage, handle: str):
         cached_prefix = get_cached_prefix('Platform-ID')
         id_card.write_file(f"{cached_prefix}.png")
         message.reply(f"[Codeforces] {handle}", png2jpg(f"{cached_prefix}.png"), modal_words=False)
+        message.mark_cacheable()
 
 
 def send_user_info(message: RobotMessage, handle: str):
-    message.reply(f"正在查询 {handle} 的 Codeforces 平台信息，请稍等")
+    message.reply(f"正在查询 {handle} 的 Codeforces 平台信息，请稍等{_format_wait_hint()}")
 
     info, avatar = Codeforces.get_user_info(handle)
 
@@ -39,9 +52,12 @@ def send_user_info(message: RobotMessage, handle: str):
         content = (f"[Codeforces] {handle}\n\n"
                    f"{info}")
     else:
-        last_contest = Codeforces.get_user_last_contest(handle)
-        last_submit = Codeforces.get_user_last_submit(handle)
-        total_sums, weekly_sums, daily_sums = Codeforces.get_user_submit_counts(handle)
+        # 用户存在时再查询其余各项，各项互不依赖，在同一事件循环上并发请求
+        last_contest, last_submit, (total_sums, weekly_sums, daily_sums) = run_async_gather(
+            Codeforces.async_get_user_last_contest(handle),
+            Codeforces.async_get_user_last_submit(handle),
+            Codeforces.async_get_user_submit_counts(handle)
+        )
         daily = "今日暂无过题" if daily_sums == 0 else f"今日通过 {daily_sums} 题"
         weekly = "" if weekly_sums == 0 else f"，本周共通过 {weekly_sums} 题"
         content = (f"[Codeforces] {handle}\n\n"
@@ -50,12 +66,14 @@ def send_user_info(message: RobotMessage, handle: str):
                    f"{last_contest}\n\n"
                    f"{daily}{weekly}\n"
                    f"{last_submit}")
+        if total_sums >= 0 and last_contest not in _failed_sections and last_submit not in _failed_sections:
+            message.mark_cacheable()
 
     message.reply(content, img_url=avatar, modal_words=False)
 
 
 def send_user_last_submit(message: RobotMessage, handle: str, count: int):
-    message.reply(f"正在查询 {handle} 的 Codeforces 提交记录，请稍等")
+    message.reply(f"正在查询 {handle} 的 Codeforces 提交记录，请稍等{_format_wait_hint()}")
 
     info, _ = Codeforces.get_user_info(handle)
 
@@ -71,7 +89,7 @@ def send_user_last_submit(message: RobotMessage, handle: str, count: int):
 
 
 def send_prob_tags(message: RobotMessage):
-    message.reply("正在查询 Codeforces 平台的所有问题标签，请稍等")
+    message.reply(f"正在查询 Codeforces 平台的所有问题标签，请稍等{_format_wait_hint()}")
 
     prob_tags = Codeforces.get_prob_tags_all()
 
@@ -81,12 +99,13 @@ def send_prob_tags(message: RobotMessage):
         content = "\n[Codeforces] 问题标签:\n"
         for tag in prob_tags:
             content += "\n" + tag
+        message.mark_cacheable()
 
     message.reply(content, modal_words=False)
 
 
 def send_prob_filter_tag(message: RobotMessage, tag: str, limit: str = None, newer: bool = False) -> bool:
-    message.reply("正在随机选题，请稍等")
+    message.reply(f"正在随机选题，请稍等{_format_wait_hint()}")
 
     chosen_prob = Codeforces.get_prob_filtered(tag, limit, newer,
                                                on_tag_chosen=lambda x: message.reply(x))
@@ -107,6 +126,10 @@ def send_prob_filter_tag(message: RobotMessage, tag: str, limit: str = None, new
     if 'rating' in chosen_prob:
         content += f"\n难度: *{chosen_prob['rating']}"
 
+    if degrade_mode.is_degraded():  # 负载过高时省去二维码，仅回复文本中的链接
+        message.reply(content, modal_words=False)
+        return True
+
     cached_prefix = get_cached_prefix('QRCode-Generator')
     qr_img = get_simple_qrcode(
         f"https://codeforces.com/contest/{chosen_prob['contestId']}/problem/{chosen_prob['index']}")
@@ -118,7 +141,7 @@ def send_prob_filter_tag(message: RobotMessage, tag: str, limit: str = None, new
 
 
 def send_contest(message: RobotMessage):
-    message.reply(f"正在查询近期 Codeforces 比赛，请稍等")
+    message.reply(f"正在查询近期 Codeforces 比赛，请稍等{_format_wait_hint()}")
 
     info = Codeforces.get_recent_contests()
 
@@ -130,7 +153,8 @@ def send_contest(message: RobotMessage):
 
 def send_user_contest_standings(message: RobotMessage, handle: str, contest_id: str):
     message.reply(f"正在查询编号为 {contest_id} 的比赛中 {handle} 的榜单信息，请稍等。\n"
-                        f"查询对象为参赛者时将会给出 Rating 变化预估，但可能需要更久的时间")
+                        f"查询对象为参赛者时将会给出 Rating 变化预估，但可能需要更久的时间"
+                        f"{_format_wait_hint()}")
 
     contest_info, standings_info = Codeforces.get_user_contest_standings(handle, contest_id)
 
@@ -150,7 +174,8 @@ def send_logo(message: RobotMessage):
     message.reply("[Codeforces] 网站当前的图标", img_url=Codeforces.logo_url)
 
 
-@command(tokens=['cf', 'codeforces'])
+@command(tokens=['cf', 'codeforces'], coalesce=coalesce_except('pick', 'prob', 'problem'),
+         cache_ttl=5 * 60, cache_key=cache_subcommands('identity', 'id', 'card', 'info', 'user', 'tag', 'tags'))
 def reply_cf_request(message: RobotMessage):
     try:
         content = re.sub(r'<@!\d+>', '', message.content).strip().split()
@@ -200,6 +225,7 @@ def reply_cf_request(message: RobotMessage):
                 message.reply("请输入正确的指令格式，题目标签不要带有空格，如:\n\n"
                                     f"{func_prefix} dp 1700-1900 new\n"
                                     f"{func_prefix} dfs-and-similar\n"
+                                    f"{func_prefix} dp,greedy,!math 1600\n"
                                     f"{func_prefix} all 1800", modal_words=False)
 
         elif func == "contest" or func == "contests":
@@ -12,7 +12,7 @@ from qrcode.image.styles.colormasks import SolidFillColorMask
 from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
 from qrcode.main import QRCode
 
-from src.core.command import command
+from src.core.command import command, CommandLane
 from src.core.constants import Constants
 from src.core.output_cached import get_cached_prefix
 from src.core.tools import png2jpg
@@ -61,7 +61,7 @@ def add_qrcode(target_path: str, color: dict):
     target_img.save(target_path)
 
 
-@command(tokens=["color", "颜色", "色", "来个颜色", "来个色卡", "色卡"])
+@command(tokens=["color", "颜色", "色", "来个颜色", "来个色卡", "色卡"], lane=CommandLane.CPU)
 def reply_color_rand(message: RobotMessage):
     cached_prefix = get_cached_prefix('Color-Rand')
     img_path = f"{cached_prefix}.png"
@@ -4,7 +4,7 @@ import random
 import re
 from asyncio import AbstractEventLoop
 from enum import Enum
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 
 from botpy import BotAPI
 from botpy.message import Message, GroupMessage, C2CMessage
@@ -36,10 +36,21 @@ class RobotMessage:
         self.msg_seq = 0
         self.user_permission_level: PermissionLevel = PermissionLevel.USER
         self._public = False  # Guild only
+        self._reply_listeners: list[Callable[..., None]] = []
+        self._failed = False
+        self._cacheable = False
 
     def is_guild_public(self):
         return self._public
 
+    def get_conversation_id(self) -> str:
+        """消息所在的会话，频道按子频道、群聊按群、私聊按用户区分"""
+        if self.message_type == MessageType.GUILD:
+            return f"guild:{self.message.channel_id}"
+        if self.message_type == MessageType.GROUP:
+            return f"group:{self.message.group_openid}"
+        return f"c2c:{self.author_id}"
+
     def _initial_setup(self, message: Message | GroupMessage | C2CMessage, author_id_path: str):
         self.content = message.content
         self.tokens = re.sub(r'<@!\d+>', '', message.content).strip().split()
@@ -66,11 +77,29 @@ class RobotMessage:
         self.message = message
         self._initial_setup(message, 'user_openid')
 
+    def mark_cacheable(self):
+        """
+        标记本次回复可以缓存，配置了 cache_ttl 的指令仅在处理成功后调用
+        查询失败、用户不存在等提示不应缓存，以免在 TTL 内重复发送给其他请求者
+        """
+        self._cacheable = True
+
+    def is_cacheable(self) -> bool:
+        """已标记可以缓存，且处理过程中未报告过异常"""
+        return self._cacheable and not self._failed
+
+    def add_reply_listener(self, listener: Callable[..., None]):
+        """每次回复时以相同的参数调用 listener，用于将回复转发给合并的请求"""
+        self._reply_listeners.append(listener)
+
     def reply(self, content: str, img_path: str = None, img_url: str = None, modal_words: bool = True):
         """异步发送回复的入口方法"""
         if not self.loop:
             raise RuntimeError("Event loop not initialized")
 
+        for listener in self._reply_listeners:
+            listener(content, img_path=img_path, img_url=img_url, modal_words=modal_words)
+
         friendly_content = content + random.choice(Constants.modal_words) if modal_words else content
         friendly_content = april_fool_magic(friendly_content)
 
@@ -192,4 +221,5 @@ class RobotMessage:
     def report_exception(self, module_name: str, trace: str, e: Exception):
         Constants.log.warn(f"[Operation failed] in module {module_name}.\n{repr(e)}")
         Constants.log.error(trace)
+        self._failed = True
         self.reply(handle_exception(e), modal_words=False)
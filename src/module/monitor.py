@@ -0,0 +1,148 @@
+import time
+
+from src.core.admission import get_controllers
+from src.core.command import command, __commands__
+from src.core.degrade import degrade_mode
+from src.core.fetch_cache import response_cache
+from src.core.fetch_metrics import fetch_metrics
+from src.core.host_health import host_health, CircuitState
+from src.core.ingress import ingress_stats
+from src.core.perm import PermissionLevel
+from src.core.reply_cache import reply_cache
+from src.core.scheduler import get_schedulers
+from src.core.tools import get_fetch_pool_stats
+from src.module.message import RobotMessage
+
+__monitor_version__ = "v1.7.0"
+
+
+def register_module():
+    pass
+
+
+@command(tokens=["连接池", "pool"], permission_level=PermissionLevel.ADMIN)
+def reply_pool_stats(message: RobotMessage):
+    stats = get_fetch_pool_stats()
+    if len(stats) == 0:
+        message.reply("[Monitor] 连接池暂无记录", modal_words=False)
+        return
+
+    info = "[Monitor] 连接池复用情况\n"
+    for host, host_stats in sorted(stats.items(), key=lambda x: -x[1]['requests']):
+        info += (f"\n[{host}] 请求 {host_stats['requests']}，"
+                 f"新建连接 {host_stats['connections']}，复用 {host_stats['reused']}")
+
+    circuits = {host: (state, failures) for host, (state, failures) in host_health.get_stats().items()
+                if state != CircuitState.CLOSED or failures > 0}
+    if len(circuits) > 0:
+        info += "\n\n[Monitor] 异常的 host\n"
+        for host, (state, failures) in circuits.items():
+            info += f"\n[{host}] {state.value}，连续失败 {failures}"
+
+    message.reply(info, modal_words=False)
+
+
+def _format_ms(summary: dict[str, float], key: str) -> str:
+    return f"{summary[key] * 1000:.0f}ms" if key in summary else "-"
+
+
+def _format_fetch_stats(name: str, stats: dict) -> str:
+    total = stats['timings'].get('total', {})
+    info = (f"\n[{name}] 请求 {stats['requests']}，失败 {stats['errors']}，"
+            f"总耗时 p50 {_format_ms(total, 'p50')} / p95 {_format_ms(total, 'p95')} / max {_format_ms(total, 'max')}")
+
+    phases = []
+    for phase in ['dns', 'connect', 'tls', 'ttfb']:
+        if phase in stats['timings']:
+            phases.append(f"{phase} {_format_ms(stats['timings'][phase], 'avg')}")
+    if len(phases) > 0:
+        info += f"\n平均 {', '.join(phases)}"
+    if 'avg' in stats['size']:
+        info += f"\n平均响应 {stats['size']['avg'] / 1024:.1f}KB"
+    info += "\n状态 " + ', '.join(f"{status}×{count}" for status, count in
+                                  sorted(stats['status'].items(), key=lambda x: -x[1]))
+    return info
+
+
+@command(tokens=["网络状态", "netstat"], permission_level=PermissionLevel.ADMIN)
+def reply_fetch_metrics(message: RobotMessage):
+    host = message.tokens[1] if len(message.tokens) >= 2 else None
+    stats = fetch_metrics.get_summary(host)
+    if len(stats) == 0:
+        message.reply("[Monitor] 暂无网络请求记录" if host is None else f"[Monitor] 暂无 {host} 的请求记录",
+                      modal_words=False)
+        return
+
+    # 按 p95 总耗时从慢到快排序，便于找出最慢的上游
+    ordered = sorted(stats.items(), key=lambda x: -x[1]['timings'].get('total', {}).get('p95', 0))
+    info = "[Monitor] 各平台网络请求情况\n" if host is None else f"[Monitor] {host} 各接口请求情况\n"
+    info += '\n'.join(_format_fetch_stats(name, host_stats) for name, host_stats in ordered)
+    if host is None:
+        info += "\n\n使用 /netstat [host] 查看各接口的详细情况"
+
+    message.reply(info, modal_words=False)
+
+
+@command(tokens=["排队", "queue"], permission_level=PermissionLevel.ADMIN)
+def reply_queue_stats(message: RobotMessage):
+    ingress = ingress_stats.get_stats()
+    queues = {name: (scheduler.size(), scheduler.get_wait_stats()) for name, scheduler in get_schedulers().items()}
+    if len(ingress) == 0 and all(len(stats) == 0 for _, stats in queues.values()):
+        message.reply("[Monitor] 暂无排队记录", modal_words=False)
+        return
+
+    info = "[Monitor] 消息接收情况\n"
+    for event, event_stats in sorted(ingress.items()):
+        info += f"\n[{event}] 接收 {event_stats['accepted']}"
+        if len(event_stats['shed']) > 0:
+            info += "，丢弃 " + ', '.join(f"{reason}×{count}" for reason, count in event_stats['shed'].items())
+
+    degrade = degrade_mode.get_stats()
+    if degrade['degraded']:
+        info += (f"\n\n[Monitor] 降级模式中，已持续 {time.time() - degrade['since']:.0f}s，"
+                 f"累计切换 {degrade['switches']} 次")
+    info += "\n\n[Monitor] 各会话排队情况\n"
+    controllers = get_controllers()
+    for name, (size, stats) in queues.items():
+        info += f"\n[{name}] 当前排队 {size}"
+        if name in controllers:
+            admission = controllers[name].get_stats()
+            info += (f"，处理中 {admission['busy']}，预计积压 {admission['backlog']:.0f}s，"
+                     f"接收 {admission['admitted']}")
+            if 'p95' in admission['latency']:
+                info += f"，近期响应 p95 {admission['latency']['p95']:.1f}s"
+            if len(admission['rejected']) > 0:
+                info += "，拒绝 " + ', '.join(f"{reason}×{count}" for reason, count in admission['rejected'].items())
+        # 按 p95 等待时间从长到短排序，便于确认是否有会话被饿死
+        for conversation, wait in sorted(stats.items(), key=lambda x: -x[1]['p95']):
+            info += (f"\n{conversation} 请求 {wait['count']}，"
+                     f"等待 p50 {_format_ms(wait, 'p50')} / p95 {_format_ms(wait, 'p95')} / max {_format_ms(wait, 'max')}")
+        info += "\n"
+
+    message.reply(info.rstrip(), modal_words=False)
+
+
+@command(tokens=["缓存", "cache"], permission_level=PermissionLevel.ADMIN)
+def reply_cache_stats(message: RobotMessage):
+    if len(message.tokens) >= 2 and message.tokens[1] == "clear":
+        if len(message.tokens) == 2:
+            message.reply(f"[Monitor] 已清除全部 {reply_cache.invalidate()} 条指令缓存", modal_words=False)
+            return
+        token = message.tokens[2] if message.tokens[2].startswith('/') else f"/{message.tokens[2]}"
+        if token not in __commands__:
+            message.reply(f"[Monitor] 指令 {token} 不存在", modal_words=False)
+            return
+        count = reply_cache.invalidate(__commands__[token][0].__name__)
+        message.reply(f"[Monitor] 已清除 {token} 的 {count} 条指令缓存", modal_words=False)
+        return
+
+    fetch_stats = response_cache.get_stats()
+    info = (f"[Monitor] 缓存情况\n\n"
+            f"[Fetch] 条目 {fetch_stats['entries']}，占用 {fetch_stats['bytes'] / 1024 / 1024:.1f}MB")
+    for name, stats in sorted(reply_cache.get_stats().items(), key=lambda x: -x[1]['hits']):
+        total = stats['hits'] + stats['misses']
+        hit_rate = f"{stats['hits'] / total * 100:.0f}%" if total > 0 else "-"
+        info += f"\n[{name}] 条目 {stats['entries']}，命中 {stats['hits']}/{total} ({hit_rate})"
+    info += "\n\n使用 /cache clear [指令] 清除指令缓存"
+
+    message.reply(info, modal_words=False)
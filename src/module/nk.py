@@ -1,7 +1,7 @@
 import re
 import traceback
 
-from src.core.command import command
+from src.core.command import command, cache_subcommands
 from src.core.constants import Constants
 from src.core.output_cached import get_cached_prefix
 from src.core.tools import check_is_int, png2jpg
@@ -29,6 +29,7 @@ def send_user_id_card(message: RobotMessage, handle: str):
         cached_prefix = get_cached_prefix('Platform-ID')
         id_card.write_file(f"{cached_prefix}.png")
         message.reply(f"[NowCoder] {handle}", png2jpg(f"{cached_prefix}.png"), modal_words=False)
+        message.mark_cacheable()
 
 
 def send_user_info(message: RobotMessage, handle: str):
@@ -44,6 +45,8 @@ def send_user_info(message: RobotMessage, handle: str):
         content = (f"[NowCoder] {handle}\n\n"
                    f"{info}\n\n"
                    f"{last_contest}")
+        if last_contest not in ("查询异常", "用户不存在"):  # 查询失败的回复不缓存
+            message.mark_cacheable()
 
     message.reply(content, img_url=avatar, modal_words=False)
 
@@ -59,7 +62,8 @@ def send_contest(message: RobotMessage):
     message.reply(content, modal_words=False)
 
 
-@command(tokens=['nk', 'nc', 'nowcoder'])
+@command(tokens=['nk', 'nc', 'nowcoder'], coalesce=True,
+         cache_ttl=5 * 60, cache_key=cache_subcommands('identity', 'id', 'card', 'info', 'user'))
 def reply_nk_request(message: RobotMessage):
     try:
         content = re.sub(r'<@!\d+>', '', message.content).strip().split()
@@ -5,7 +5,7 @@ import os
 from botpy import Client
 from thefuzz import process
 
-from src.core.command import command
+from src.core.command import command, CommandLane
 from src.core.constants import Constants
 from src.core.exception import ModuleRuntimeError
 from src.core.output_cached import get_cached_prefix
@@ -15,11 +15,13 @@ from src.module.cf import __cf_version__
 from src.module.color_rand import __color_rand_version__
 from src.module.contest_manual import __contest_list_renderer_version__
 from src.module.message import RobotMessage
+from src.module.monitor import __monitor_version__
 from src.module.nk import __nk_version__
 from src.module.pick_one import __pick_one_version__
 from src.module.rand import __rand_version__
 
 _lib_path = os.path.join(Constants.config["lib_path"], "Peeper-Board-Generator")
+_lib_timeout = Constants.config.get('lib_command_timeout', 300)  # 生成榜单耗时较长，单独设置处理时限
 
 
 def register_module():
@@ -126,7 +128,8 @@ def send_user_info(message: RobotMessage, content: str, by_name: bool = False):
         message.reply(f"[{type_id.capitalize()} {content}]\n\n{result}", modal_words=False)
 
 
-@command(tokens=['评测榜单', 'verdict'], need_check_exclude=True)
+@command(tokens=['评测榜单', 'verdict'], need_check_exclude=True, timeout=_lib_timeout,
+         lane=CommandLane.CPU, priority=2)
 def send_now_board_with_verdict(message: RobotMessage):
     content = message.tokens[1] if len(message.tokens) == 2 else ""
     single_col = (message.tokens[2] == "single") if len(
@@ -148,7 +151,8 @@ def send_now_board_with_verdict(message: RobotMessage):
     message.reply(f"今日 {verdict} 榜单", png2jpg(f"{cached_prefix}.png"))
 
 
-@command(tokens=['今日题数', 'today'], need_check_exclude=True)
+@command(tokens=['今日题数', 'today'], need_check_exclude=True, timeout=_lib_timeout,
+         lane=CommandLane.CPU, priority=2)
 def send_today_board(message: RobotMessage):
     single_col = (message.tokens[1] == "single") \
         if len(message.tokens) == 2 else False
@@ -163,7 +167,8 @@ def send_today_board(message: RobotMessage):
     message.reply("今日题数", png2jpg(f"{cached_prefix}.png"))
 
 
-@command(tokens=['昨日总榜', 'yesterday', 'full'], need_check_exclude=True)
+@command(tokens=['昨日总榜', 'yesterday', 'full'], need_check_exclude=True, timeout=_lib_timeout,
+         lane=CommandLane.CPU, priority=2)
 def send_yesterday_board(message: RobotMessage):
     single_col = (message.tokens[1] == "single") \
         if len(message.tokens) == 2 else False
@@ -178,7 +183,7 @@ def send_yesterday_board(message: RobotMessage):
     message.reply("昨日卷王天梯榜", png2jpg(f"{cached_prefix}.png"))
 
 
-@command(tokens=['api'])
+@command(tokens=['api'], timeout=_lib_timeout, lane=CommandLane.CPU, priority=2, cache_ttl=10 * 60)
 def send_version_info(message: RobotMessage):
     message.reply(f"正在查询各模块版本，请稍等")
 
@@ -189,19 +194,22 @@ def send_version_info(message: RobotMessage):
 
     with open(f"{cached_prefix}.txt", encoding="utf-8") as f:
         result = f.read()
+        message.mark_cacheable()
         message.reply(f"[API Version]\n\n"
                       f"Core {Constants.core_version}\n"
                       f"AtCoder {__atc_version__}\n"
                       f"Codeforces {__cf_version__}\n"
                       f"Color-Rand {__color_rand_version__}\n"
                       f"Contest-List-Renderer {__contest_list_renderer_version__}\n"
+                      f"Monitor {__monitor_version__}\n"
                       f"NowCoder {__nk_version__}\n"
                       f"{result}\n"
                       f"Pick-One {__pick_one_version__}\n"
                       f"Random {__rand_version__}", modal_words=False)
 
 
-@command(tokens=['user'], need_check_exclude=True)
+@command(tokens=['user'], need_check_exclude=True, timeout=_lib_timeout,
+         lane=CommandLane.CPU, priority=2)
 def oj_user(message: RobotMessage):
     content = message.tokens
     if len(content) < 3:
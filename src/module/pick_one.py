@@ -2,17 +2,21 @@ import json
 import os
 import random
 import secrets
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from tempfile import SpooledTemporaryFile
 
 import easyocr
 from thefuzz import process
 
-from src.core.command import command, PermissionLevel
+from src.core.command import command, PermissionLevel, CommandLane
 from src.core.constants import Constants
-from src.core.tools import save_img, rand_str_len32, get_md5, read_image_with_opencv, check_is_int
+from src.core.tools import download_img, write_buffer_once, read_image_with_opencv, check_is_int
 from src.module.message import RobotMessage
 
 _lib_path = os.path.join(Constants.config["lib_path"], "Pick-One")
-__pick_one_version__ = "v3.0.3"
+__pick_one_version__ = "v3.1.0"
+_max_download_workers = 4
 
 _lib_config, _match_dict, _ids = {}, {}, []
 
@@ -109,7 +113,7 @@ _what_dict = {
 }
 
 
-@command(tokens=["来只*"] + list(_what_dict.keys()))
+@command(tokens=["来只*"] + list(_what_dict.keys()), lane=CommandLane.CPU)
 def pick_one(message: RobotMessage):
     load_pick_one_config()
 
@@ -182,7 +186,15 @@ def pick_one(message: RobotMessage):
         message.reply(f"来了一只{query_tag}{current_config['_id']}{query_more_tip}", img_path=os.path.join(dir_path, picked))
 
 
-@command(tokens=["添加来只*", "添加*"])
+def _try_download_img(url: str) -> tuple[str, SpooledTemporaryFile] | None:
+    try:
+        return download_img(url)
+    except Exception as e:
+        Constants.log.warn(f"Download image failed: {e}")
+        return None
+
+
+@command(tokens=["添加来只*", "添加*"], lane=CommandLane.CPU, priority=1)
 def save_one(message: RobotMessage):
     load_pick_one_config()
 
@@ -198,24 +210,25 @@ def save_one(message: RobotMessage):
         dir_path = _get_img_dir_path(current_key, need_audit)
         real_dir_path = _get_img_dir_path(current_key, audit=False)
         cnt, ok, duplicate = len(message.attachments), 0, 0
-
-        for attach in message.attachments:
-            if not attach.__dict__['content_type'].startswith('image'):
-                continue  # 不是图片
-
-            file_path = os.path.join(dir_path, f"{rand_str_len32()}.gif")
-            response = save_img(attach.__dict__['url'], file_path)
-
-            if response:
-                md5 = get_md5(file_path)
-
-                if (os.path.exists(os.path.join(real_dir_path, f"{md5}.gif")) or
-                        os.path.exists(os.path.join(dir_path, f"{md5}.gif"))):
-                    os.remove(file_path)
+        img_urls = [attach.__dict__['url'] for attach in message.attachments
+                    if attach.__dict__['content_type'].startswith('image')]  # 跳过不是图片的附件
+
+        downloaded = []
+        if len(img_urls) > 0:  # 同一条消息中的多张图片并发下载
+            with ThreadPoolExecutor(max_workers=min(len(img_urls), _max_download_workers)) as executor:
+                futures = [executor.submit(copy_context().run, _try_download_img, url)  # 传递指令的截止时间
+                           for url in img_urls]
+                downloaded = [future.result() for future in futures]
+
+        for result in downloaded:
+            if result is None:
+                continue
+
+            md5, buffer = result
+            with buffer:  # 下载时已计算 md5，重复的图片不会写入磁盘
+                if not write_buffer_once(buffer, f"{md5}.gif", dir_path, [real_dir_path]):
                     duplicate += 1  # 图片重复
                     continue
-
-                os.rename(file_path, os.path.join(dir_path, f"{md5}.gif"))
                 ok += 1
 
         if cnt == 0:
@@ -238,7 +251,8 @@ def save_one(message: RobotMessage):
         message.reply(img_help)
 
 
-@command(tokens=["审核来只", "同意来只", "accept", "audit"], permission_level=PermissionLevel.MOD)
+@command(tokens=["审核来只", "同意来只", "accept", "audit"], permission_level=PermissionLevel.MOD,
+         lane=CommandLane.CPU, priority=1)
 def audit_accept(message: RobotMessage):
     load_pick_one_config()
 
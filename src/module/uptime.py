@@ -10,7 +10,7 @@ def register_module():
     pass
 
 
-@command(tokens=['alive'])
+@command(tokens=['alive'], cache_ttl=60)
 def alive(message: RobotMessage):
     message.reply("正在查询服务状态，请稍等")
     data = fetch_url_json("https://api.uptimerobot.com/v2/getMonitors",
@@ -48,4 +48,5 @@ def alive(message: RobotMessage):
         status_text = "正常" if checker_results[i] == 1 else "异常"
         info += f"\n[{checker_names[i]}] {status_text}"
 
+    message.mark_cacheable()
     message.reply(info, modal_words=False)
@@ -1,4 +1,5 @@
 import abc
+import asyncio
 import time
 from abc import abstractmethod
 from dataclasses import dataclass
@@ -7,6 +8,8 @@ from enum import Enum
 
 import pixie
 
+from src.core.exception import CircuitOpenError
+from src.core.host_health import host_health
 from src.core.tools import format_timestamp_diff, format_seconds, format_timestamp, check_intersect, \
     get_a_month_timestamp_range
 
@@ -74,6 +77,33 @@ class DynamicContest(Contest):
 class CompetitivePlatform(abc.ABC):
     platform_name: str
     rks_color: dict[str, str]
+    hosts: list[str] = []  # 平台依赖的 host，用于判断是否处于熔断状态
+    _last_contest_list: dict[str, tuple[list[Contest], list[Contest], list[Contest]]] = {}
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """平台依赖的 host 均未熔断"""
+        return not any(host_health.is_open(host) for host in cls.hosts)
+
+    @classmethod
+    def check_available(cls):
+        """平台熔断时不再发起注定失败的请求，直接抛出 CircuitOpenError 以使用兜底结果"""
+        if not cls.is_available():
+            raise CircuitOpenError(f"Circuit of {cls.platform_name} is open.")
+
+    @classmethod
+    def _fallback_contest_list(cls, contests: tuple[list[Contest], list[Contest], list[Contest]] | None,
+                               error: Exception | None = None) \
+            -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+        """记录最近一次成功的比赛列表，平台不可用时以其兜底"""
+        if contests is not None:
+            cls._last_contest_list[cls.platform_name] = contests
+            return contests
+        if cls.platform_name in cls._last_contest_list:
+            return cls._last_contest_list[cls.platform_name]
+        if error is not None:
+            raise error
+        return None
 
     @classmethod
     @abstractmethod
@@ -93,10 +123,19 @@ class CompetitivePlatform(abc.ABC):
         其中，已结束的比赛为 上一个已结束的比赛 与 当天所有已结束的比赛 的并集
         :return: tuple[正在进行的比赛, 待举行的比赛，已结束的比赛] | None
         """
-        contests = cls._get_contest_list()
+        try:
+            cls.check_available()
+            contests = cls._fallback_contest_list(cls._get_contest_list())
+        except CircuitOpenError as e:
+            contests = cls._fallback_contest_list(None, e)
         if contests is None:
             return None
 
+        return cls._filter_contest_list(contests)
+
+    @classmethod
+    def _filter_contest_list(cls, contests: tuple[list[Contest], list[Contest], list[Contest]]) \
+            -> tuple[list[Contest], list[Contest], list[Contest]]:
         running_full_contests, upcoming_full_contests, finished_full_contests = contests
         running_contests = [contest for contest in running_full_contests
                             if check_intersect((contest.start_time, contest.start_time + contest.duration),
@@ -108,14 +147,49 @@ class CompetitivePlatform(abc.ABC):
 
         return running_contests, upcoming_contests, finished_contests
 
+    @classmethod
+    async def _async_get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+        """
+        可被重载。
+        _get_contest_list 的协程版本，默认在线程中执行同步版本，需要并发抓取的平台应重载本方法
+        :return: tuple[正在进行的比赛, 待举行的比赛，已结束的比赛] | None
+        """
+        return await asyncio.to_thread(cls._get_contest_list)
+
+    @classmethod
+    async def async_get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+        """
+        get_contest_list 的协程版本，便于多个平台在同一事件循环上并发查询
+        :return: tuple[正在进行的比赛, 待举行的比赛，已结束的比赛] | None
+        """
+        try:
+            cls.check_available()
+            contests = cls._fallback_contest_list(await cls._async_get_contest_list())
+        except CircuitOpenError as e:
+            contests = cls._fallback_contest_list(None, e)
+        if contests is None:
+            return None
+
+        return cls._filter_contest_list(contests)
+
     @classmethod
     def get_recent_contests(cls) -> str:
         """
         指定平台待举行的比赛以及上一个已结束的比赛
         :return: 格式化后的相关信息
         """
-        contest_list = cls.get_contest_list()
+        return cls._format_recent_contests(cls.get_contest_list())
 
+    @classmethod
+    async def async_get_recent_contests(cls) -> str:
+        """
+        get_recent_contests 的协程版本
+        :return: 格式化后的相关信息
+        """
+        return cls._format_recent_contests(await cls.async_get_contest_list())
+
+    @classmethod
+    def _format_recent_contests(cls, contest_list: tuple[list[Contest], list[Contest], list[Contest]] | None) -> str:
         if contest_list is None:
             return "查询异常"
 
@@ -151,6 +225,15 @@ class CompetitivePlatform(abc.ABC):
         """
         pass
 
+    @classmethod
+    async def async_get_user_id_card(cls, handle: str) -> pixie.Image | str:
+        """
+        可被重载。
+        get_user_id_card 的协程版本，默认在线程中执行同步版本
+        :return: 绘制完成的图片对象 | 错误信息
+        """
+        return await asyncio.to_thread(cls.get_user_id_card, handle)
+
     @classmethod
     @abstractmethod
     def get_user_info(cls, handle: str) -> tuple[str, str | None]:
@@ -159,3 +242,12 @@ class CompetitivePlatform(abc.ABC):
         :return: tuple[信息, 头像url | None]
         """
         pass
+
+    @classmethod
+    async def async_get_user_info(cls, handle: str) -> tuple[str, str | None]:
+        """
+        可被重载。
+        get_user_info 的协程版本，默认在线程中执行同步版本
+        :return: tuple[信息, 头像url | None]
+        """
+        return await asyncio.to_thread(cls.get_user_info, handle)
@@ -14,6 +14,7 @@ from src.render.render_user_card import UserCardRenderer
 
 class AtCoder(CompetitivePlatform):
     platform_name = "AtCoder"
+    hosts = ["atcoder.jp"]
     rks_color = {
         '10 Kyu': '#808080', '9 Kyu': '#808080',
         '8 Kyu': '#804000', '7 Kyu': '#804000',
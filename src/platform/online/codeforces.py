@@ -1,19 +1,32 @@
-import random
 import re
+import threading
 import time
 
 import pixie
 from thefuzz import process
 
+from src.core.constants import Constants
+from src.core.json_stream import Projector, pick, drop
+from src.core.rate_limit import TokenBucketScheduler
 from src.core.tools import fetch_url_json, format_timestamp, get_week_start_timestamp, get_today_start_timestamp, \
-    format_timestamp_diff, format_seconds, format_int_delta, decode_range, check_intersect, get_today_timestamp_range
+    format_timestamp_diff, format_seconds, format_int_delta, decode_range, check_intersect, get_today_timestamp_range, \
+    async_fetch_url_json
 from src.lib.cf_rating_calc import PredictResult, Contestant, predict
 from src.platform.model import CompetitivePlatform, Contest
+from src.platform.online.codeforces_predict import ContestPredictCache, PredictOutcome
+from src.platform.online.codeforces_problemset import ProblemsetIndex
 from src.render.render_user_card import UserCardRenderer
 
+_api_interval = Constants.config.get('cf_api_interval', 2)
+_call_limit_retries = 3
+_problemset_refresh = Constants.config.get('cf_problemset_refresh', 60 * 60)
+_problemset_retry = Constants.config.get('cf_problemset_retry', 60)
+_predict_refresh = Constants.config.get('cf_predict_refresh', 60)
+
 
 class Codeforces(CompetitivePlatform):
     platform_name = "Codeforces"
+    hosts = ["codeforces.com"]
     logo_url = "https://codeforces.org/s/24321/images/codeforces-sponsored-by-ton.png"
     rated_rks = {
         (-float('inf'), 1200): 'N',  # Newbie
@@ -28,6 +41,16 @@ class Codeforces(CompetitivePlatform):
         (3000, 4000): 'LGM',  # Legendary Grandmaster
         (4000, float('inf')): 'T'  # The Ones Who Reach 4000
     }
+    _api_limiter = TokenBucketScheduler(rate=1 / _api_interval)  # 官方限制为每 2 秒 1 次调用
+    _problemset_stream = {  # 题库只保留选题用到的字段
+        'result.problems': pick('contestId', 'index', 'name', 'tags', 'rating'),
+        'result.problemStatistics': drop
+    }
+    _problemset_index: ProblemsetIndex | None = None
+    _problemset_updated = 0.0
+    _problemset_failed = -float('inf')  # 上一次刷新失败的时间，失败后等待一段时间再重试
+    _problemset_lock = threading.Lock()
+    _predict_cache = ContestPredictCache(_predict_refresh)
     rks_color = {
         'N': '#808080',
         'P': '#008000',
@@ -43,14 +66,16 @@ class Codeforces(CompetitivePlatform):
     }
 
     @classmethod
-    def _api(cls, api: str, **kwargs) -> dict | int:
+    def _api_url(cls, api: str, **kwargs) -> str:
         """传递参数构造payload，添加首尾下划线可避免与关键词冲突"""
         url = f"https://codeforces.com/api/{api}"
         if len(kwargs) > 0:
             payload = '&'.join([f'{key.strip("_")}={val}' for key, val in kwargs.items()])
             url += f"?{payload}"
-        json_data = fetch_url_json(url, throw=False)
+        return url
 
+    @classmethod
+    def _unpack_api_result(cls, json_data: dict | int) -> dict | int:
         if isinstance(json_data, int) or json_data['status'] != "OK":
             if isinstance(json_data, int) and json_data != 400:
                 return -1
@@ -58,6 +83,46 @@ class Codeforces(CompetitivePlatform):
 
         return json_data['result']
 
+    @classmethod
+    def _is_call_limit_exceeded(cls, json_data: dict | int) -> bool:
+        return (isinstance(json_data, dict) and json_data.get('status') == "FAILED" and
+                "Call limit exceeded" in json_data.get('comment', ""))
+
+    @classmethod
+    def _api(cls, api: str, stream: dict[str, Projector] | None = None, **kwargs) -> dict | int:
+        """传递参数构造payload，添加首尾下划线可避免与关键词冲突，stream 用于大体积结果的投影解析"""
+        json_data = fetch_url_json(cls._api_url(api, **kwargs), throw=False, limiter=cls._api_limiter, stream=stream)
+        for _ in range(_call_limit_retries):
+            if not cls._is_call_limit_exceeded(json_data):
+                break
+            Constants.log.warn(f"Codeforces call limit exceeded, {api} queued again.")
+            cls._api_limiter.penalize(_api_interval)
+            json_data = fetch_url_json(cls._api_url(api, **kwargs), throw=False, limiter=cls._api_limiter,
+                                       stream=stream)
+        return cls._unpack_api_result(json_data)
+
+    @classmethod
+    async def _async_api(cls, api: str, stream: dict[str, Projector] | None = None, **kwargs) -> dict | int:
+        """_api 的协程版本"""
+        json_data = await async_fetch_url_json(cls._api_url(api, **kwargs), throw=False, limiter=cls._api_limiter,
+                                               stream=stream)
+        for _ in range(_call_limit_retries):
+            if not cls._is_call_limit_exceeded(json_data):
+                break
+            Constants.log.warn(f"Codeforces call limit exceeded, {api} queued again.")
+            cls._api_limiter.penalize(_api_interval)
+            json_data = await async_fetch_url_json(cls._api_url(api, **kwargs), throw=False,
+                                                   limiter=cls._api_limiter, stream=stream)
+        return cls._unpack_api_result(json_data)
+
+    @classmethod
+    def estimate_api_wait(cls) -> int:
+        """
+        估计新的 api 调用因其他指令的调用而需要排队的时间，不计入本次指令自身的后续调用
+        :return: 秒数
+        """
+        return int(cls._api_limiter.estimate_wait())
+
     @classmethod
     def _format_verdict(cls, verdict: str, passed_count: int) -> str:
         verdict = verdict.replace("_", " ").capitalize()
@@ -195,13 +260,23 @@ class Codeforces(CompetitivePlatform):
                                   / (60 * 60 * 24))
         return days_since_contest_end > 3  # RATING_PENDING_MAX_DAYS
 
+    @classmethod
+    def _project_standings_row(cls, row: dict) -> dict:
+        """榜单行只保留 rating 预测用到的字段，丢弃体积最大的 problemResults"""
+        party = {'members': [{'handle': row['party']['members'][0]['handle']}]}
+        if 'teamId' in row['party']:
+            party['teamId'] = row['party']['teamId']
+        return {'party': party, 'points': row['points'], 'penalty': row['penalty'],
+                **({'teamId': row['teamId']} if 'teamId' in row else {})}
+
     @classmethod
     def _get_predicted_prefs(cls, standings: dict) -> dict[str, PredictResult] | None:
         """
         Adapted from carrot at
         https://github.com/meooow25/carrot/blob/master/carrot/src/background/cache/contests-complete.js
         """
-        ratings = cls._api('user.ratedList', activeOnly=False, contestId=standings['contest']['id'])
+        ratings = cls._api('user.ratedList', stream={'result': pick('handle', 'rating')},
+                           activeOnly=False, contestId=standings['contest']['id'])
         if isinstance(ratings, int):
             return None
         ratings = {user['handle']: user['rating'] for user in ratings}
@@ -245,8 +320,10 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def _fetch_contest_list_all(cls) -> list[dict] | None:
-        contest_list = cls._api('contest.list')
+        return cls._unpack_contest_list(cls._api('contest.list'))
 
+    @classmethod
+    def _unpack_contest_list(cls, contest_list: list[dict] | int) -> list[dict] | None:
         if isinstance(contest_list, int):
             return None
 
@@ -258,31 +335,40 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def _fetch_contest_predict(cls, contest_id: str) -> dict[str, PredictResult] | int:
+        """
+        整场比赛的预测按比赛缓存，同一场比赛其他用户的查询直接使用缓存的结果
+        """
+        return cls._predict_cache.get(contest_id, cls._calc_contest_predict)
+
+    @classmethod
+    def _calc_contest_predict(cls, contest_id: str) -> tuple[PredictOutcome, bool]:
         """
         Adapted from carrot at
         https://github.com/meooow25/carrot/blob/master/carrot/src/background/cache/contests-complete.js
         and
         https://github.com/meooow25/carrot/blob/master/carrot/src/background/background.js
+        :return: tuple[预测结果 | 状态码, 结果是否不再变化]
         """
-        standings = cls._api('contest.standings', contestId=contest_id, showUnofficial=False)
+        standings = cls._api('contest.standings', stream={'result.rows': cls._project_standings_row},
+                             contestId=contest_id, showUnofficial=False)
 
         if standings == -1:
-            return -1
+            return -1, False
         if standings == 0:
-            return 0
+            return 0, False
 
         rated, old_ratings = None, None
 
         if standings['contest']['phase'] == 'FINISHED':
             rating_changes = cls._api('contest.ratingChanges', contestId=contest_id)
             if rating_changes == -1:
-                return -2
+                return -2, False
             if rating_changes == 0:
                 rated = False
             else:
                 rating_changes = list(rating_changes)
                 if len(rating_changes) == 0:
-                    return -2
+                    return -2, False
                 rated = True
                 old_ratings = cls._adjust_old_ratings(int(contest_id), rating_changes)
 
@@ -293,25 +379,25 @@ class Codeforces(CompetitivePlatform):
 
         if contest_finished:
             if not rated:
-                return 1
+                return 1, True
 
             # We can ensure that old_ratings is not None
             result = cls._get_final_prefs(standings, old_ratings)
             if result is None:
-                return -3
-            return result
+                return -3, False
+            return result, True
 
         if (standings['contest']['name'].lower()
                 in ['unrated', 'fools', 'q#', 'kotlin', 'marathon', 'teams']):  # UNRATED_HINTS
-            return 1
+            return 1, True
 
         if any('teamId' in standing for standing in standings['rows']):
-            return 1
+            return 1, True
 
         result = cls._get_predicted_prefs(standings)
         if result is None:
-            return -3
-        return result
+            return -3, False
+        return result, False
 
     @classmethod
     def _format_social_info(cls, info: dict, i18n: tuple[str, str] = ("来自", "地球")) -> list[str]:
@@ -336,8 +422,15 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def _get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
-        contest_list = cls._fetch_contest_list_all()
+        return cls._pack_contest_list(cls._fetch_contest_list_all())
+
+    @classmethod
+    async def _async_get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+        return cls._pack_contest_list(cls._unpack_contest_list(await cls._async_api('contest.list')))
 
+    @classmethod
+    def _pack_contest_list(cls, contest_list: list[dict] | None) \
+            -> tuple[list[Contest], list[Contest], list[Contest]] | None:
         if contest_list is None:
             return None
 
@@ -370,22 +463,36 @@ class Codeforces(CompetitivePlatform):
         return running_contests, upcoming_contests, finished_contests
 
     @classmethod
-    def get_prob_tags_all(cls) -> list[str] | None:
-        problems = cls._api('problemset.problems')
-        if isinstance(problems, int):
-            return None
+    def get_problemset_index(cls) -> ProblemsetIndex | None:
+        """
+        获取题库索引，超过刷新间隔后重新构建，刷新失败时继续使用旧的索引，并在重试间隔内不再重新获取
+        :return: 题库索引 | None
+        """
+        with cls._problemset_lock:
+            now = time.time()
+            if ((cls._problemset_index is None or now - cls._problemset_updated >= _problemset_refresh) and
+                    now - cls._problemset_failed >= _problemset_retry):
+                problems = cls._api('problemset.problems', stream=cls._problemset_stream)
+                if isinstance(problems, int):
+                    cls._problemset_failed = time.time()
+                    return cls._problemset_index
+                cls._problemset_index = ProblemsetIndex(problems['problems'])
+                cls._problemset_updated = time.time()
+            return cls._problemset_index
 
-        tags = []
-        for problem in problems['problems']:
-            for tag in problem['tags']:
-                tags.append(tag.replace(" ", "-"))
-        tags = list(set(tags))
-        return tags
+    @classmethod
+    def get_prob_tags_all(cls) -> list[str] | None:
+        index = cls.get_problemset_index()
+        return index.tags if index is not None else None
 
     @classmethod
     def get_prob_filtered(cls, tag_needed: str, limit: str = None, newer: bool = False,
                                 on_tag_chosen=None) -> dict | int:
-        min_point, max_point = 0, 0
+        """
+        随机选题，tag_needed 可用 , 连接多个标签表示同时包含，标签前加 ! 表示不包含，如 dp,greedy,!math
+        :return: 题目 | 0 表示没有满足条件的题 | 负数表示参数错误
+        """
+        min_point, max_point = None, None
         if limit is not None:
             min_point, max_point = decode_range(limit, length=(3, 4))
             if min_point == -2:
@@ -393,32 +500,29 @@ class Codeforces(CompetitivePlatform):
             elif min_point == -3:
                 return 0
 
-        if tag_needed == "all":
-            problems = cls._api('problemset.problems')
-        else:
-            all_tags = cls.get_prob_tags_all()
-            if all_tags is None:
-                return -2
-            if tag_needed not in all_tags:  # 模糊匹配
-                closet_tag = process.extract(tag_needed, all_tags, limit=1)[0]
+        index = cls.get_problemset_index()
+        if index is None:
+            return -1
+
+        include_tags, exclude_tags = [], []
+        for tag in tag_needed.split(','):
+            exclude = tag.startswith('!')
+            tag = tag[1:] if exclude else tag
+            if len(tag) == 0:
+                return -1
+            if tag == "all" and not exclude:
+                continue
+            if tag not in index.tags:  # 模糊匹配
+                closet_tag = process.extract(tag, index.tags, limit=1)[0]
                 if closet_tag[1] < 60:
                     return -3
-                tag_needed = closet_tag[0]
+                tag = closet_tag[0]
                 if on_tag_chosen is not None:
-                    on_tag_chosen(f"标签最佳匹配: {tag_needed}")
-            problems = cls._api('problemset.problems', tags=tag_needed.replace("-", " "))
-
-        if isinstance(problems, int) or len(problems) == 0:
-            return -1
-
-        filtered_data = problems['problems']
-        if limit is not None:
-            filtered_data = [prob for prob in problems['problems']
-                             if 'rating' in prob and min_point <= prob['rating'] <= max_point]
-        if newer:
-            filtered_data = [prob for prob in filtered_data if prob['contestId'] >= 1000]
+                    on_tag_chosen(f"标签最佳匹配: {tag}")
+            (exclude_tags if exclude else include_tags).append(tag)
 
-        return random.choice(filtered_data) if len(filtered_data) > 0 else 0
+        chosen = index.pick(include_tags, exclude_tags, min_point, max_point, newer)
+        return chosen if chosen is not None else 0
 
     @classmethod
     def get_user_rank(cls, handle: str) -> str | None:
@@ -461,8 +565,14 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def get_user_info(cls, handle: str) -> tuple[str, str | None]:
-        info = cls._api('user.info', handles=handle)
+        return cls._format_user_info(cls._api('user.info', handles=handle))
+
+    @classmethod
+    async def async_get_user_info(cls, handle: str) -> tuple[str, str | None]:
+        return cls._format_user_info(await cls._async_api('user.info', handles=handle))
 
+    @classmethod
+    def _format_user_info(cls, info: list[dict] | int) -> tuple[str, str | None]:
         if info == -1:
             return "查询异常", None
         if info == 0 or len(info) == 0:
@@ -490,8 +600,14 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def get_user_last_contest(cls, handle: str) -> str:
-        rating = cls._api('user.rating', handle=handle)
+        return cls._format_last_contest(cls._api('user.rating', handle=handle))
 
+    @classmethod
+    async def async_get_user_last_contest(cls, handle: str) -> str:
+        return cls._format_last_contest(await cls._async_api('user.rating', handle=handle))
+
+    @classmethod
+    def _format_last_contest(cls, rating: list[dict] | int) -> str:
         if rating == -1:
             return "查询异常"
         if rating == 0:
@@ -513,8 +629,15 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def get_user_last_submit(cls, handle: str, count: int = 5) -> str:
-        status = cls._api('user.status', handle=handle, _from_=1, count=count)
+        return cls._format_last_submit(cls._api('user.status', handle=handle, _from_=1, count=count), count)
 
+    @classmethod
+    async def async_get_user_last_submit(cls, handle: str, count: int = 5) -> str:
+        return cls._format_last_submit(await cls._async_api('user.status', handle=handle, _from_=1, count=count),
+                                       count)
+
+    @classmethod
+    def _format_last_submit(cls, status: list[dict] | int, count: int) -> str:
         if status == -1:
             return "查询异常"
         if status == 0:
@@ -538,8 +661,14 @@ class Codeforces(CompetitivePlatform):
 
     @classmethod
     def get_user_submit_counts(cls, handle: str) -> tuple[int, int, int]:
-        status = cls._api('user.status', handle=handle)
+        return cls._count_submits(cls._api('user.status', handle=handle))
 
+    @classmethod
+    async def async_get_user_submit_counts(cls, handle: str) -> tuple[int, int, int]:
+        return cls._count_submits(await cls._async_api('user.status', handle=handle))
+
+    @classmethod
+    def _count_submits(cls, status: list[dict] | int) -> tuple[int, int, int]:
         if isinstance(status, int):
             return -1, -1, -1
 
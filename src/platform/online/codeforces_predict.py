@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from src.lib.cf_rating_calc import PredictResult
+
+PredictOutcome = dict[str, PredictResult] | int
+
+
+class _ContestEntry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = 0.0  # 计算所用榜单的获取时间
+        self.result: PredictOutcome | None = None
+        self.final = False  # 比赛已结束，结果不再变化
+
+
+class ContestPredictCache:
+    """
+    按比赛缓存整场的 rating 预测，同一场比赛不同用户的查询共用一次计算
+    比赛进行中的结果超过刷新间隔后基于新的榜单重新计算，同一场比赛的并发查询只计算一次
+    """
+
+    def __init__(self, refresh: float, max_contests: int = 8, clock: Callable[[], float] = time.time):
+        self._refresh = refresh
+        self._clock = clock
+        self._max_contests = max_contests
+        self._entries: OrderedDict[str, _ContestEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits, self.misses = 0, 0
+
+    def _get_entry(self, contest_id: str) -> _ContestEntry:
+        with self._lock:
+            entry = self._entries.get(contest_id)
+            if entry is None:
+                entry = self._entries[contest_id] = _ContestEntry()
+            self._entries.move_to_end(contest_id)
+            while len(self._entries) > self._max_contests:
+                self._entries.popitem(last=False)
+            return entry
+
+    def get(self, contest_id: str, compute: Callable[[str], tuple[PredictOutcome, bool]]) -> PredictOutcome:
+        """
+        :param compute: 计算整场预测，返回 tuple[预测结果 | 状态码, 比赛是否已结束]，负的状态码表示获取失败
+        :return: 预测结果 | 状态码，刷新失败时返回上一次的结果
+        """
+        entry = self._get_entry(contest_id)
+        with entry.lock:
+            if entry.result is not None and (entry.final or self._clock() - entry.snapshot < self._refresh):
+                self.hits += 1
+                return entry.result
+            self.misses += 1
+            snapshot = self._clock()
+            result, final = compute(contest_id)
+            if isinstance(result, int) and result < 0:  # 获取失败，不缓存，下一次查询重试
+                return entry.result if entry.result is not None else result
+            entry.snapshot, entry.result, entry.final = snapshot, result, final
+            return result
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'contests': len(self._entries)}
@@ -0,0 +1,62 @@
+import bisect
+import random
+from typing import Sequence
+
+
+class ProblemsetIndex:
+    """
+    Codeforces 题库的内存索引，由一次 problemset.problems 的结果构建
+    题目按难度排序，每个标签对应题目下标的倒排表，选题时按难度区间二分后与标签集合求交
+    """
+
+    newer_contest_id = 1000  # new 参数忽略该比赛之前的题
+
+    def __init__(self, problems: list[dict]):
+        rated = sorted((prob for prob in problems if 'rating' in prob), key=lambda prob: prob['rating'])
+        self.problems = rated + [prob for prob in problems if 'rating' not in prob]  # 无难度的题排在末尾
+        self._ratings = [prob['rating'] for prob in rated]
+        self._newer = {idx for idx, prob in enumerate(self.problems)
+                       if prob.get('contestId', 0) >= self.newer_contest_id}
+        self._tag_index: dict[str, set[int]] = {}
+        for idx, prob in enumerate(self.problems):
+            for tag in prob.get('tags', []):
+                self._tag_index.setdefault(self.normalize_tag(tag), set()).add(idx)
+        self.tags = sorted(self._tag_index.keys())
+
+    @staticmethod
+    def normalize_tag(tag: str) -> str:
+        """指令中的标签不能带空格，因此以 - 代替"""
+        return tag.replace(" ", "-")
+
+    def _rating_range(self, min_rating: int | None, max_rating: int | None) -> range:
+        if min_rating is None:
+            return range(len(self.problems))
+        return range(bisect.bisect_left(self._ratings, min_rating), bisect.bisect_right(self._ratings, max_rating))
+
+    def query(self, include_tags: list[str], exclude_tags: list[str], min_rating: int | None = None,
+              max_rating: int | None = None, newer: bool = False) -> Sequence[int]:
+        """
+        :param include_tags: 需要同时包含的标签
+        :param exclude_tags: 不能包含的标签
+        :param min_rating: 难度下限，为 None 时不限制难度，否则会排除无难度的题
+        :return: 满足条件的题目下标
+        """
+        rating_range = self._rating_range(min_rating, max_rating)
+        if len(include_tags) == 0 and len(exclude_tags) == 0 and not newer:
+            return rating_range
+
+        if len(include_tags) > 0:  # 从最小的倒排表出发求交集，难度区间在最后按下标过滤
+            tag_sets = sorted((self._tag_index.get(tag, set()) for tag in include_tags), key=len)
+            candidates = tag_sets[0].intersection(*tag_sets[1:])
+        else:
+            candidates = set(rating_range)
+        if len(exclude_tags) > 0:
+            candidates = candidates.difference(*(self._tag_index.get(tag, set()) for tag in exclude_tags))
+        if newer:
+            candidates &= self._newer
+        return sorted(idx for idx in candidates if idx in rating_range)
+
+    def pick(self, include_tags: list[str], exclude_tags: list[str], min_rating: int | None = None,
+             max_rating: int | None = None, newer: bool = False) -> dict | None:
+        candidates = self.query(include_tags, exclude_tags, min_rating, max_rating, newer)
+        return self.problems[random.choice(candidates)] if len(candidates) > 0 else None
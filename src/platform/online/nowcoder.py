@@ -1,3 +1,4 @@
+import asyncio
 import re
 from datetime import datetime
 
@@ -5,13 +6,14 @@ import pixie
 from lxml.etree import Element
 
 from src.core.tools import fetch_url_element, fetch_url_json, format_int_delta, check_intersect, \
-    get_today_timestamp_range
+    get_today_timestamp_range, async_fetch_url_element
 from src.platform.model import CompetitivePlatform, Contest
 from src.render.render_user_card import UserCardRenderer
 
 
 class NowCoder(CompetitivePlatform):
     platform_name = "NowCoder"
+    hosts = ["ac.nowcoder.com"]
     rated_rks = {
         (-float('inf'), 700): '#灰',
         (700, 1100): '#紫',
@@ -178,7 +180,15 @@ class NowCoder(CompetitivePlatform):
         return social_info
 
     @classmethod
-    def _get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+    def _get_category_url(cls, category: tuple[int, int]) -> str:
+        top_category_id, category_id = category
+        return (f"https://ac.nowcoder.com/acm/contest/vip-index?"
+                f"topCategoryFilter={top_category_id}&"
+                f"categoryFilter={category_id}")
+
+    @classmethod
+    def _merge_category_contests(cls, category_htmls: list[tuple[str, Element]]) \
+            -> tuple[list[Contest], list[Contest], list[Contest]]:
         running_contests: list[Contest] = []
         upcoming_contests: list[Contest] = []
         finished_contests_today: list[Contest] = []
@@ -195,11 +205,7 @@ class NowCoder(CompetitivePlatform):
                 supplement=cls._decode_rated(contest)
             )
 
-        for category, category_name in cls.contest_category.items():
-            top_category_id, category_id = category
-            html = fetch_url_element(f"https://ac.nowcoder.com/acm/contest/vip-index?"
-                                     f"topCategoryFilter={top_category_id}&"
-                                     f"categoryFilter={category_id}")
+        for category_name, html in category_htmls:
             js_current = html.xpath("//div[@class='platform-mod js-current']//div[@class='platform-item-cont']")
             js_end = html.xpath("//div[@class='platform-mod js-end']//div[@class='platform-item-cont']")
             running_contests.extend([
@@ -223,6 +229,19 @@ class NowCoder(CompetitivePlatform):
 
         return running_contests, upcoming_contests, finished_contests
 
+    @classmethod
+    def _get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+        category_htmls = [(category_name, fetch_url_element(cls._get_category_url(category)))
+                          for category, category_name in cls.contest_category.items()]
+        return cls._merge_category_contests(category_htmls)
+
+    @classmethod
+    async def _async_get_contest_list(cls) -> tuple[list[Contest], list[Contest], list[Contest]] | None:
+        # 各分类页面互不依赖，在同一事件循环上并发抓取
+        htmls = await asyncio.gather(*[async_fetch_url_element(cls._get_category_url(category))
+                                       for category in cls.contest_category.keys()])
+        return cls._merge_category_contests(list(zip(cls.contest_category.values(), htmls)))
+
     @classmethod
     def get_user_id_card(cls, handle: str) -> pixie.Image | str:
         html = fetch_url_element(f"https://ac.nowcoder.com/acm/contest/profile/{handle}")
@@ -0,0 +1,15 @@
+import os
+import unittest
+
+from src.core.fetch_fixture import fetch_fixture, FixtureMode
+
+# 联网测试默认回放 unittest/fixtures 下的夹具，FETCH_FIXTURE_MODE=record 时联网并重新录制，off 时直接联网
+fixture_mode = FixtureMode(os.environ.get('FETCH_FIXTURE_MODE', 'replay'))
+fixture_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FixtureTestCase(unittest.TestCase):
+    """每个测试都在夹具模式下运行，夹具的来源见 make_fixtures.py"""
+
+    def setUp(self):
+        self.enterContext(fetch_fixture.use(fixture_mode, fixture_path))
@@ -0,0 +1,262 @@
+"""
+生成 unittest/fixtures 下的离线夹具，在仓库根目录执行 python unittest/make_fixtures.py
+
+这些夹具均为按各平台解析逻辑手工构造的合成数据，并非真实录制的响应：
+Codeforces 为 api 返回的 json，AtCoder、NowCoder 为只保留解析所用结构的 html 页面，Clist 为 api 返回的 json
+因此回放测试只覆盖解析逻辑，页面结构变化时需要以 FETCH_FIXTURE_MODE=record 联网运行测试并重新录制
+"""
+import json
+import os
+import random
+import sys
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.fetch_fixture import fetch_fixture, FixtureMode
+from src.lib.cf_rating_calc import Contestant, predict
+from src.platform.online.codeforces import Codeforces
+from src.platform.online.nowcoder import NowCoder
+
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+_now = 1735000000  # 2024-12-24，合成数据所在的时间点
+_json_headers = {'Content-Type': "application/json;charset=UTF-8"}
+_html_headers = {'Content-Type': "text/html;charset=UTF-8"}
+
+
+def _record_json(method: str, url: str, data):
+    fetch_fixture.record(method, url, None, 200, _json_headers, json.dumps(data, ensure_ascii=False).encode())
+
+
+def _record_html(url: str, html: str):
+    fetch_fixture.record('get', url, None, 200, _html_headers, html.encode())
+
+
+def _make_codeforces():
+    random.seed(2043)
+
+    def _ok(result):
+        return {'status': "OK", 'result': result}
+
+    contest = {'id': 2043, 'name': "Educational Codeforces Round 173 (Rated for Div. 2)", 'type': "ICPC",
+               'phase': "FINISHED", 'frozen': False, 'durationSeconds': 7200, 'startTimeSeconds': 1734964500}
+    problems = [{'contestId': 2043, 'index': idx, 'name': name, 'type': "PROGRAMMING", 'tags': tags, **extra}
+                for idx, name, tags, extra in [
+                    ("A", "Coin Transformation", ["brute force", "math"], {'rating': 800}),
+                    ("B", "Digits", ["math", "number theory"], {'rating': 1100}),
+                    ("C", "Sums on Segments", ["binary search", "dp", "greedy", "math"], {'rating': 1600}),
+                    ("D", "Problem about GCD", ["brute force", "math", "number theory"], {'rating': 1800}),
+                    ("E", "Matrix Transformation", ["bitmasks", "graphs", "implementation"], {'rating': 2300}),
+                    ("F", "Nim", ["bitmasks", "dp", "games"], {'rating': 2700}),
+                    ("G", "Problem with Queries", ["brute force", "data structures"], {'rating': 3000})]]
+
+    handles = ["FloatingOcean"] + [f"contestant_{idx:03d}" for idx in range(1, 160)]
+    ratings = {handle: max(0, int(random.gauss(1500, 350))) for handle in handles}
+    ratings["FloatingOcean"] = 1637
+    rows = []
+    for handle in handles:
+        solved = sorted(random.sample(range(7), min(7, max(0, int(random.gauss(3, 1.5))))))
+        if handle == "FloatingOcean":
+            solved = [0, 1, 2, 3]
+        results = []
+        penalty = 0
+        for idx in range(7):
+            rejected = random.randint(0, 2)
+            if idx in solved:
+                at = random.randint(300, 7000)
+                penalty += at // 60 + rejected * 10
+                results.append({'points': 1.0, 'rejectedAttemptCount': rejected, 'type': "FINAL",
+                                'bestSubmissionTimeSeconds': at})
+            else:
+                results.append({'points': 0.0, 'rejectedAttemptCount': rejected if random.random() < 0.3 else 0,
+                                'type': "FINAL"})
+        rows.append({'party': {'contestId': 2043, 'members': [{'handle': handle}], 'participantType': "CONTESTANT",
+                               'ghost': False, 'startTimeSeconds': contest['startTimeSeconds']},
+                     'points': float(len(solved)), 'penalty': penalty, 'successfulHackCount': 0,
+                     'unsuccessfulHackCount': 0, 'problemResults': results})
+    rows.sort(key=lambda row: (-row['points'], row['penalty']))
+    rank = 0
+    for idx, row in enumerate(rows):
+        if idx == 0 or (row['points'], row['penalty']) != (rows[idx - 1]['points'], rows[idx - 1]['penalty']):
+            rank = idx + 1
+        row['rank'] = rank
+
+    finished = {**contest, 'relativeTimeSeconds': _now - contest['startTimeSeconds']}
+    _record_json('post', Codeforces._api_url('contest.standings', contestId="2043", showUnofficial=False),
+                 _ok({'contest': finished, 'problems': problems, 'rows': rows}))
+
+    mine = next(row for row in rows if row['party']['members'][0]['handle'] == "FloatingOcean")
+    practice = {**mine, 'party': {**mine['party'], 'participantType': "PRACTICE", 'startTimeSeconds': 1735100000},
+                'rank': 0, 'points': 5.0, 'penalty': 0}
+    _record_json('post', Codeforces._api_url('contest.standings', handles="FloatingOcean", contestId="2043",
+                                             showUnofficial=True),
+                 _ok({'contest': finished, 'problems': problems, 'rows': [mine, practice]}))
+
+    # 与预测结果一致的 rating 变化，保证 final 分支可以复现
+    predicted = predict([Contestant(row['party']['members'][0]['handle'], row['points'], row['penalty'],
+                                    ratings[row['party']['members'][0]['handle']]) for row in rows])
+    _record_json('post', Codeforces._api_url('contest.ratingChanges', contestId="2043"), _ok(
+        [{'contestId': 2043, 'contestName': contest['name'], 'handle': row['party']['members'][0]['handle'],
+          'rank': row['rank'], 'ratingUpdateTimeSeconds': 1735003200,
+          'oldRating': ratings[row['party']['members'][0]['handle']],
+          'newRating': ratings[row['party']['members'][0]['handle']] +
+                       predicted[row['party']['members'][0]['handle']].delta} for row in rows]))
+
+    _record_json('post', Codeforces._api_url('contest.list'), _ok([
+        {'id': 2056, 'name': "Codeforces Round 997 (Div. 2)", 'type': "CF", 'phase': "BEFORE", 'frozen': False,
+         'durationSeconds': 7200, 'startTimeSeconds': 1736778900, 'relativeTimeSeconds': -1736778900 + _now},
+        {'id': 2055, 'name': "Codeforces Round 996 (Div. 2)", 'type': "CF", 'phase': "BEFORE", 'frozen': False,
+         'durationSeconds': 7200, 'startTimeSeconds': 1736433300, 'relativeTimeSeconds': -1736433300 + _now},
+        {**finished},
+        {'id': 2042, 'name': "Codeforces Round 993 (Div. 4)", 'type': "ICPC", 'phase': "FINISHED",
+         'frozen': False, 'durationSeconds': 8400, 'startTimeSeconds': 1734705300,
+         'relativeTimeSeconds': _now - 1734705300},
+    ]))
+
+    users = {
+        'floatingocean': ("FloatingOcean", 1637, "expert", 1702, "expert", {'organization': "Fujian Normal University"}),
+        'qwedc001': ("qwedc001", 1461, "specialist", 1533, "specialist", {'organization': "Fujian Normal University"}),
+        'jiangly': ("jiangly", 3803, "legendary grandmaster", 4039, "tourist",
+                    {'country': "China", 'city': "Hangzhou", 'organization': ""}),
+        'Lingyu0qwq': ("Lingyu0qwq", 1354, "pupil", 1354, "pupil", {}),
+        'I_am_real_wx': ("I_am_real_wx", None, None, None, None, {}),
+        'BingYu2023': ("BingYu2023", 1189, "newbie", 1262, "pupil", {'firstName': "Bing", 'lastName': "Yu"}),
+        'C10udz': ("C10udz", 1906, "candidate master", 1906, "candidate master", {'country': "China"}),
+    }
+    for query, (handle, rating, rank, max_rating, max_rank, extra) in users.items():
+        info = {'handle': handle, 'contribution': random.randint(0, 30), 'friendOfCount': random.randint(10, 2000),
+                'lastOnlineTimeSeconds': 1734990000, 'registrationTimeSeconds': 1600000000,
+                'avatar': "https://userpic.codeforces.org/no-avatar.jpg",
+                'titlePhoto': "https://userpic.codeforces.org/no-title.jpg", **extra}
+        if rating is not None:
+            info.update(rating=rating, rank=rank, maxRating=max_rating, maxRank=max_rank)
+        _record_json('post', Codeforces._api_url('user.info', handles=query), _ok([info]))
+
+
+def _make_atcoder():
+    def _row(start: str, abbr: str, name: str, duration: str, rated: str) -> str:
+        return (f'<tr><td class="text-center"><a href="#"><time class="fixtime-full">{start}</time></a></td>'
+                f'<td><span>Ⓐ</span> <a href="/contests/{abbr}">{name}</a></td>'
+                f'<td class="text-center">{duration}</td><td class="text-center">{rated}</td></tr>')
+
+    def _table(table_id: str, rows: list[str]) -> str:
+        return f'<div id="{table_id}"><table><tbody>{"".join(rows)}</tbody></table></div>'
+
+    _record_html("https://atcoder.jp/contests/", "<html><body>" + "".join([
+        _table("contest-table-active", [
+            _row("2024-12-24 21:00:00+0900", "ahc041", "AtCoder Heuristic Contest 041", "04:00", "All")]),
+        _table("contest-table-upcoming", [
+            _row("2024-12-28 21:00:00+0900", "abc386", "AtCoder Beginner Contest 386", "01:40", " - 1999"),
+            _row("2024-12-29 21:00:00+0900", "agc070", "AtCoder Grand Contest 070", "03:00", "1200 - ")]),
+        _table("contest-table-recent", [
+            _row("2024-12-21 21:00:00+0900", "abc385", "AtCoder Beginner Contest 385", "01:40", " - 1999"),
+            _row("2024-12-15 21:00:00+0900", "arc188", "AtCoder Regular Contest 188 (Div. 1)", "02:00", "1600 - 2999")])
+    ]) + "</body></html>")
+
+    users = {
+        'FluctuateOcean': ("FluctuateOcean", "floatingocean", "China", "2003", "Fujian Normal University",
+                           "637", "1105", "6 Kyu"),
+        'floatingocean': ("FloatingOcean", "floatingocean", "China", "2003", "Fujian Normal University",
+                          "1037", "1105", "6 Kyu"),
+        'qwedc001': ("qwedc001", "qwedc001", "China", "2003", "Fujian Normal University", "824", "902", "7 Kyu"),
+        'jiangly': ("jiangly", "jiangly", "China", "2001", "Tsinghua University", "3514", "3714", "10 Dan"),
+        'Lingyu0qwq': ("Lingyu0qwq", "Lingyu0qwq", "China", "2004", "Fujian Normal University",
+                       "412", "455", "9 Kyu"),
+    }
+    for query, (handle, cf_handle, country, birth, affiliation, rating, highest, rank) in users.items():
+        _record_html(f"https://atcoder.jp/users/{query}", f"""<html><body>
+<img class="avatar" src="//img.atcoder.jp/assets/icon/avatar.png">
+<a class="username" href="/users/{handle}"><span class="user-green">{handle}</span></a>
+<table class="dl-table">
+<tr><th>Country/Region</th><td>{country}</td></tr>
+<tr><th>Birth Year</th><td>{birth}</td></tr>
+<tr><th>Affiliation</th><td>{affiliation}</td></tr>
+<tr><th>Codeforces ID</th><td>{cf_handle}</td></tr>
+</table>
+<div><h3>Contest Status</h3><table>
+<tr><th class="no-break">Rank</th><td>12345th</td></tr>
+<tr><th class="no-break">Rating</th><td><span class="user-green">{rating}</span></td></tr>
+<tr><th class="no-break">Highest Rating</th><td><span class="user-green">{highest}</span> <span class="gray">―</span> \
+<span class="bold">{rank}</span> <span class="gray">(+95 to promote)</span></td></tr>
+<tr><th class="no-break">Rated Matches </th><td>42</td></tr>
+</table></div>
+</body></html>""")
+
+
+def _make_nowcoder():
+    def _item(name: str, status: str, start: str, end: str, duration: str, rated: str | None) -> str:
+        rated_span = '' if rated is None else '<span class="tag-rating">Rated</span>'
+        rated_range = '' if rated is None or rated == 'All' else f'<li class="icon-nc-flash2">Rating 范围：＞{rated}</li>'
+        return (f'<div class="platform-item-cont"><h4><a href="/acm/contest/100000">{name}</a>{rated_span}'
+                f'<span class="match-status">\n{status}\n</span></h4><ul>'
+                f'<li class="match-time-icon">比赛时间：    {start}\n 至    {end}\n (时长:{duration})</li>'
+                f'{rated_range}</ul></div>')
+
+    for idx, ((top_category_id, category_id), category_name) in enumerate(NowCoder.contest_category.items()):
+        day = 24 + idx % 6
+        current = [
+            _item(f"{category_name} 第 {idx + 2} 场", "报名中", f"2024-12-{day:02d} 19:00",
+                  f"2024-12-{day:02d} 21:00", "2小时", "All" if idx % 2 == 0 else None),
+            _item(f"{category_name} 长期赛", "比赛中", "2024-12-01 00:00", "2024-12-31 23:00",
+                  "30天23小时", "1999" if idx % 3 == 0 else None)]
+        end = [_item(f"{category_name} 第 {idx + 1} 场", "已结束", f"2024-12-{day - 7:02d} 19:00",
+                     f"2024-12-{day - 7:02d} 21:30", "2小时30分钟", "1999")]
+        _record_html(NowCoder._get_category_url((top_category_id, category_id)),
+                     f'<html><body><div class="platform-mod js-current">{"".join(current)}</div>'
+                     f'<div class="platform-mod js-end">{"".join(end)}</div></body></html>')
+
+    def _page(data_list: list[dict]) -> dict:
+        return {'msg': "OK", 'code': 0, 'data': {'dataList': data_list, 'pageInfo': {'pageCount': 1}}}
+
+    users = ['144128559', '140690880', '737857302', '329687984', '815516497', '882260751']
+    for idx, uid in enumerate(users):
+        rating = [1650, 1320, 980, 2105, 2460, 640][idx]
+        _record_html(f"https://ac.nowcoder.com/acm/contest/profile/{uid}", f"""<html><body>
+<a class="head-pic" href="#"><img src="https://images.nowcoder.com/head/{idx + 1}.png"></a>
+<a class="coder-name level-color" href="#">
+    coder_{uid}
+</a>
+<div class="coder-brief">
+    coder_{uid} 的个人简介
+</div>
+<a class="edu-item" href="#"><span class="coder-edu-txt">福建师范大学</span></a>
+<a class="coll-item" href="#"><span class="coder-edu-txt">2027</span></a>
+<div class="profile-status-box">
+<div class="state-num rate-score5">{rating}</div>
+<a href="/acm/contest/rating-index">{1000 + idx * 37}</a>
+<a href="/acm/contest/profile/{uid}/following">{idx * 3}</a>
+<a href="/acm/contest/profile/{uid}/followers">{idx * 5}</a>
+</div>
+</body></html>""")
+        _record_json('get', f"https://ac.nowcoder.com/acm/contest/profile/user-team-list?token=&uid={uid}",
+                     _page([{'name': "FJNU_Peeper", 'rating': "1802"}] if idx == 0 else []))
+
+    _record_json('get', f"https://ac.nowcoder.com/acm-heavy/acm/contest/profile/contest-joined-history?token=&"
+                        f"uid={users[0]}&onlyJoinedFilter=true&searchContestName=&onlyRatingFilter=true&"
+                        f"contestEndFilter=true", _page([
+        {'contestName': "牛客周赛 Round 72", 'rank': 233, 'acceptedCount': 5, 'changeValue': "27",
+         'isTeamSignUp': False},
+        {'contestName': "2024 牛客暑期多校训练营 10", 'rank': 120, 'acceptedCount': 6, 'changeValue': "-12",
+         'isTeamSignUp': True}]))
+
+
+def _make_clist():
+    # 与 Clist.api 构造的地址保持一致
+    query = {'resource_id': 93, 'rating__gte': 800, 'rating__lte': 1000,
+             'url__regex': r'^(?!https:\/\/atcoder\.jp\/contests\/(abc|arc|agc|ahc)).*', 'limit': 1000}
+    payload = '&'.join([f'{key}={quote(str(val))}' for key, val in query.items()])
+    _record_json('get', f"https://clist.by/api/v4/problem?{payload}", {
+        'meta': {'limit': 1000, 'next': None, 'offset': 0, 'previous': None, 'total_count': 2},
+        'objects': [
+            {'id': 1001, 'name': "Cookie Distribution", 'rating': 868, 'resource': "atcoder.jp",
+             'url': "https://atcoder.jp/contests/tessoku-book/tasks/tessoku_book_a", 'tags': []},
+            {'id': 1002, 'name': "Ticket Gate", 'rating': 947, 'resource': "atcoder.jp",
+             'url': "https://atcoder.jp/contests/past202012-open/tasks/past202012_d", 'tags': []}]})
+
+
+if __name__ == '__main__':
+    with fetch_fixture.use(FixtureMode.RECORD, _path):
+        _make_codeforces()
+        _make_atcoder()
+        _make_nowcoder()
+        _make_clist()
@@ -0,0 +1,161 @@
+import json
+import os
+import random
+import time
+import tracemalloc
+import unittest
+
+from src.core.command import CommandIndex
+from src.core.json_stream import loads_projected
+from src.lib.cf_rating_calc import Contestant, RatingCalculator, binary_search, MIN_RATING_LIMIT, MAX_RATING_LIMIT
+from src.platform.online.codeforces import Codeforces
+from src.platform.online.codeforces_problemset import ProblemsetIndex
+
+
+def _mock_standings(rows: int, problems: int = 8) -> str:
+    """构造与 Div.2 规模相当的 contest.standings 响应"""
+    return json.dumps({
+        'status': "OK",
+        'result': {
+            'contest': {'id': 2043, 'name': "Educational Codeforces Round 173", 'phase': "FINISHED"},
+            'problems': [{'index': chr(ord('A') + idx), 'name': f"Problem {idx}"} for idx in range(problems)],
+            'rows': [{
+                'party': {'contestId': 2043, 'members': [{'handle': f"user_{idx}"}], 'participantType': "CONTESTANT",
+                          'ghost': False, 'startTimeSeconds': 1734960900},
+                'rank': idx + 1,
+                'points': float(random.randint(0, problems)),
+                'penalty': random.randint(0, 1000),
+                'successfulHackCount': 0,
+                'unsuccessfulHackCount': 0,
+                'problemResults': [{'points': 1.0, 'rejectedAttemptCount': random.randint(0, 3),
+                                    'type': "FINAL", 'bestSubmissionTimeSeconds': random.randint(0, 7200)}
+                                   for _ in range(problems)]
+            } for idx in range(rows)]
+        }
+    })
+
+
+def _mock_problemset(problems: int) -> list[dict]:
+    """构造与 problemset.problems 规模相当的题库"""
+    tags = ["dp", "greedy", "math", "graphs", "implementation", "brute force", "strings", "trees",
+            "number theory", "dfs and similar", "binary search", "sortings", "constructive algorithms"]
+    return [{'contestId': idx // 6 + 1, 'index': chr(ord('A') + idx % 6), 'name': f"Problem {idx}",
+             'tags': random.sample(tags, random.randint(0, 4)),
+             **({'rating': random.randrange(800, 3600, 100)} if random.random() < 0.9 else {})}
+            for idx in range(problems)]
+
+
+def _mock_contestants(count: int) -> list[Contestant]:
+    """构造指定规模的比赛选手，约三成为未定级的 1400 新号"""
+    return [Contestant(f"user_{idx}", float(random.randint(0, 8)), random.randint(0, 3000),
+                       1400 if random.random() < 0.3 else int(random.gauss(1500, 400)))
+            for idx in range(count)]
+
+
+def _measure(func) -> tuple[object, int, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def _linear_find(commands: dict[str, tuple], func: str) -> tuple[str, tuple] | None:
+    """原先 find_command 中按注册顺序逐个比较的查找方式"""
+    for cmd in commands:
+        starts_with = cmd[-1] == '*' and func.startswith(cmd[:-1])
+        if starts_with or cmd == func:
+            return cmd, commands[cmd]
+    return None
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARK'), "性能测试耗时较长，设置 RUN_BENCHMARK=1 后运行")
+class Benchmark(unittest.TestCase):
+
+    def test_command_dispatch(self):
+        # 与线上规模相当的约 80 个指令名，其中少量为前缀指令
+        tokens = [f"/cmd{idx}" for idx in range(72)] + ["/contest", "/contests", "/比赛", "/今日比赛"]
+        tokens += ["/添加来只*", "/来只*", "/添加*", "/color*"]
+        commands = {cmd: (cmd,) for cmd in tokens}
+        index = CommandIndex()
+        for cmd, entry in commands.items():
+            index.add(cmd, entry)
+
+        queries = [random.choice(tokens).rstrip('*') + random.choice(["", "猫", "capoo"]) for _ in range(20000)]
+        queries += ["你好", "/unknown", "ping"] * 2000
+        start = time.perf_counter()
+        linear = [_linear_find(commands, query) for query in queries]
+        linear_time = time.perf_counter() - start
+        start = time.perf_counter()
+        indexed = [index.find(query) for query in queries]
+        indexed_time = time.perf_counter() - start
+
+        print(f"{len(queries)} lookups over {len(commands)} commands\n"
+              f"linear scan: {linear_time * 1e6 / len(queries):.2f}us/lookup\n"
+              f"command index: {indexed_time * 1e6 / len(queries):.2f}us/lookup")
+
+        self.assertEqual(linear, indexed)  # 注册顺序中较长的前缀在前时，两种方式结果一致
+        self.assertEqual(index.find("/添加来只猫")[0], "/添加来只*")
+        self.assertLess(indexed_time, linear_time)
+
+    def test_problemset_index(self):
+        problems = _mock_problemset(10000)
+        start = time.perf_counter()
+        index = ProblemsetIndex(problems)
+        build_time = time.perf_counter() - start
+
+        queries = [(["dp"], [], 1700, 1900, True), (["dp", "greedy"], ["math"], None, None, False),
+                   ([], ["implementation"], 2400, 3500, False), ([], [], None, None, False)]
+        for include, exclude, min_rating, max_rating, newer in queries:
+            expected = sorted(prob['name'] for prob in problems
+                              if all(tag.replace("-", " ") in prob['tags'] for tag in include) and
+                              not any(tag.replace("-", " ") in prob['tags'] for tag in exclude) and
+                              (min_rating is None or min_rating <= prob.get('rating', -1) <= max_rating) and
+                              (not newer or prob['contestId'] >= 1000))
+            start = time.perf_counter()
+            for _ in range(100):
+                result = index.query(include, exclude, min_rating, max_rating, newer)
+            query_time = (time.perf_counter() - start) / 100
+            print(f"query {include} !{exclude} [{min_rating}, {max_rating}]: {len(result)} problems, "
+                  f"{query_time * 1e6:.0f}us")
+            self.assertEqual(sorted(index.problems[idx]['name'] for idx in result), expected)
+        print(f"build index over {len(problems)} problems: {build_time * 1000:.1f}ms")
+        self.assertIn("dfs-and-similar", index.tags)
+
+    def test_calc_perfs(self):
+        for count in [5000, 20000, 40000]:
+            calculator = RatingCalculator(_mock_contestants(count))
+            start = time.perf_counter()
+            calculator.calculate_deltas(calc_perfs=True)
+            elapsed = time.perf_counter() - start
+
+            # 原先逐人的外层二分过慢，只抽样对比
+            sample = random.sample([c for c in calculator.contestants if c.rank > 1], 20)
+            start = time.perf_counter()
+            expected = [binary_search(MIN_RATING_LIMIT, MAX_RATING_LIMIT,
+                                      lambda x: calculator.calc_delta(c, x) + calculator.adjustment <= 0)
+                        for c in sample]
+            scalar_time = (time.perf_counter() - start) / len(sample) * count
+            print(f"{count} contestants: batched {elapsed:.2f}s, scalar ~{scalar_time:.1f}s (estimated)")
+            self.assertEqual([c.performance for c in sample], expected)
+
+    def test_json_stream_memory(self):
+        text = _mock_standings(30000)
+        full, full_peak, full_time = _measure(lambda: json.loads(text))
+        projected, projected_peak, projected_time = _measure(
+            lambda: loads_projected(text, {'result.rows': Codeforces._project_standings_row}))
+
+        print(f"payload {len(text) / 1024 / 1024:.1f} MB\n"
+              f"json.loads: peak {full_peak / 1024 / 1024:.1f} MB, {full_time:.2f}s\n"
+              f"loads_projected: peak {projected_peak / 1024 / 1024:.1f} MB, {projected_time:.2f}s")
+
+        self.assertEqual(projected['result']['contest'], full['result']['contest'])
+        self.assertEqual(projected['result']['rows'],
+                         [Codeforces._project_standings_row(row) for row in full['result']['rows']])
+        self.assertLess(projected_peak, full_peak / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
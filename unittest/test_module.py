@@ -1,19 +1,75 @@
+import asyncio
+import io
 import json
+import os
+import random
+import tempfile
+import threading
+import time
 import unittest
 from dataclasses import asdict
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
 
+import numpy as np
 from aiohttp import ClientConnectorSSLError
 from botpy.errors import ServerError
 
-from src.core.exception import handle_exception, UnauthorizedError, ModuleRuntimeError
-from src.core.tools import decode_range
+from src.core.admission import AdmissionController
+from src.core.async_runner import run_async, run_async_gather
+from src.core.command import cache_subcommands, CommandIndex
+from src.core.deadline import deadline_scope, get_timeout, check_deadline
+from src.core.degrade import DegradeMode
+from src.core.exception import handle_exception, UnauthorizedError, ModuleRuntimeError, DeadlineExceededError
+from src.core.fetch_cache import ResponseCache, CacheEntry
+from src.core.fetch_fixture import fetch_fixture, FixtureMode
+from src.core.fetch_metrics import FetchMetrics, RollingHistogram
+from src.core.host_health import HostHealth, CircuitState
+from src.core.keyword_matcher import KeywordMatcher
+from src.core.rate_limit import TokenBucketScheduler, KeyedRateLimiter
+from src.core.reply_cache import ReplyCache, ReplyRecorder
+from src.core.scheduler import FairScheduler
+from src.core.session_pool import SessionPool
+from src.core.single_flight import SingleFlight
+from src.core.tools import decode_range, fetch_url, get_fetch_pool_stats, download_img, save_img, write_buffer_once
+from src.lib.cf_rating_calc import Contestant, RatingCalculator, ELO_WIN_PROB, RATING_RANGE_LEN, MIN_RATING_LIMIT, \
+    MAX_RATING_LIMIT, binary_search, binary_search_batch
 from src.platform.model import DynamicContest
 from src.platform.online.atcoder import AtCoder
 from src.platform.online.codeforces import Codeforces
+from src.platform.online.codeforces_predict import ContestPredictCache
+from src.platform.online.codeforces_problemset import ProblemsetIndex
+from src.platform.online.nowcoder import NowCoder
 
+from fixture_case import FixtureTestCase
 
-class Module(unittest.TestCase):
+
+class _StaticHandler(BaseHTTPRequestHandler):
+    """以 keep-alive 连接返回固定内容"""
+    protocol_version = "HTTP/1.1"
+    body = b"ok"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_locally(case: unittest.TestCase, handler: type[BaseHTTPRequestHandler] = _StaticHandler) -> str:
+    """在本机启动测试用的 http 服务，测试结束时关闭，返回其地址"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    case.addCleanup(server.server_close)
+    case.addCleanup(server.shutdown)
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+class Module(FixtureTestCase):
 
     def test_cf_user_standings(self):
         handle = "FloatingOcean"
@@ -63,6 +119,444 @@ class Module(unittest.TestCase):
         )
         print(json.dumps(asdict(contest), ensure_ascii=False, indent=4))
 
+    def test_command_index(self):
+        index = CommandIndex()
+        for cmd in ["/来只*", "/来*", "/来只猫", "/添加来只*"]:
+            index.add(cmd, (cmd,))
+        self.assertEqual(index.find("/来只猫"), ("/来只猫", ("/来只猫",)))  # 完整匹配优先于前缀匹配
+        self.assertEqual(index.find("/来只狗")[0], "/来只*")  # 取最长的前缀
+        self.assertEqual(index.find("/来点")[0], "/来*")
+        self.assertEqual(index.find("/来只猫", accept=lambda entry: entry[0] != "/来只猫")[0], "/来只*")
+        self.assertEqual(index.find("/来只狗", accept=lambda entry: entry[0] != "/来只*")[0], "/来*")  # 被过滤时尝试更短的前缀
+        self.assertIsNone(index.find("/添加"))
+        self.assertIsNone(index.find("/cf"))
+
+    def test_problemset_index(self):
+        index = ProblemsetIndex([
+            {'contestId': 1, 'index': 'A', 'name': "a", 'tags': ["dp", "greedy"], 'rating': 1900},
+            {'contestId': 1200, 'index': 'B', 'name': "b", 'tags': ["dp"], 'rating': 1700},
+            {'contestId': 1300, 'index': 'C', 'name': "c", 'tags': ["dp", "math"], 'rating': 1800},
+            {'contestId': 1400, 'index': 'D', 'name': "d", 'tags': ["dfs and similar"]},
+            {'contestId': 900, 'index': 'E', 'name': "e", 'tags': ["greedy"], 'rating': 800},
+        ])
+
+        def names(*args) -> list[str]:
+            return [index.problems[idx]['name'] for idx in index.query(*args)]
+
+        self.assertEqual(index.tags, ["dfs-and-similar", "dp", "greedy", "math"])
+        self.assertEqual(names([], []), ["e", "b", "c", "a", "d"])  # 按难度排序，无难度的题在末尾
+        self.assertEqual(names(["dp"], [], 1700, 1800), ["b", "c"])  # 难度区间两端都包含
+        self.assertEqual(names(["dp"], ["math"]), ["b", "a"])
+        self.assertEqual(names(["dp", "greedy"], []), ["a"])
+        self.assertEqual(names([], [], 800, 3500, True), ["b", "c"])  # 限制难度时排除无难度的题
+        self.assertEqual(names(["dfs-and-similar"], [], None, None, True), ["d"])
+        self.assertEqual(names(["unknown"], []), [])
+        self.assertIsNone(index.pick(["math"], [], 800, 1000))
+
+    def test_response_cache(self):
+        cache = ResponseCache({r'^https://codeforces\.com/api/': 60}, max_entries=2, max_bytes=1024, max_stale=60)
+        self.assertEqual(cache.get_ttl("https://codeforces.com/api/contest.list"), 60)
+        self.assertIsNone(cache.get_ttl("https://atcoder.jp/contests/"))
+        for idx in range(3):
+            cache.store(f"key{idx}", CacheEntry(url=f"url{idx}", status_code=200, headers={'ETag': f'"{idx}"'},
+                                                content=b'{}', ttl=60))
+        self.assertIsNone(cache.lookup("key0"))  # LRU 淘汰
+        self.assertEqual(cache.lookup("key2").get_conditional_headers(), {'If-None-Match': '"2"'})
+        self.assertEqual(cache.get_stats(), {'entries': 2, 'bytes': 4})
+
+        with tempfile.TemporaryDirectory() as persist_dir:
+            cache = ResponseCache({}, max_entries=1, max_bytes=1024, max_stale=60, persist_dir=persist_dir)
+            for idx in range(2):
+                cache.store(f"key{idx}", CacheEntry(url=f"url{idx}", status_code=200, headers={},
+                                                    content=b'{}', ttl=60))
+            self.assertEqual(cache.lookup("key0").url, "url0")  # 从内存中淘汰后仍可从磁盘载入
+            cache.clear()
+            self.assertIsNone(cache.lookup("key1"))
+
+        stale = CacheEntry(url="url", status_code=200, headers={}, content=b'{}', ttl=60, stored_at=0)
+        with patch('src.core.tools._lookup_cache', return_value=("key", stale)), \
+                patch.object(fetch_fixture, 'is_replaying', return_value=False), \
+                patch('src.core.tools._request_with_retry') as request:
+            request.side_effect = ConnectionError("upstream down")
+            self.assertEqual(fetch_url("url", method='get').content, b'{}')  # 连接失败时使用过期缓存兜底
+            request.side_effect = DeadlineExceededError()
+            self.assertRaises(DeadlineExceededError, fetch_url, "url", method='get')  # 超时不使用过期缓存
+
+    def test_token_bucket(self):
+        now = [0.0]
+        limiter = TokenBucketScheduler(rate=20, clock=lambda: now[0])
+        limiter.acquire()  # 取走唯一的令牌，使后续调用排队
+        self.assertAlmostEqual(limiter.estimate_wait(), 0.05)
+        now[0] += 0.025
+        self.assertAlmostEqual(limiter.estimate_wait(), 0.025)
+        limiter.penalize(1)
+        self.assertAlmostEqual(limiter.estimate_wait(), 1.05)
+
+        order = []
+        threads = [threading.Thread(target=lambda idx=idx: (limiter.acquire(), order.append(idx))) for idx in range(3)]
+        for idx, thread in enumerate(threads):
+            thread.start()
+            while limiter.get_stats()['waiting'] <= idx:  # 等待该线程进入队列，保证到达顺序
+                time.sleep(0.001)
+        for waiting in [2, 1, 0]:  # 时钟不前进时不会放行，每次只补充一个令牌
+            now[0] += 10
+            while limiter.get_stats()['waiting'] > waiting:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [0, 1, 2])
+
+        # 等待超过 timeout 时放弃排队，不影响之后的调用
+        self.assertRaises(TimeoutError, limiter.acquire, timeout=0)
+        self.assertRaises(TimeoutError, asyncio.run, limiter.async_acquire(timeout=0))
+        self.assertEqual(limiter.get_stats()['waiting'], 0)
+        now[0] += 0.05
+        self.assertEqual(limiter.acquire(timeout=0), 0)
+
+    def test_api_wait_hint(self):
+        # 空闲时不应提示排队，与指令自身之后还要发出几次调用无关
+        self.assertEqual(TokenBucketScheduler(rate=0.5).estimate_wait(), 0)
+        self.assertEqual(Codeforces.estimate_api_wait(), 0)
+
+    def test_problemset_retry(self):
+        # 刷新失败后在重试间隔内不再重新获取，也不会因为没有旧的索引而每次都获取
+        with patch.object(Codeforces, '_problemset_index', None), patch.object(Codeforces, '_problemset_updated', 0.0), \
+                patch.object(Codeforces, '_problemset_failed', -float('inf')), \
+                patch.object(Codeforces, '_api', return_value=-1) as api:
+            self.assertIsNone(Codeforces.get_problemset_index())
+            self.assertIsNone(Codeforces.get_problemset_index())
+            self.assertEqual(api.call_count, 1)
+            Codeforces._problemset_failed -= 60
+            api.return_value = {'problems': [{'contestId': 1, 'index': 'A', 'name': "a", 'tags': ["dp"]}]}
+            self.assertEqual(Codeforces.get_problemset_index().tags, ["dp"])
+            self.assertEqual(api.call_count, 2)
+
+    def test_fetch_fixture(self):
+        contests = {'status': "OK", 'result': [{'id': 2043, 'name': "Educational Codeforces Round 173",
+                                                 'phase': "FINISHED", 'durationSeconds': 7200,
+                                                 'startTimeSeconds': 1734960900}]}
+        with tempfile.TemporaryDirectory() as fixture_path:
+            with fetch_fixture.use(FixtureMode.RECORD, fixture_path):
+                fetch_fixture.record('post', Codeforces._api_url('contest.list'), None, 200,
+                                     {'Content-Type': "application/json;charset=UTF-8"},
+                                     json.dumps(contests).encode())
+            with fetch_fixture.use(FixtureMode.REPLAY, fixture_path, latency=0.1):
+                self.assertEqual(Codeforces._fetch_contest_list_all(), contests['result'])
+
+    def test_session_pool(self):
+        base_url = _serve_locally(self)
+        pool = SessionPool()
+        self.assertIs(pool.get_session(f"{base_url}/a"), pool.get_session(f"{base_url}/b"))
+        self.assertIsNot(pool.get_session(base_url), pool.get_session(base_url, {'http': "http://127.0.0.1:1"}))
+
+        with fetch_fixture.use(FixtureMode.OFF, None):
+            for _ in range(3):
+                self.assertEqual(fetch_url(f"{base_url}/", method='get').content, b"ok")
+        self.assertEqual(get_fetch_pool_stats()[base_url.split("//")[1]],
+                         {'requests': 3, 'connections': 1, 'reused': 2})
+
+    def test_async_runner(self):
+        async def _echo(val, delay: float = 0):
+            await asyncio.sleep(delay)
+            return val, threading.current_thread().name
+
+        self.assertEqual(run_async(_echo(1)), (1, "fetch-loop"))
+        # 先完成的协程不影响返回顺序
+        self.assertEqual([val for val, _ in run_async_gather(_echo(1, 0.02), _echo(2), _echo(3, 0.01))], [1, 2, 3])
+
+        async def _fail():
+            raise ValueError("failed in coroutine")
+
+        with self.assertRaisesRegex(ValueError, "failed in coroutine"):
+            run_async_gather(_echo(1), _fail())
+        self.assertEqual(run_async(_echo(2)), (2, "fetch-loop"))  # 异常不会影响后台循环
+
+    def test_nowcoder_async_contest_list(self):
+        # 各分类页面在后台循环上并发抓取，结果应与逐个抓取一致
+        contests = run_async(NowCoder._async_get_contest_list())
+        self.assertEqual(contests, NowCoder._get_contest_list())
+        self.assertEqual(len(contests[0]), len(NowCoder.contest_category))
+        self.assertEqual(run_async(NowCoder.async_get_contest_list()), NowCoder.get_contest_list())
+
+    def test_fetch_metrics(self):
+        now = [0.0]
+        histogram = RollingHistogram(window=60, clock=lambda: now[0])
+        for value in range(1, 21):
+            histogram.add(value)
+        self.assertEqual(histogram.get_summary(), {'count': 20, 'avg': 10.5, 'p50': 10, 'p95': 20, 'max': 20})
+        now[0] += 30
+        histogram.add(100)
+        now[0] += 31  # 前 20 个样本过期
+        self.assertEqual(histogram.get_values(), [100])
+        now[0] += 60
+        self.assertEqual(histogram.get_summary(), {})
+
+        metrics = FetchMetrics()
+        metrics.record("https://codeforces.com/contest/2043/problem/A", 200, 10, {'total': 0.5})
+        metrics.record("https://codeforces.com/contest/2042/problem/B", 404, 0, {'total': 0.1})
+        endpoints = metrics.get_summary("codeforces.com")
+        self.assertEqual(list(endpoints.keys()), ["/contest/:id/problem/A", "/contest/:id/problem/B"])
+        self.assertEqual(metrics.get_summary()["codeforces.com"]['errors'], 1)
+
+        for idx in range(70):  # 超出上限的 endpoint 合并计入 /*
+            metrics.record(f"https://atcoder.jp/users/user{idx}", 200, 10, {})
+        endpoints = metrics.get_summary("atcoder.jp")
+        self.assertEqual(len(endpoints), 65)
+        self.assertEqual(endpoints['/*']['requests'], 6)
+
+    def test_save_img(self):
+        images = {'a': b"GIF89a-same", 'b': b"GIF89a-same", 'c': b"GIF89a-other", 'missing': b""}
+        with tempfile.TemporaryDirectory() as fixture_path, tempfile.TemporaryDirectory() as dir_path:
+            with fetch_fixture.use(FixtureMode.RECORD, fixture_path):
+                for name, content in images.items():
+                    fetch_fixture.record('get', f"https://img.example.com/{name}", None,
+                                         404 if name == 'missing' else 200, {}, content)
+            self.enterContext(fetch_fixture.use(FixtureMode.REPLAY, fixture_path))
+
+            written = []
+            for name in ['a', 'b', 'c', 'a']:  # 相同内容的摘要相同，只写入一次
+                md5, buffer = download_img(f"https://img.example.com/{name}")
+                with buffer:
+                    written.append(write_buffer_once(buffer, f"{md5}.gif", dir_path))
+            self.assertEqual(written, [True, False, True, False])
+            self.assertEqual(len(os.listdir(dir_path)), 2)
+
+            file_path = os.path.join(dir_path, "saved", "img.gif")
+            self.assertTrue(save_img("https://img.example.com/a", file_path))
+            with open(file_path, 'rb') as f:
+                self.assertEqual(f.read(), images['a'])
+
+            # 下载或写入失败时不留下文件
+            broken_path = os.path.join(dir_path, "broken.gif")
+            self.assertFalse(save_img("https://img.example.com/missing", broken_path))
+            self.assertRaises(ConnectionError, save_img, "https://img.example.com/unknown", broken_path)
+
+            class _BrokenBuffer(io.BytesIO):
+                def read(self, *args):
+                    if self.tell() > 0:
+                        raise OSError("connection reset")
+                    return super().read(4)
+
+            self.assertRaises(OSError, write_buffer_once, _BrokenBuffer(b"GIF89a-broken"), "broken.gif", dir_path)
+            self.assertFalse(os.path.exists(broken_path))
+            self.assertEqual(len(os.listdir(dir_path)), 3)
+
+    def test_deadline(self):
+        self.assertEqual(get_timeout(30), 30)
+        with deadline_scope(10):
+            with deadline_scope(60):  # 嵌套时取更早的截止时间
+                self.assertLessEqual(get_timeout(30), 10)
+        now = [0.0]
+        with deadline_scope(5, clock=lambda: now[0]):
+            now[0] += 4
+            self.assertEqual(get_timeout(30), 1)
+            with deadline_scope(60):  # 嵌套时沿用外层的时钟
+                now[0] += 1
+                self.assertRaises(DeadlineExceededError, check_deadline)
+        self.assertEqual(handle_exception(DeadlineExceededError()), "处理超时，请稍后重试")
+
+    def test_host_health_probe(self):
+        now = [0.0]
+        health = HostHealth("example.com", failure_threshold=1, cooldown=30, probe_timeout=60, clock=lambda: now[0])
+        health.record_failure()
+        self.assertTrue(health.is_open())
+        now[0] += 29
+        self.assertFalse(health.allow_request())  # 冷却中
+        now[0] += 1
+        self.assertTrue(health.allow_request())  # 半开状态下放行一个探测请求
+        self.assertFalse(health.allow_request())
+        health.release_probe()  # 探测未记录结果即结束
+        self.assertTrue(health.allow_request())
+        now[0] += 59
+        self.assertFalse(health.allow_request())
+        now[0] += 1
+        self.assertTrue(health.allow_request())  # 超时未释放的探测视为已放弃
+        self.assertEqual(health.state, CircuitState.HALF_OPEN)
+        health.record_success()
+        self.assertEqual(health.state, CircuitState.CLOSED)
+
+    def test_fair_scheduler(self):
+        scheduler = FairScheduler("test")
+        for idx in range(20):
+            scheduler.put("group:spam", f"spam-{idx}")
+        self.assertEqual(scheduler.put("group:quiet", "quiet-0"), 1)  # 轮询中只需等待刷屏会话的一条
+        scheduler.put("c2c:render", "render-0", priority=1)
+        order = [scheduler.get()[1] for _ in range(3)]
+        self.assertEqual(order, ["spam-0", "quiet-0", "spam-1"])
+        self.assertEqual(scheduler.size(), 19)
+        self.assertEqual(scheduler.drain()[-1], "render-0")
+        stats = scheduler.get_wait_stats()  # 只统计经 get 取出的消息
+        self.assertEqual({key: summary['count'] for key, summary in stats.items()}, {'group:spam': 2, 'group:quiet': 1})
+
+    def test_single_flight(self):
+        group, received = SingleFlight(), []
+        flight = group.join("/contests", received.append)
+        self.assertIsNotNone(flight)
+        with flight:
+            flight.publish("正在查询近期比赛，请稍等")
+            self.assertIsNone(group.join("/contests", received.append))  # 加入时补发已有的回复
+            flight.publish("[Contest] 近期比赛")
+        self.assertEqual(received, ["正在查询近期比赛，请稍等", "[Contest] 近期比赛"])
+        self.assertEqual(group.coalesced, 1)
+        self.assertIsNotNone(group.join("/contests", received.append))  # 执行结束后重新执行
+
+    def test_reply_cache(self):
+        now = [0.0]
+        cache, recorder, received = ReplyCache(max_entries=2, clock=lambda: now[0]), ReplyRecorder(), []
+        recorder("正在查询 jiangly 的 Codeforces 平台信息，请稍等", img_path=None, img_url=None, modal_words=True)
+        recorder("[Codeforces] jiangly", img_path=None, img_url=None, modal_words=False)
+        self.assertFalse(cache.replay("reply_cf_request", "info jiangly", received.append))
+        cache.store("reply_cf_request", "info jiangly", recorder.replies, ttl=60)
+        self.assertTrue(cache.replay("reply_cf_request", "info jiangly",
+                                     lambda content, **_: received.append(content)))
+        self.assertEqual(received, ["[Codeforces] jiangly"])  # 进度提示不会被缓存
+        self.assertEqual(cache.get_stats()["reply_cf_request"], {'hits': 1, 'misses': 1, 'entries': 1})
+        now[0] += 60
+        self.assertIsNotNone(cache.lookup("reply_cf_request", "info jiangly"))
+        now[0] += 1
+        self.assertIsNone(cache.lookup("reply_cf_request", "info jiangly"))
+        cache.store("alive", "/alive", recorder.replies, ttl=60)
+        self.assertEqual(cache.invalidate("alive"), 1)
+
+        key = cache_subcommands("info")
+        self.assertEqual(key(["/cf", "info", "Jiangly"]), "info Jiangly")  # 回复中带有原样的参数，不能忽略大小写
+        self.assertIsNone(key(["/cf", "pick", "dp"]))
+
+    def test_admission(self):
+        controller = AdmissionController("test", workers=2, max_pending=4, max_wait=60, shed_ratio=0.5)
+        first = controller.admit("reply_cf_request", 0, 0)
+        controller.start(first.estimate)
+        controller.finish("reply_cf_request", first.estimate, 2)  # 记录一次 2 秒的处理耗时
+        admissions = [controller.admit("reply_cf_request", 0, ahead) for ahead in range(4)]
+        self.assertTrue(all(admission.admitted for admission in admissions))
+        self.assertEqual([admission.eta for admission in admissions], [2, 2, 4, 5])
+        self.assertEqual(controller.admit("reply_cf_request", 0, 4).reason, "queue_full")
+        controller.start(2)
+        controller.finish("reply_cf_request", 2, 2)
+        self.assertEqual(controller.admit("send_version_info", 2, 3).reason, "low_priority")  # 低优先级先被拒绝
+        self.assertEqual(controller.get_stats()['rejected'], {'queue_full': 1, 'low_priority': 1})
+
+        controller.start(2)  # 命中缓存的请求耗时极短，不计入平均耗时
+        controller.finish("reply_cf_request", 2, 0.001, sampled=False)
+        self.assertEqual(controller.get_stats()['service_times']['reply_cf_request'], 2)
+
+    def test_keyed_rate_limiter(self):
+        limiter = KeyedRateLimiter(rate=10, burst=3)
+        self.assertEqual(limiter.try_acquire("user:a", 2), 0)
+        self.assertGreater(limiter.try_acquire("user:a", 2), 0)  # 不同的键互不影响
+        self.assertEqual(limiter.try_acquire("user:b", 3), 0)
+        limiter.refund("user:a", 2)
+        self.assertEqual(limiter.try_acquire("user:a", 5), 0)  # 超过容量的消耗按容量计算
+        time.sleep(0.2)
+        self.assertEqual(limiter.try_acquire("user:a", 2), 0)
+
+    def test_degrade_mode(self):
+        now = [0.0]
+        mode = DegradeMode(enter_pending=10, exit_pending=2, enter_latency=30, exit_latency=10, min_duration=60,
+                           clock=lambda: now[0])
+        self.assertFalse(mode.update(5, 5))
+        self.assertTrue(mode.update(12, 5))
+        self.assertTrue(mode.update(5, 5))  # 介于两个阈值之间时保持降级
+        now[0] += 59
+        self.assertTrue(mode.update(1, 1))  # 未达到最短持续时间
+        now[0] += 1
+        self.assertTrue(mode.update(1, 15))
+        self.assertFalse(mode.update(1, 1))
+        self.assertEqual(mode.get_stats()['switches'], 2)
+
+    def test_keyword_matcher(self):
+        matcher = KeywordMatcher([[["谢谢", "thank"], ["qaq"]], [["你是谁", "你谁"], ["猜猜我是谁"]], [["省"], ["一眼丁真"]]])
+        self.assertEqual(matcher.find_groups("Thank you"), {0})
+        self.assertEqual(matcher.find_groups("谢谢，你是谁"), {0, 1})
+        self.assertEqual(matcher.find_groups("生日快乐"), {2})  # 按拼音匹配
+        self.assertEqual(matcher.find_groups(""), set())
+        self.assertEqual(matcher.match("你谁啊"), "猜猜我是谁")
+
+    def test_rating_calc_batch(self):
+        contestants = [Contestant(f"user_{idx}", random.randint(0, 6), random.randint(0, 300),
+                                  random.choice([1400, random.randint(0, 3500)])) for idx in range(500)]
+        calculator = RatingCalculator(contestants)
+        calculator.calc_seed()
+        self.assertIs(RatingCalculator(contestants[::-1]).seeds.calc(
+            np.array([c.rating for c in contestants])), calculator.seed)  # 直方图相同时复用 seed
+        calculator.reassign_ranks()
+        calculator.calc_deltas()
+        self.assertEqual([c.delta for c in contestants], [calculator.calc_delta(c, c.rating) for c in contestants])
+
+    def test_binary_search_batch(self):
+        low = np.array([0, 0, 5, 10, -500, 3])
+        high = np.array([100, 1, 6, 2000, 6000, 3])  # 含区间长度为 1 与空区间的元素
+        targets = np.array([37, 0, 5, 2000, -600, 3])
+        expected = [binary_search(lo, hi, lambda x: x >= target) for lo, hi, target in zip(low, high, targets)]
+        self.assertEqual(binary_search_batch(low, high, lambda x: x >= targets).tolist(), expected)
+        self.assertEqual(low.tolist(), [0, 0, 5, 10, -500, 3])  # 不修改传入的数组
+
+    def test_calc_perfs_batch(self):
+        contestants = [Contestant(f"user_{idx}", random.randint(0, 6), random.randint(0, 300),
+                                  random.choice([1400, random.randint(0, 3500)])) for idx in range(200)]
+        calculator = RatingCalculator(contestants)
+        calculator.calculate_deltas(calc_perfs=True)
+
+        ranks = np.array([c.rank for c in contestants])
+        ratings = np.array([c.rating for c in contestants])
+        self.assertEqual(calculator.rank_to_ratings(ranks, ratings).tolist(),
+                         [calculator.rank_to_rating(c.rank, c.rating) for c in contestants])
+        expected = [float('inf') if c.rank == 1 else
+                    binary_search(MIN_RATING_LIMIT, MAX_RATING_LIMIT,
+                                  lambda x: calculator.calc_delta(c, x) + calculator.adjustment <= 0)
+                    for c in contestants]
+        self.assertEqual([c.performance for c in contestants], expected)
+
+    def test_rating_calc_baseline(self):
+        # 与改用实数 FFT 之前的实现对比，规模与 Div.2 相当，约三成为 1400 的新号
+        contestants = [Contestant(f"user_{idx}", random.randint(0, 7), random.randint(0, 1000),
+                                  1400 if random.random() < 0.3 else min(3800, max(0, int(random.gauss(1500, 400)))))
+                       for idx in range(20000)]
+        calculator = RatingCalculator([Contestant(c.handle, c.points, c.penalty, c.rating) for c in contestants])
+        calculator.calculate_deltas()
+
+        count = np.zeros(2 * RATING_RANGE_LEN)
+        for c in contestants:
+            count[c.rating] += 1
+        baseline = RatingCalculator(contestants)
+        baseline.seed = 1 + np.fft.ifft(np.fft.fft(count) * np.fft.fft(ELO_WIN_PROB)).real
+        baseline.reassign_ranks()
+        for c in contestants:
+            c.delta = baseline.calc_delta(c, c.rating)
+        baseline.adjust_deltas()
+
+        self.assertLess(np.abs(calculator.seed - baseline.seed).max(), 1e-8)
+        self.assertEqual({c.handle: c.delta for c in calculator.contestants}, {c.handle: c.delta for c in contestants})
+        self.assertEqual(calculator.adjustment, baseline.adjustment)
+
+    def test_contest_predict_cache(self):
+        now = [0.0]
+        cache = ContestPredictCache(refresh=60, clock=lambda: now[0])
+        calls, started, release = [], threading.Event(), threading.Event()
+
+        def compute(contest_id: str):
+            calls.append(contest_id)
+            started.set()
+            release.wait()
+            return ({'tourist': len(calls)}, False) if contest_id == "2043" else (-1, False)
+
+        threads = [threading.Thread(target=cache.get, args=("2043", compute)) for _ in range(5)]
+        threads[0].start()
+        started.wait()  # 第一个查询计算期间到达的查询等待其结果
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, ["2043"])  # 并发查询只计算一次
+        self.assertEqual(cache.get("2043", compute), {'tourist': 1})
+        self.assertEqual(cache.get("1", compute), -1)
+        self.assertEqual(cache.get("1", compute), -1)  # 失败的结果不缓存
+        now[0] += 59
+        self.assertEqual(cache.get("2043", compute), {'tourist': 1})
+        now[0] += 1
+        self.assertEqual(cache.get("2043", compute), {'tourist': 4})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,5 @@
 import json
 import unittest
-
 from dataclasses import asdict
 
 from src.platform.online.atcoder import AtCoder
@@ -8,32 +7,39 @@ from src.platform.online.codeforces import Codeforces
 from src.platform.online.nowcoder import NowCoder
 from src.platform.collect.clist import Clist
 
+from fixture_case import FixtureTestCase
+
+
+class Platform(FixtureTestCase):
 
-class Platform(unittest.TestCase):
     def test_codeforces_contest_list(self):
         p = Codeforces.get_contest_list()
         self.assertIsNotNone(p)
-        print(json.dumps([asdict(d) for d in p], indent=4, ensure_ascii=False))
+        print(json.dumps([asdict(d) for contests in p for d in contests], indent=4, ensure_ascii=False))
 
     def test_atcoder_contest_list(self):
         p = AtCoder.get_contest_list()
         self.assertIsNotNone(p)
-        print(json.dumps([asdict(d) for d in p], indent=4, ensure_ascii=False))
+        self.assertEqual([contest.abbr for contest in p[2]], ["ABC385"])
+        print(json.dumps([asdict(d) for contests in p for d in contests], indent=4, ensure_ascii=False))
 
     def test_nowcoder_contest_list(self):
         p = NowCoder.get_contest_list()
         self.assertIsNotNone(p)
-        print(json.dumps([asdict(d) for d in p], indent=4, ensure_ascii=False))
+        self.assertEqual(len(p[2]), 1)
+        print(json.dumps([asdict(d) for contests in p for d in contests], indent=4, ensure_ascii=False))
 
     def test_atcoder_user(self):
         handle = "FluctuateOcean"
         p = AtCoder.get_user_info(handle)
         self.assertIsNotNone(p)
+        self.assertIn("比赛Rating: 637", p[0])
 
     def test_clist(self):
         problems = Clist.api("problem", resource_id=93, rating__gte=800, rating__lte=1000,
                              url__regex=r'^(?!https:\/\/atcoder\.jp\/contests\/(abc|arc|agc|ahc)).*')
         self.assertIsNotNone(problems)
+        self.assertEqual(len(problems), 2)
         print(json.dumps(problems, indent=4, ensure_ascii=False))
 
     def test_nowcoder_user(self):
@@ -48,6 +54,7 @@ class Platform(unittest.TestCase):
         p = NowCoder.get_user_last_contest(handle)
         print(p)
         self.assertIsNotNone(p)
+        self.assertIn("最近一次比赛: 牛客周赛 Round 72", p)
 
     def test_codeforces_user_card(self):
         test_handles = ['floatingocean', 'qwedc001', 'jiangly', 'Lingyu0qwq', 'I_am_real_wx', 'BingYu2023', 'C10udz']
@@ -10,8 +10,10 @@ from src.platform.online.nowcoder import NowCoder
 from src.render.render_color_card import ColorCardRenderer
 from src.render.render_contest_list import ContestListRenderer
 
+from fixture_case import FixtureTestCase
 
-class Render(unittest.TestCase):
+
+class Render(FixtureTestCase):
 
     def test_color_rand(self):
         load_colors()
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch, Mock
+
+import robot
+from src.core.admission import Admission
+from src.core.command import CommandLane
+from src.core.ingress import is_public_command, IngressLimiter
+from src.core.interact import call_handle_message
+from src.core.reply_cache import reply_cache
+from src.module.message import RobotMessage
+
+
+class _Message(RobotMessage):
+    """不实际发送的私聊消息，只记录回复的内容"""
+
+    def __init__(self, content: str, author_id: str = "user"):
+        super().__init__(None)
+        self.replies = []
+        self.setup_c2c_message(None, SimpleNamespace(id="msg", content=content, attachments=[],
+                                                     author=SimpleNamespace(user_openid=author_id)))
+
+    def reply(self, content: str, img_path: str = None, img_url: str = None, modal_words: bool = True):
+        self.replies.append(content)
+
+
+class Robot(unittest.TestCase):
+
+    def setUp(self):
+        # 不启动工作线程，加入的消息停留在各自的队列中
+        self.lanes = {CommandLane.IO: robot.WorkerLane("io", 4), CommandLane.CPU: robot.WorkerLane("cpu", 2)}
+        self.enterContext(patch.dict(robot._lanes, self.lanes))
+
+    def test_lane_routing(self):
+        cpu_contents = ["/qr hello", "/color", "/来只 猫"]
+        io_contents = ["/cf info jiangly", "/atc info jiangly", "ping"]
+        for idx, content in enumerate(cpu_contents + io_contents):
+            robot.join_in_message(_Message(content, f"lane-user-{idx}"))
+
+        self.assertEqual([message.content for message in self.lanes[CommandLane.CPU].drain()], cpu_contents)
+        self.assertEqual([message.content for message in self.lanes[CommandLane.IO].drain()], io_contents)
+
+    def test_public_command_filter(self):
+        for content in ["/cf info jiangly", "  /CF", "/来只猫", "/添加来只 猫"]:  # 含以 * 结尾的前缀指令
+            self.assertTrue(is_public_command(content), content)
+        for content in ["", "今天吃什么", "hello /cf", "/foo", "/ cf"]:
+            self.assertFalse(is_public_command(content), content)
+
+        def _receive(content: str):
+            asyncio.run(robot.MyClient.on_message_create(client, SimpleNamespace(
+                id="msg", content=content, attachments=[], channel_id="channel", author=SimpleNamespace(id="user"))))
+
+        client = SimpleNamespace(robot=SimpleNamespace(name="bot"), api=None, loop=None)
+        packed = Mock(wraps=RobotMessage)
+        with patch.object(robot, 'RobotMessage', packed), patch.object(robot, 'join_in_message') as join:
+            for content in ["今天吃什么", "/foo bar"]:  # 闲聊与未注册的指令在构造 RobotMessage 之前丢弃
+                _receive(content)
+            packed.assert_not_called()
+            join.assert_not_called()
+
+            _receive("/cf info jiangly")
+            self.assertEqual(join.call_args.args[0].tokens, ["/cf", "info", "jiangly"])
+    def test_handled_report(self):
+        message = _Message("/ping")
+        self.assertTrue(call_handle_message(message))
+        self.assertEqual(message.replies, ["pong"])
+
+        # 命中回复缓存时没有实际执行指令，耗时不应计入指令的平均耗时
+        reply_cache.store("alive", "/alive", [(("全部服务正常",), {})], 60)
+        message = _Message("/alive")
+        self.assertFalse(call_handle_message(message))
+        self.assertEqual(message.replies, ["全部服务正常"])
+
+    def test_rejected_refund(self):
+        # 准入被拒绝的请求退还限流令牌，重试时不会因为之前被拒绝的请求而超出频率
+        rejected = (Admission(False, 120, 10, "too_slow"), 0)
+        with patch.object(robot, 'ingress_limiter', IngressLimiter()), \
+                patch.object(self.lanes[CommandLane.CPU], 'submit', return_value=rejected):
+            messages = [_Message("/qr hello", "refund-user") for _ in range(5)]
+            for message in messages:
+                robot.join_in_message(message)
+        self.assertTrue(all(message.replies == ["当前请求较多，预计需要等待 120 秒，请稍后再试"] for message in messages))
+
+
+if __name__ == '__main__':
+    unittest.main()